@@ -10,6 +10,7 @@ class TaskConfigEditor(QWidget):
     def __init__(self):
         super().__init__()
         self.task_param_widgets = []
+        self.task_schedule_widgets = []
         self.task_config = []
         self.setWindowTitle("任务配置编辑器")
         self.init_ui()
@@ -127,6 +128,20 @@ class TaskConfigEditor(QWidget):
             self.param_layout.addRow(QLabel(param_def["desc"]), widget)
             self.task_param_widgets.append((pname, widget))
 
+        # 调度参数，为 0 或空时不写入配置，按默认间隔循环执行
+        self.task_schedule_widgets = []
+        for key, desc in (("interval", "执行间隔/秒"), ("cooldown", "成功后冷却/秒"), ("priority", "优先级")):
+            widget = QSpinBox()
+            widget.setRange(0, 86400)
+            widget.setValue(int(task.get(key) or 0))
+            self.param_layout.addRow(QLabel(desc), widget)
+            self.task_schedule_widgets.append((key, widget))
+        daily_at = task.get("daily_at") or ""
+        widget = QLineEdit(daily_at if isinstance(daily_at, str) else ",".join(daily_at))
+        widget.setPlaceholderText("HH:MM，多个用逗号分隔")
+        self.param_layout.addRow(QLabel("每日定时"), widget)
+        self.task_schedule_widgets.append(("daily_at", widget))
+
     def save_params(self):
         idx = self.config_list.currentRow()
         if idx < 0 or idx >= len(self.task_config):
@@ -139,6 +154,12 @@ class TaskConfigEditor(QWidget):
             else:
                 value = widget.text()
             self.task_config[idx]["params"][pname] = value
+        for key, widget in self.task_schedule_widgets:
+            value = widget.text().strip() if isinstance(widget, QLineEdit) else widget.value()
+            if value:
+                self.task_config[idx][key] = value
+            else:
+                self.task_config[idx].pop(key, None)
 
     def move_up(self):
         row = self.config_list.currentRow()
@@ -0,0 +1,270 @@
+# adb_client.py
+import shlex
+import socket
+import subprocess
+import threading
+import time
+from collections import deque
+from queue import Queue
+from typing import Dict, List, Tuple
+
+import config_manager
+
+
+class AdbError(RuntimeError):
+    pass
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("ADB 连接已关闭")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _send_request(sock: socket.socket, payload: str):
+    """
+    smart-socket 请求：4 位十六进制长度 + 内容，服务端回复 OKAY 或 FAIL + 错误信息
+    """
+    data = payload.encode("utf-8")
+    sock.sendall(b"%04x" % len(data) + data)
+    status = _recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(_recv_exact(sock, 4), 16)
+        raise AdbError(_recv_exact(sock, length).decode("utf-8", errors="ignore"))
+    raise AdbError(f"ADB 协议错误：{status!r}")
+
+
+class AdbClient:
+    """
+    ADB server 原生协议客户端（默认 localhost:5037），不再为每条命令启动 adb.exe
+
+    adb server 在一条服务（shell:/exec:）结束后会关闭连接，因此连接池中保存的是
+    已完成 host:transport 切换、可直接发送服务请求的预热连接，由后台线程补充
+    """
+
+    def __init__(self, host=config_manager.ADB_HOST, port=config_manager.ADB_PORT,
+                 pool_size=config_manager.ADB_POOL_SIZE, timeout=config_manager.ADB_SOCKET_TIMEOUT,
+                 max_idle=config_manager.ADB_POOL_MAX_IDLE):
+        """
+        :param pool_size: 每个设备保持的预热连接数
+        :param timeout: socket 超时，秒
+        :param max_idle: 预热连接最长闲置时间，超过后丢弃，秒
+        """
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._pools: Dict[str, deque] = {}
+        self._refill_queue = Queue()
+        self._refill_pending = set()
+        self._refill_thread = None
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _open_transport(self, serial) -> socket.socket:
+        sock = self._connect()
+        try:
+            _send_request(sock, f"host:transport:{serial}")
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _acquire(self, serial) -> Tuple[socket.socket, bool]:
+        """
+        :return: (连接, 是否来自连接池)
+        """
+        now = time.time()
+        with self._lock:
+            pool = self._pools.get(serial)
+            while pool:
+                sock, created_at = pool.popleft()
+                if now - created_at <= self.max_idle:
+                    self._schedule_refill(serial)
+                    return sock, True
+                sock.close()
+            self._schedule_refill(serial)
+        return self._open_transport(serial), False
+
+    def _schedule_refill(self, serial):
+        # 调用方需持有 self._lock
+        if self.pool_size <= 0 or serial in self._refill_pending:
+            return
+        self._refill_pending.add(serial)
+        self._refill_queue.put(serial)
+        if self._refill_thread is None or not self._refill_thread.is_alive():
+            self._refill_thread = threading.Thread(target=self._refill_loop, name="adb-pool-refill", daemon=True)
+            self._refill_thread.start()
+
+    def _refill_loop(self):
+        while True:
+            serial = self._refill_queue.get()
+            with self._lock:
+                self._refill_pending.discard(serial)
+                missing = self.pool_size - len(self._pools.get(serial, ()))
+            for _ in range(missing):
+                try:
+                    sock = self._open_transport(serial)
+                except (OSError, AdbError):
+                    break
+                with self._lock:
+                    self._pools.setdefault(serial, deque()).append((sock, time.time()))
+
+    def _service(self, serial, service) -> bytes:
+        sock, pooled = self._acquire(serial)
+        try:
+            try:
+                _send_request(sock, service)
+            except (OSError, AdbError):
+                if not pooled:
+                    raise
+                # 预热连接可能已被 server 关闭（设备重连等），换新连接重试一次
+                sock.close()
+                sock = self._open_transport(serial)
+                _send_request(sock, service)
+            return _recv_all(sock)
+        finally:
+            sock.close()
+
+    def shell(self, serial, command: str) -> bytes:
+        return self._service(serial, f"shell:{command}")
+
+    def exec(self, serial, command: str) -> bytes:
+        return self._service(serial, f"exec:{command}")
+
+    def open_stream(self, serial, service) -> socket.socket:
+        """
+        打开一条常驻服务连接（如 exec:sh），由调用方负责读写与关闭
+        """
+        sock = self._open_transport(serial)
+        try:
+            _send_request(sock, service)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def host_request(self, payload: str) -> str:
+        """
+        host:version / host:devices 等 host 服务，返回 4 位十六进制长度前缀的内容
+        """
+        with self._connect() as sock:
+            _send_request(sock, payload)
+            length = int(_recv_exact(sock, 4), 16)
+            return _recv_exact(sock, length).decode("utf-8", errors="ignore")
+
+    def devices(self) -> List[Tuple[str, str]]:
+        output = self.host_request("host:devices")
+        return [tuple(line.split("\t", 1)) for line in output.splitlines() if "\t" in line]
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                while pool:
+                    pool.popleft()[0].close()
+            self._pools.clear()
+
+
+def join_command(cmd_args) -> str:
+    return " ".join(shlex.quote(str(arg)) for arg in cmd_args)
+
+
+class AdbSubprocessTransport:
+    """
+    原有方式：每条命令启动一个 adb 进程
+    """
+
+    def __init__(self, adb_path, serial):
+        self.adb_path = adb_path
+        self.serial = serial
+
+    def _run(self, cmd_args) -> bytes:
+        result = subprocess.run([self.adb_path, "-s", self.serial] + list(cmd_args),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                creationflags=subprocess.CREATE_NO_WINDOW)
+        if result.returncode != 0:
+            raise AdbError(result.stderr.decode("utf-8", errors="ignore"))
+        return result.stdout
+
+    def shell(self, cmd_args) -> bytes:
+        return self._run(["shell"] + list(cmd_args))
+
+    def exec_out(self, cmd_args) -> bytes:
+        return self._run(["exec-out"] + list(cmd_args))
+
+
+class AdbSocketTransport:
+    """
+    通过 AdbClient 直连 adb server；server 不可达时退回子进程方式（adb.exe 会顺带拉起 server）
+    """
+
+    def __init__(self, adb_path, serial, client: AdbClient = None):
+        self.serial = serial
+        self.client = client or get_adb_client()
+        self.fallback = AdbSubprocessTransport(adb_path, serial)
+
+    def shell(self, cmd_args) -> bytes:
+        try:
+            return self.client.shell(self.serial, join_command(cmd_args))
+        except ConnectionRefusedError:
+            return self.fallback.shell(cmd_args)
+
+    def exec_out(self, cmd_args) -> bytes:
+        try:
+            return self.client.exec(self.serial, join_command(cmd_args))
+        except ConnectionRefusedError:
+            return self.fallback.exec_out(cmd_args)
+
+
+_adb_client = None
+_adb_client_lock = threading.Lock()
+
+
+def get_adb_client() -> AdbClient:
+    global _adb_client
+    with _adb_client_lock:
+        if _adb_client is None:
+            _adb_client = AdbClient()
+        return _adb_client
+
+
+def set_adb_client(client: AdbClient) -> AdbClient:
+    """
+    替换进程共享的 AdbClient（如指向虚拟设备集群的假 adb server）
+
+    :return: 原来的 AdbClient
+    """
+    global _adb_client
+    with _adb_client_lock:
+        previous, _adb_client = _adb_client, client
+        return previous
+
+
+def create_transport(adb_path, serial, kind=config_manager.ADB_TRANSPORT):
+    """
+    :param kind: "socket" 直连 adb server，"subprocess" 每条命令启动 adb 进程
+    """
+    if kind == "subprocess":
+        return AdbSubprocessTransport(adb_path, serial)
+    return AdbSocketTransport(adb_path, serial)
@@ -0,0 +1,183 @@
+# async_engine.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import config_manager
+import log_util
+from adb_client import AdbError, get_adb_client, join_command
+from emulator_executor import EmulatorExecutor
+from engine_stats import EngineStats
+from task_executor import TaskExecutor
+from task_scheduler import TaskScheduler
+
+
+async def _async_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, payload: str):
+    data = payload.encode("utf-8")
+    writer.write(b"%04x" % len(data) + data)
+    await writer.drain()
+    status = await reader.readexactly(4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(await reader.readexactly(4), 16)
+        raise AdbError((await reader.readexactly(length)).decode("utf-8", errors="ignore"))
+    raise AdbError(f"ADB 协议错误：{status!r}")
+
+
+class AsyncAdbClient:
+    """
+    基于 asyncio 的 adb server 协议客户端，所有设备的 ADB 通信复用同一个事件循环，
+    并用信号量限制同时进行的请求数
+    """
+
+    def __init__(self, host=config_manager.ADB_HOST, port=config_manager.ADB_PORT,
+                 max_concurrency=config_manager.ASYNC_ADB_MAX_CONCURRENCY):
+        self.host = host
+        self.port = port
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _service(self, serial, service) -> bytes:
+        async with self._semaphore:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                await _async_request(reader, writer, f"host:transport:{serial}")
+                await _async_request(reader, writer, service)
+                return await reader.read()
+            finally:
+                writer.close()
+
+    async def shell(self, serial, command: str) -> bytes:
+        return await self._service(serial, f"shell:{command}")
+
+    async def exec(self, serial, command: str) -> bytes:
+        return await self._service(serial, f"exec:{command}")
+
+
+class AsyncAdbTransport:
+    """
+    供 EmulatorExecutor 使用的同步接口，实际 I/O 提交到引擎的事件循环上执行
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, client: AsyncAdbClient, serial):
+        self.loop = loop
+        self.client = client
+        self.serial = serial
+
+    def _run(self, coro) -> bytes:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(config_manager.ADB_SOCKET_TIMEOUT)
+
+    def shell(self, cmd_args) -> bytes:
+        return self._run(self.client.shell(self.serial, join_command(cmd_args)))
+
+    def exec_out(self, cmd_args) -> bytes:
+        return self._run(self.client.exec(self.serial, join_command(cmd_args)))
+
+
+class AsyncEngine:
+    """
+    asyncio 执行引擎：所有模拟器的调度与等待是同一事件循环上的协程，ADB 通信走异步 socket 并统一限流。
+
+    注意：已有的 @register_task 任务与 YAML 任务是同步代码，任务体在线程池中执行，其中的截图/点击/匹配
+    会阻塞所在工作线程直到事件循环上的 I/O 完成。因此同时执行任务的模拟器数不超过线程池大小，
+    无限循环类任务（如 自动洗练）会一直占用一个工作线程；线程池默认与模拟器数量相同，
+    本引擎节省的是空闲等待与 ADB 连接，而不是执行中任务的线程数
+    """
+
+    def __init__(self, workers=config_manager.ASYNC_ENGINE_WORKERS,
+                 cycle_interval=config_manager.SCHEDULE_DEFAULT_INTERVAL):
+        """
+        :param workers: 执行同步任务的线程数，0 表示与模拟器数量相同；小于模拟器数量时多出的模拟器要排队等待空闲线程
+        :param cycle_interval: 未设置 interval / daily_at 的任务的执行间隔，秒
+        """
+        self.workers = workers
+        self.cycle_interval = cycle_interval
+        self.stats = EngineStats("asyncio")
+        self._pool: ThreadPoolExecutor = None
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="async-engine", daemon=True)
+        self._client: AsyncAdbClient = None
+        self._executors: Dict[str, TaskExecutor] = {}
+        self._futures = {}
+        self._running = False
+        # 调度协程睡眠到下一个任务到期，stop() 时立即唤醒
+        self._wake = asyncio.Event()
+
+    def start(self, jobs: List[Tuple[object, dict, str]]):
+        """
+        :param jobs: [(EmulatorStatus, task_config, capture_format), ...]
+        """
+        self._running = True
+        workers = self.workers or len(jobs)
+        if workers < len(jobs):
+            log_util.log.warning(f"asyncio 引擎线程数 {workers} 少于模拟器数 {len(jobs)}，超出的模拟器需等待空闲线程")
+        self._pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="async-task")
+        self._loop_thread.start()
+        self._client = asyncio.run_coroutine_threadsafe(self._create_client(), self._loop).result()
+        for emulator, task_config, capture_format in jobs:
+            if not emulator.is_running():
+                log_util.log.print(f"⚠️ 模拟器 {emulator.name} 未运行，跳过")
+                continue
+            transport = AsyncAdbTransport(self._loop, self._client, emulator.device_name)
+            executor = EmulatorExecutor(config_manager.ADB_PATH, emulator.name, emulator.device_name,
+                                        transport=transport, capture_format=capture_format)
+            task_executor = TaskExecutor(emulator_executor=executor)
+            self._executors[emulator.name] = task_executor
+            self._futures[emulator.name] = asyncio.run_coroutine_threadsafe(
+                self._run_emulator(task_executor, task_config), self._loop)
+
+    async def _create_client(self):
+        # 与同步 AdbClient 连接同一个 adb server
+        client = get_adb_client()
+        return AsyncAdbClient(client.host, client.port)
+
+    async def _run_emulator(self, task_executor: TaskExecutor, task_config):
+        loop = asyncio.get_running_loop()
+        scheduler = TaskScheduler(task_config, default_interval=self.cycle_interval)
+        while self._running:
+            executed = 0
+            try:
+                executed = await loop.run_in_executor(self._pool, scheduler.run_due, task_executor)
+            except Exception as e:
+                log_util.log.print(f"[{task_executor.emulator_name}] 执行出错：{e}")
+            if executed:
+                self.stats.record_cycle(task_executor.emulator_name, executed)
+            if not self._running:
+                break
+            delay = scheduler.seconds_until_next()
+            if delay is None:
+                log_util.log.print(f"⚠️ {task_executor.emulator_name} 没有可调度的任务")
+                break
+            if executed:
+                log_util.log.print(f"✅ {task_executor.emulator_name} 执行完毕，{scheduler.describe_next()}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        log_util.log.print(f"🛑 {task_executor.emulator_name} 已停止")
+
+    def is_running(self):
+        return self._running
+
+    def stop(self, wait=False, timeout=None):
+        """
+        通知所有模拟器停止，当前轮次结束后关闭事件循环与线程池
+
+        :param wait: 是否阻塞到事件循环退出
+        """
+        self._running = False
+        for task_executor in self._executors.values():
+            task_executor.close()
+        self._loop.call_soon_threadsafe(self._wake.set)
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        if wait:
+            self._loop_thread.join(timeout)
+
+    async def _shutdown(self):
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in self._futures.values()), return_exceptions=True)
+        for task_executor in self._executors.values():
+            task_executor.emulator_executor.close()
+        log_util.log.print(self.stats.report())
+        self._pool.shutdown(wait=False)
+        asyncio.get_running_loop().stop()
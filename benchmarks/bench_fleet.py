@@ -0,0 +1,197 @@
+# benchmarks/bench_fleet.py
+"""
+虚拟设备集群端到端压测：不需要雷电模拟器，N 台虚拟设备跑真实任务，统计吞吐、尾延迟与内存
+
+    python -m benchmarks.bench_fleet --devices 100 --duration 60                 # 打开联盟 + 建棋
+    python -m benchmarks.bench_fleet --devices 100 --tasks 自动洗练 --initial pet
+    python -m benchmarks.bench_fleet --engine asyncio --output fleet.json
+
+默认在本进程内启动虚拟设备，设备端的 PNG/raw 输出与被测代码共用 GIL；
+设备数较多时建议先在另一个进程运行 python -m fake_device --devices N --port 5038，再加 --fleet-port 5038
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import config_manager
+import log_util
+import metrics
+from async_engine import AsyncEngine
+from emulator_executor import EmulatorExecutor
+from adb_client import AdbClient, set_adb_client
+from engine_stats import process_memory_mb
+from fake_device import FakeEmulatorManager, FakeFleet, Scenario
+from task_executor import TaskExecutor
+from task_scheduler import TaskScheduler
+from utils import task_defined
+
+SCENARIO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fleet_scenario.yaml")
+
+
+def run_threads(emulators, task_config, duration, cycle_interval):
+    """
+    与 TaskThread 相同的循环：每台设备一个线程，按 TaskScheduler 执行到期任务，未设置间隔的任务每 cycle_interval 秒一次
+    """
+    task_executors = []
+    stop_event = threading.Event()
+
+    def loop(task_executor: TaskExecutor):
+        scheduler = TaskScheduler(task_config, default_interval=cycle_interval)
+        while not stop_event.is_set():
+            scheduler.run_due(task_executor)
+            delay = scheduler.seconds_until_next()
+            if delay is None:
+                break
+            stop_event.wait(delay)
+
+    threads = []
+    for emulator in emulators:
+        executor = EmulatorExecutor(config_manager.ADB_PATH, emulator.name, emulator.device_name)
+        task_executor = TaskExecutor(emulator_executor=executor)
+        task_executors.append(task_executor)
+        thread = threading.Thread(target=loop, args=(task_executor,), name=f"fleet-{emulator.name}", daemon=True)
+        threads.append(thread)
+        thread.start()
+
+    peak_threads = sample_until(duration)
+    stop_event.set()
+    for task_executor in task_executors:
+        task_executor.close()
+    for thread in threads:
+        thread.join(timeout=30)
+    for task_executor in task_executors:
+        task_executor.emulator_executor.close()
+    return peak_threads
+
+
+def run_asyncio(emulators, task_config, duration, cycle_interval):
+    engine = AsyncEngine(cycle_interval=cycle_interval)
+    engine.start([(emulator, task_config, config_manager.CAPTURE_FORMAT) for emulator in emulators])
+    peak_threads = sample_until(duration)
+    engine.stop(wait=True, timeout=60)
+    return peak_threads
+
+
+def sample_until(duration):
+    """
+    等待 duration 秒，期间记录峰值线程数与内存
+    """
+    global peak_memory
+    peak_threads = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        peak_threads = max(peak_threads, threading.active_count())
+        memory = process_memory_mb()
+        if memory is not None:
+            peak_memory = max(peak_memory, memory)
+        time.sleep(min(1.0, max(deadline - time.time(), 0)))
+    return peak_threads
+
+
+peak_memory = 0.0
+
+
+LATENCY_HISTOGRAMS = (metrics.task_seconds, metrics.step_seconds, metrics.capture_seconds, metrics.match_seconds,
+                      metrics.tap_seconds)
+
+
+def percentile(values, q):
+    """
+    已排序样本的精确分位数，相邻样本间线性插值（与 numpy.percentile 默认方法一致）
+    """
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def histogram_summary(histogram: metrics.Histogram, group_index=None):
+    """
+    合并所有模拟器的原始样本计算精确分位数（分桶插值在样本少、桶宽大时误差很大），group_index 为分组用的标签位置（如任务名）
+
+    :return: {分组: {count, mean_ms, p50_ms, p95_ms, p99_ms}}
+    """
+    merged = {}
+    for labels, values in histogram.samples().items():
+        key = labels[group_index] if group_index is not None else "all"
+        merged.setdefault(key, []).extend(values)
+    summary = {}
+    for key, values in merged.items():
+        values.sort()
+        summary[key] = {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            **{f"p{int(q * 100)}_ms": round(percentile(values, q) * 1000, 2) for q in (0.5, 0.95, 0.99)},
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="虚拟设备集群端到端压测")
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=60, help="压测时长，秒")
+    parser.add_argument("--tasks", default="建棋", help="逗号分隔的任务名，建棋 会先执行 打开联盟")
+    parser.add_argument("--initial", help="虚拟设备初始画面，默认为场景的 initial")
+    parser.add_argument("--engine", choices=["thread", "asyncio"], default="thread")
+    parser.add_argument("--cycle-interval", type=float, default=3)
+    parser.add_argument("--scenario", default=SCENARIO_PATH)
+    parser.add_argument("--fleet-port", type=int, help="连接单独进程运行的虚拟设备集群（python -m fake_device）")
+    parser.add_argument("--output", help="结果 JSON 路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    log_util.log.set_level("WARNING")
+    for histogram in LATENCY_HISTOGRAMS:
+        histogram.keep_samples()
+    task_defined.load_all_tasks()
+    scenario = Scenario.load(args.scenario)
+    fleet = FakeFleet(scenario, args.devices, args.initial)
+    if args.fleet_port:
+        set_adb_client(AdbClient(port=args.fleet_port))
+    else:
+        fleet.start()
+    emulators = FakeEmulatorManager(fleet).get_all_emulators()
+    task_config = {"tasks": [{"name": name.strip(), "params": {}} for name in args.tasks.split(",") if name.strip()]}
+
+    memory_before = process_memory_mb()
+    started = time.time()
+    runner = run_asyncio if args.engine == "asyncio" else run_threads
+    peak_threads = runner(emulators, task_config, args.duration, args.cycle_interval)
+    elapsed = time.time() - started
+    # 外部集群的设备计数在另一个进程中，这里只有本进程内集群的数据
+    device_stats = fleet.stats() if not args.fleet_port else None
+    fleet.stop()
+
+    tasks_by_status = {}
+    for (_, status), value in metrics.tasks_total.items():
+        tasks_by_status[status] = tasks_by_status.get(status, 0) + value
+    report = {
+        "devices": args.devices,
+        "engine": args.engine,
+        "tasks": args.tasks,
+        "duration_s": round(elapsed, 1),
+        "tasks_total": tasks_by_status,
+        "tasks_per_minute": round(tasks_by_status.get("success", 0) / elapsed * 60, 1),
+        "taps_per_minute": round(device_stats["taps"] / elapsed * 60, 1) if device_stats else None,
+        "device": device_stats,
+        "task_latency": histogram_summary(metrics.task_seconds, group_index=1),
+        "step_latency": histogram_summary(metrics.step_seconds, group_index=1),
+        "capture_latency": histogram_summary(metrics.capture_seconds),
+        "match_latency": histogram_summary(metrics.match_seconds),
+        "tap_latency": histogram_summary(metrics.tap_seconds),
+        "memory_mb": {"before": memory_before, "peak": peak_memory or None},
+        "peak_threads": peak_threads,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# benchmarks/bench_pipeline.py
+"""
+截图/匹配流水线离线基准测试，不需要模拟器
+
+    python -m benchmarks.bench_pipeline                     # 运行并与 benchmarks/baseline.json 比较
+    python -m benchmarks.bench_pipeline --output result.json
+    python -m benchmarks.bench_pipeline --update-baseline   # 以本次结果作为新基准
+    python -m benchmarks.bench_pipeline --build-corpus      # 重新生成合成帧
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+import yaml
+
+import config_manager
+import log_util
+from emulator_executor import EmulatorExecutor, parse_raw_screencap
+from fake_device import encode_raw, synthetic_screen
+from frame_snapshot import Frame
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# 少于该迭代次数时中位数受单次抖动影响太大：只检查模板是否找到，不比较耗时，也不允许写入基准
+MIN_COMPARE_ITERATIONS = 15
+
+# back_home 依次探测的返回按钮
+BACK_BUTTONS = ["buttons/back.png", "buttons/back2.png", "buttons/back3.png", "buttons/back4.png",
+                "buttons/back5.png"]
+
+MATCH_MODES = ["full", "pyramid"]
+
+
+class CorpusTransport:
+    """
+    把帧库中的图片当作设备屏幕的传输对象，可直接传给 EmulatorExecutor(transport=...)
+    """
+
+    def __init__(self, image):
+        self.set_image(image)
+
+    def set_image(self, image):
+        self.png = cv2.imencode(".png", image)[1].tobytes()
+        self.raw = encode_raw(image)
+
+    def shell(self, cmd_args) -> bytes:
+        return b""
+
+    def exec_out(self, cmd_args) -> bytes:
+        return self.png if "-p" in cmd_args else self.raw
+
+
+def load_manifest(corpus_dir=CORPUS_DIR):
+    with open(os.path.join(corpus_dir, "corpus.yaml"), "r", encoding="utf-8") as f:
+        return yaml.safe_load(f).get("frames", {})
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """
+    :return: {帧名: (BGR 图片, expect)}
+    """
+    corpus = {}
+    for name, spec in load_manifest(corpus_dir).items():
+        path = os.path.join(corpus_dir, spec["file"])
+        image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR) if os.path.exists(path) else None
+        if image is None:
+            raise FileNotFoundError(f"帧库缺少 {path}，请先运行 --build-corpus")
+        corpus[name] = (image, spec.get("expect") or {})
+    return corpus
+
+
+def build_corpus(corpus_dir=CORPUS_DIR, width=720, height=1280):
+    """
+    生成合成帧，把 expect 中的模板贴到指定位置
+    """
+    for index, (name, spec) in enumerate(load_manifest(corpus_dir).items()):
+        templates = {path: expect["at"] for path, expect in (spec.get("expect") or {}).items()}
+        image = synthetic_screen(width, height, index, templates)
+        cv2.imencode(".png", image)[1].tofile(os.path.join(corpus_dir, spec["file"]))
+        print(f"已生成 {spec['file']}", file=sys.stderr)
+
+
+def measure(func, iterations, warmup=2):
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    median = times[len(times) // 2]
+    return {
+        "iterations": iterations,
+        "median_ms": round(median * 1000, 4),
+        "p95_ms": round(times[min(int(len(times) * 0.95), len(times) - 1)] * 1000, 4),
+        "ops_per_s": round(1 / median, 2) if median else None,
+    }
+
+
+def run_suite(iterations=20):
+    corpus = load_corpus()
+    results = {}
+
+    # 解码：png（screencap -p）与 raw（screencap 原始像素）到灰度图
+    for name, (image, _) in corpus.items():
+        transport = CorpusTransport(image)
+        results[f"decode_png/{name}"] = measure(
+            lambda: cv2.cvtColor(cv2.imdecode(np.frombuffer(transport.png, np.uint8), cv2.IMREAD_COLOR),
+                                 cv2.COLOR_BGR2GRAY), iterations)
+        results[f"decode_raw/{name}"] = measure(
+            lambda: Frame(captured_at=0, rgba=parse_raw_screencap(transport.raw)).gray, iterations)
+
+    transport = CorpusTransport(next(iter(corpus.values()))[0])
+    executor = EmulatorExecutor(config_manager.ADB_PATH, "bench", "bench-device", transport=transport,
+                                capture_format="raw")
+    for mode in MATCH_MODES:
+        for name, (image, expects) in corpus.items():
+            transport.set_image(image)
+            for template_path, expect in expects.items():
+                template_name = os.path.splitext(os.path.basename(template_path))[0]
+                for search, region in (("full", None), ("region", tuple(expect["region"]))):
+                    def find_once():
+                        executor.match_memo.clear()
+                        return executor.find_img(template_path, region=region, max_age=0, match_mode=mode)
+
+                    result = measure(find_once, iterations)
+                    x, y, found = find_once()
+                    result["found"] = bool(found)
+                    results[f"find_img_{search}_{mode}/{name}/{template_name}"] = result
+
+            # back_home 的五个返回按钮：在没有返回按钮的帧上为最坏情况（全部模板都要匹配一遍）
+            def find_back():
+                executor.match_memo.clear()
+                return executor.find_img(BACK_BUTTONS, max_age=0, match_mode=mode)
+
+            result = measure(find_back, iterations)
+            result["found"] = bool(find_back()[2])
+            results[f"back_home_list_{mode}/{name}"] = result
+
+    # 同一帧重复查找：只走匹配结果缓存
+    transport.set_image(corpus["home"][0] if "home" in corpus else next(iter(corpus.values()))[0])
+    executor.find_img(BACK_BUTTONS, max_age=0)
+    results["back_home_list_memo_hit"] = measure(lambda: executor.find_img(BACK_BUTTONS, max_age=60), iterations)
+    executor.close()
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms, timing=True):
+    """
+    中位数变慢超过 tolerance 比例、且绝对差值超过噪声下限才算退化。
+    噪声下限取 min_delta_ms 与基准自身 p95 - 中位数 中的较大者，抖动大的用例相应放宽
+
+    :param timing: 为 False 时只检查模板是否找到
+    :return: [(用例, 基准中位数, 本次中位数, 比值, 原因)]，只包含退化的用例
+    """
+    regressions = []
+    for case, base in baseline.get("cases", {}).items():
+        current = results.get(case)
+        if current is None:
+            continue
+        if base.get("found") and not current.get("found"):
+            regressions.append((case, base["median_ms"], current["median_ms"], None, "未找到模板"))
+            continue
+        if not timing:
+            continue
+        ratio = current["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        floor = max(min_delta_ms, base.get("p95_ms", 0) - base["median_ms"])
+        if ratio > 1 + tolerance and current["median_ms"] - base["median_ms"] > floor:
+            regressions.append((case, base["median_ms"], current["median_ms"], ratio, "变慢"))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="截图/匹配流水线离线基准测试")
+    parser.add_argument("--iterations", type=int, default=20,
+                        help=f"少于 {MIN_COMPARE_ITERATIONS} 次时不比较耗时")
+    parser.add_argument("--output", help="结果 JSON 路径，默认输出到标准输出")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的中位数变慢比例")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="忽略小于该值的绝对变慢")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--build-corpus", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.build_corpus:
+        build_corpus()
+        return 0
+
+    if args.update_baseline and args.iterations < MIN_COMPARE_ITERATIONS:
+        print(f"写入基准至少需要 --iterations {MIN_COMPARE_ITERATIONS}", file=sys.stderr)
+        return 2
+
+    log_util.log.set_level("WARNING")
+    report = {"environment": environment(), "cases": run_suite(args.iterations)}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"基准已更新：{args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("没有基准文件，跳过比较", file=sys.stderr)
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print("注意：基准来自不同的运行环境，耗时比较仅供参考", file=sys.stderr)
+    timing = args.iterations >= MIN_COMPARE_ITERATIONS
+    if not timing:
+        print(f"迭代次数少于 {MIN_COMPARE_ITERATIONS}，只检查模板是否找到，不比较耗时", file=sys.stderr)
+    regressions = compare(report["cases"], baseline, args.tolerance, args.min_delta_ms, timing)
+    for case, base, current, ratio, reason in regressions:
+        ratio_text = f" x{ratio:.2f}" if ratio else ""
+        print(f"退化 [{reason}] {case}: {base:.3f}ms -> {current:.3f}ms{ratio_text}", file=sys.stderr)
+    if regressions:
+        return 1
+    print(f"与基准比较：{len(baseline.get('cases', {}))} 个用例均未退化", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# benchmarks/bench_startup.py
+"""
+冷启动导入耗时报告：在子进程中以 python -X importtime 导入主界面模块并加载任务，
+列出最耗时的导入，检查 cv2/numpy/任务模块等是否被提前导入，以及总耗时是否超出预算
+
+    python -m benchmarks.bench_startup                  # 按 config_manager.TASK_LOAD_MODE 加载任务
+    python -m benchmarks.bench_startup --mode eager     # 对比启动时全量加载
+    python -m benchmarks.bench_startup --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import config_manager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 界面启动阶段不应导入的模块（前缀匹配），应在首次执行任务时才加载
+DEFERRED_MODULES = ("cv2", "numpy", "pytesseract", "tesserocr", "yaml", "emulator_executor", "async_engine",
+                    "tasks.")
+
+RESULT_MARKER = "__startup_result__"
+
+CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import log_util
+log_util.log.set_level("WARNING")
+import task_manifest
+from simulator_ui import EmulatorSelector
+imported = time.perf_counter()
+task_manifest.load_tasks(sys.argv[1])
+loaded = time.perf_counter()
+print(%r + json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "load_tasks_ms": (loaded - imported) * 1000,
+    "modules": sorted(sys.modules),
+}))
+""" % RESULT_MARKER
+
+
+def parse_importtime(text):
+    """
+    解析 -X importtime 输出
+
+    :return: [(模块名, 自身耗时ms, 累计耗时ms, 嵌套层级)]
+    """
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return rows
+
+
+def run_once(mode):
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, mode], cwd=ROOT_DIR,
+                             capture_output=True, text=True, encoding="utf-8", errors="replace")
+    result_line = next((line for line in process.stdout.splitlines() if line.startswith(RESULT_MARKER)), None)
+    if process.returncode != 0 or result_line is None:
+        raise RuntimeError(f"启动子进程失败：{process.stderr[-2000:]}")
+    result = json.loads(result_line[len(RESULT_MARKER):])
+    result["imports"] = parse_importtime(process.stderr)
+    return result
+
+
+def run_report(mode, runs, top):
+    # 第一次运行会生成 .pyc、任务清单与编译缓存，不计入结果
+    run_once(mode)
+    results = [run_once(mode) for _ in range(runs)]
+    last = results[-1]
+    top_level = sorted((row for row in last["imports"] if row[3] == 0), key=lambda row: -row[2])
+    deferred = [name for name in last["modules"]
+                if any(name == prefix.rstrip(".") or name.startswith(prefix if prefix.endswith(".") else prefix + ".")
+                       for prefix in DEFERRED_MODULES)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    load_tasks_ms = statistics.median(r["load_tasks_ms"] for r in results)
+    return {
+        "mode": mode,
+        "runs": runs,
+        "import_ms": round(import_ms, 1),
+        "load_tasks_ms": round(load_tasks_ms, 1),
+        "total_ms": round(import_ms + load_tasks_ms, 1),
+        "module_count": len(last["modules"]),
+        "top_imports": [{"module": name, "self_ms": round(self_ms, 1), "cumulative_ms": round(cumulative_ms, 1)}
+                        for name, self_ms, cumulative_ms, _ in top_level[:top]],
+        "deferred_imported": deferred,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冷启动导入耗时报告")
+    parser.add_argument("--mode", default=config_manager.TASK_LOAD_MODE, choices=["lazy", "eager"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="列出的顶层导入数")
+    parser.add_argument("--budget-ms", type=float, default=config_manager.STARTUP_BUDGET_MS)
+    parser.add_argument("--output", help="结果 JSON 路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    report = run_report(args.mode, args.runs, args.top)
+    report["budget_ms"] = args.budget_ms
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    failed = False
+    if report["total_ms"] > args.budget_ms:
+        print(f"超出预算：{report['total_ms']}ms > {args.budget_ms}ms", file=sys.stderr)
+        failed = True
+    if args.mode == "lazy" and report["deferred_imported"]:
+        print(f"启动阶段提前导入了：{', '.join(report['deferred_imported'])}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# capture_worker.py
+import itertools
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+import config_manager
+import log_util
+from frame_snapshot import Frame
+
+
+class FrameSlot:
+    """
+    最新帧槽位：(序号, Frame) 元组整体替换，读取无需加锁；等待新帧时才使用条件变量
+    """
+
+    def __init__(self):
+        self._latest: Tuple[int, Optional[Frame]] = (0, None)
+        self._cond = threading.Condition()
+
+    def publish(self, frame: Frame) -> int:
+        with self._cond:
+            seq = self._latest[0] + 1
+            self._latest = (seq, frame)
+            self._cond.notify_all()
+        return seq
+
+    def latest(self) -> Tuple[int, Optional[Frame]]:
+        return self._latest
+
+    def wait_newer(self, seq, timeout=None) -> Tuple[int, Optional[Frame]]:
+        """
+        等待序号大于 seq 的帧，超时返回 (当前序号, None)
+        """
+        return self.wait_for(lambda s, f: s > seq, timeout)
+
+    def wait_for(self, predicate: Callable[[int, Frame], bool], timeout=None) -> Tuple[int, Optional[Frame]]:
+        """
+        等待满足 predicate 的帧；超时仍不满足时返回 (当前序号, None)，不返回不符合条件的旧帧
+        """
+        latest = self._latest
+        if latest[1] is not None and predicate(*latest):
+            return latest
+        with self._cond:
+            if self._cond.wait_for(lambda: self._latest[1] is not None and predicate(*self._latest), timeout):
+                return self._latest
+            return self._latest[0], None
+
+
+class CaptureWorker:
+    """
+    后台截图线程：按 fps 持续从 source 取帧写入 FrameSlot，匹配线程直接读取最新帧
+    """
+
+    def __init__(self, source: Callable[[], Frame], fps=config_manager.CAPTURE_WORKER_FPS, name="capture"):
+        """
+        :param source: 取帧函数，返回 Frame；默认用 EmulatorExecutor.capture，测试时可换成 ImageSequenceSource
+        :param fps: 每秒最多截图次数，截图本身更慢时连续截图
+        """
+        self.source = source
+        self.fps = fps
+        self.name = name
+        self.slot = FrameSlot()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _loop(self):
+        interval = 1 / self.fps if self.fps > 0 else 0
+        while self._running:
+            start = time.time()
+            try:
+                self.slot.publish(self.source())
+            except Exception as e:
+                log_util.log.print(f"[{self.name}] 后台截图失败：{e}")
+                time.sleep(1)
+                continue
+            remaining = interval - (time.time() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+
+class ImageSequenceSource:
+    """
+    本地假帧流：循环返回给定图片，用于在没有模拟器时驱动 CaptureWorker
+    """
+
+    def __init__(self, images: Iterable, delay=0.0):
+        """
+        :param images: BGR 图像序列
+        :param delay: 每帧模拟的截图耗时，秒
+        """
+        self._images = itertools.cycle(list(images))
+        self.delay = delay
+
+    def __call__(self) -> Frame:
+        start = time.time()
+        if self.delay:
+            time.sleep(self.delay)
+        return Frame(next(self._images), start)
@@ -0,0 +1,29 @@
+from typing import Callable, List
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QStyledItemDelegate, QComboBox
+
+
+class ConfigComboDelegate(QStyledItemDelegate):
+    """
+    绑定配置列的编辑器：只在编辑时创建下拉框，选项每次从缓存的配置名列表读取
+    """
+
+    def __init__(self, get_items: Callable[[], List[str]], parent=None):
+        super().__init__(parent)
+        self.get_items = get_items
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        combo.addItems(self.get_items() or [])
+        # 选中即提交，无需再点击别处
+        combo.activated.connect(lambda _: self.commitData.emit(combo))
+        return combo
+
+    def setEditorData(self, editor: QComboBox, index):
+        current = index.data(Qt.EditRole)
+        if current:
+            editor.setCurrentText(current)
+
+    def setModelData(self, editor: QComboBox, model, index):
+        model.setData(index, editor.currentText(), Qt.EditRole)
@@ -0,0 +1,134 @@
+from typing import Callable, Dict, List, Set
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtGui import QIcon
+
+from emulator_inventory import InventoryDiff
+from simulator_manager import EmulatorStatus
+
+
+class EmulatorTableModel(QAbstractTableModel):
+    """
+    模拟器表格模型：第 0 列为勾选框 + 运行状态图标 + 名称，第 1 列为绑定的配置（由 ConfigComboDelegate 编辑）。
+    刷新时只按 InventoryDiff 插入、删除或更新变化的行
+    """
+    NAME_COLUMN = 0
+    CONFIG_COLUMN = 1
+
+    # 参数为名称(str) 和是否勾选(bool)
+    checkedChanged = pyqtSignal(str, bool)
+    # 参数为名称(str) 和配置名(str)
+    bindingChanged = pyqtSignal(str, str)
+
+    def __init__(self, checked: Set[str], get_binding: Callable[[str], str],
+                 running_icon: QIcon, stopped_icon: QIcon, parent=None):
+        """
+        :param checked: 勾选的模拟器名称集合，模型直接修改该集合
+        :param get_binding: 按模拟器名称读取绑定的配置名
+        """
+        super().__init__(parent)
+        self.checked = checked
+        self.get_binding = get_binding
+        self.running_icon = running_icon
+        self.stopped_icon = stopped_icon
+        self._emulators: List[EmulatorStatus] = []
+        self._rows: Dict[str, int] = {}
+
+    # === Qt 模型接口 ===
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._emulators)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return ["模拟器", "绑定配置"][section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == self.NAME_COLUMN:
+            return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+        return Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        emu = self._emulators[index.row()]
+        if index.column() == self.NAME_COLUMN:
+            if role == Qt.DisplayRole:
+                return emu.name
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if emu.name in self.checked else Qt.Unchecked
+            if role == Qt.DecorationRole:
+                return self.running_icon if emu.is_running() else self.stopped_icon
+            if role == Qt.ToolTipRole:
+                return emu.device_name or "未运行"
+        elif role in (Qt.DisplayRole, Qt.EditRole):
+            return self.get_binding(emu.name) or ""
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        name = self._emulators[index.row()].name
+        if index.column() == self.NAME_COLUMN and role == Qt.CheckStateRole:
+            is_checked = value == Qt.Checked
+            if is_checked:
+                self.checked.add(name)
+            else:
+                self.checked.discard(name)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            self.checkedChanged.emit(name, is_checked)
+            return True
+        if index.column() == self.CONFIG_COLUMN and role == Qt.EditRole:
+            if value == (self.get_binding(name) or ""):
+                return False
+            self.bindingChanged.emit(name, value)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+            return True
+        return False
+
+    # === 公共方法 ===
+    def apply_diff(self, diff: InventoryDiff):
+        """
+        只处理发生变化的行，未变化的行（包括勾选状态）保持不动
+        """
+        removed = sorted((self._rows[e.name] for e in diff.removed if e.name in self._rows), reverse=True)
+        for row in removed:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.checked.discard(self._emulators[row].name)
+            del self._emulators[row]
+            self.endRemoveRows()
+        if removed:
+            self._rows = {e.name: row for row, e in enumerate(self._emulators)}
+
+        added = [e for e in diff.added if e.name not in self._rows]
+        if added:
+            first = len(self._emulators)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for emu in added:
+                self._rows[emu.name] = len(self._emulators)
+                self._emulators.append(emu)
+            self.endInsertRows()
+
+        for emu in diff.started + diff.stopped + diff.changed:
+            row = self._rows.get(emu.name)
+            if row is None:
+                continue
+            self._emulators[row] = emu
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def set_all_checked(self, checked: bool):
+        if checked:
+            self.checked.update(e.name for e in self._emulators)
+        else:
+            self.checked.clear()
+        if self._emulators:
+            self.dataChanged.emit(self.index(0, self.NAME_COLUMN),
+                                  self.index(len(self._emulators) - 1, self.NAME_COLUMN), [Qt.CheckStateRole])
+
+    def names(self) -> List[str]:
+        return [e.name for e in self._emulators]
@@ -11,6 +11,185 @@ LDCONSOLE_PATH = r"C:\leidian\LDPlayer9\ldconsole.exe"
 # 模板匹配阈值（0~1）
 MATCH_THRESHOLD = 0.85
 
+# 模板缓存内存上限（字节）
+TEMPLATE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 模板文件 mtime 检查间隔（秒）
+TEMPLATE_CACHE_CHECK_INTERVAL = 2
+
+# 后台持续截图：开启后匹配直接读取最新帧，不再同步等待 ADB
+CAPTURE_WORKER_ENABLED = False
+
+CAPTURE_WORKER_FPS = 5
+
+# 等待后台新帧的最长时间（秒）
+CAPTURE_WORKER_WAIT_TIMEOUT = 5
+
+# 模板匹配方式："full" 整图原分辨率匹配，"pyramid" 先在缩小图上粗匹配再在原图局部精匹配
+MATCH_MODE = "full"
+
+# 金字塔最大层数，每层缩小 2 倍
+PYRAMID_MAX_LEVEL = 2
+
+# 缩小后模板的最小边长（像素）
+PYRAMID_MIN_TEMPLATE_SIZE = 12
+
+# 缩小后模板放大回原尺寸与原模板的最低相似度，低于此值不再继续缩小
+PYRAMID_MIN_FIDELITY = 0.85
+
+# 粗匹配阈值相对原阈值的放宽量
+PYRAMID_COARSE_MARGIN = 0.15
+
+# 粗匹配保留的候选位置数
+PYRAMID_CANDIDATES = 3
+
+# find_all 单个模板最多返回的结果数
+FIND_ALL_MAX_RESULTS = 20
+
+# find_all 跨模板去重的 IoU 阈值
+NMS_OVERLAP = 0.3
+
+# 并发匹配线程数，0 表示使用 CPU 核数
+MATCH_WORKERS = 0
+
+# 每个模拟器缓存的匹配结果条数，画面未变化时复用，0 表示关闭
+MATCH_MEMO_MAX_ENTRIES = 256
+
+# 轮询退避：间隔按 POLL_BACKOFF 倍增长，最长 POLL_MAX_INTERVAL 秒，随机抖动 ±POLL_JITTER 比例
+POLL_BACKOFF = 1.5
+
+POLL_MAX_INTERVAL = 3
+
+POLL_JITTER = 0.1
+
+# 点击后先以 POLL_FAST_INTERVAL 秒间隔快速检测 POLL_FAST_COUNT 次
+POLL_FAST_INTERVAL = 0.2
+
+POLL_FAST_COUNT = 3
+
+# 是否学习每个轮询点的预期耗时；在预期耗时的 POLL_LEARN_SKIP 比例之前不做多余检测
+POLL_LEARN = True
+
+POLL_LEARN_SKIP = 0.7
+
+# 预期耗时滑动平均系数
+POLL_LEARN_ALPHA = 0.3
+
+# YAML 任务编译：JSON Schema 路径与编译结果缓存目录（按文件哈希命名）
+TASK_SCHEMA_PATH = "tasks.schema.json"
+
+TASK_PLAN_CACHE_DIR = ".cache/task_plans"
+
+# 任务清单（任务名、参数定义、来源），界面据此显示任务列表，任务模块在首次执行时才加载
+TASK_MANIFEST_PATH = ".cache/task_manifest.json"
+
+# 任务加载方式："lazy" 按清单延迟加载（清单缺失或任务文件有改动时全量加载并重新生成），"eager" 启动时全量加载
+TASK_LOAD_MODE = "lazy"
+
+# 任务调度：未设置 interval / daily_at 的任务每次执行完后的等待秒数（与原来每轮固定等待 3 秒一致）
+SCHEDULE_DEFAULT_INTERVAL = 3
+
+# 到期时间相差在该秒数内的任务合并为一批执行
+SCHEDULE_BATCH_WINDOW = 1
+
+# 启动耗时预算（毫秒）：进程启动到主窗口显示超出时输出警告，benchmarks/bench_startup.py 以此检查导入耗时
+STARTUP_BUDGET_MS = 1500
+
+# 日志：最低输出级别（DEBUG/INFO/WARNING/ERROR）、文件目录与滚动大小
+LOG_LEVEL = "INFO"
+
+LOG_DIR = "logs"
+
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+
+LOG_FILE_BACKUP_COUNT = 3
+
+# 日志批量输出间隔（秒）与每批最多显示到界面的行数
+LOG_FLUSH_INTERVAL = 0.2
+
+LOG_UI_MAX_BATCH = 200
+
+# 同一条日志（同模拟器、同标签）每 LOG_RATE_WINDOW 秒最多输出 LOG_RATE_LIMIT 次，其余合并计数
+LOG_RATE_WINDOW = 5
+
+LOG_RATE_LIMIT = 5
+
+# 运行指标：是否采集、Prometheus 文本文件路径与写出间隔（秒）、本机 HTTP 端口（0 表示不开启）
+METRICS_ENABLED = True
+
+METRICS_FILE = "metrics/metrics.prom"
+
+METRICS_EXPORT_INTERVAL = 15
+
+METRICS_HTTP_PORT = 0
+
+# 模拟器列表后台刷新间隔，秒
+INVENTORY_REFRESH_INTERVAL = 5
+
+# OCR 默认语言与结果缓存条数
+OCR_LANG = "chi_sim"
+
+OCR_CACHE_SIZE = 128
+
+# 已知画面库，参考截图放在同一目录下的 <画面名>.png
+SCREEN_LIBRARY = "screens/screens.yaml"
+
+# 画面感知哈希边长（位数为其平方）与最大汉明距离
+SCREEN_HASH_SIZE = 16
+
+SCREEN_HASH_MAX_DISTANCE = 40
+
+# 模板搜索区域清单
+TEMPLATE_REGION_MANIFEST = "buttons/regions.yaml"
+
+# 截图复用时长（秒），同一帧在此时间内供多次模板查找使用
+FRAME_TTL = 0.3
+
+# ADB 通信方式："socket" 直连 adb server，"subprocess" 每条命令启动 adb 进程
+ADB_TRANSPORT = "socket"
+
+ADB_HOST = "127.0.0.1"
+
+ADB_PORT = 5037
+
+# 每个设备保持的预热连接数
+ADB_POOL_SIZE = 2
+
+# 预热连接最长闲置时间（秒）
+ADB_POOL_MAX_IDLE = 30
+
+ADB_SOCKET_TIMEOUT = 10
+
+# 执行引擎："thread" 每个模拟器一个 QThread，"asyncio" 所有模拟器共用一个事件循环
+EXECUTION_ENGINE = "thread"
+
+# asyncio 引擎执行同步任务的线程数，0 表示与模拟器数量相同。
+# 任务体是同步代码，每个执行中的模拟器占用一个线程，设置得比模拟器数少时同时执行的模拟器数即为该值
+ASYNC_ENGINE_WORKERS = 0
+
+# asyncio 引擎同时进行的 ADB 请求数上限
+ASYNC_ADB_MAX_CONCURRENCY = 32
+
+# 输入方式："sendevent" 直接写触摸设备节点，"shell" 常驻 shell 执行 input，"adb" 每次点击执行 adb shell input
+INPUT_CHANNEL = "shell"
+
+# 常驻输入通道建立失败或异常关闭后，间隔多少秒再尝试重新建立（期间使用 adb shell input）
+INPUT_CHANNEL_RETRY_INTERVAL = 30
+
+# 默认截图方式："raw" 读取 screencap 原始像素，"png" 使用 screencap -p
+CAPTURE_FORMAT = "raw"
+
+# 截图保存目录
+SCREENSHOT_DIR = "screenshots"
+
+# 调试帧记录：开启后保留每个模拟器最近的帧与匹配结果，失败或手动 flush 时写入 SCREENSHOT_DIR
+DEBUG_RECORDER_ENABLED = False
+
+DEBUG_RECORDER_BUFFER_SIZE = 20
+
+# 每帧直接写盘的采样概率（0~1）
+DEBUG_RECORDER_SAMPLE_RATE = 0.0
+
 
 class ConfigManager:
     def __init__(self, filepath="config.json"):
@@ -54,11 +233,22 @@ class ConfigManager:
             self.config["emulator_bindings"] = {}
         self.config.get("emulator_bindings")[emulator_name] = config_name
 
+    def get_emulator_capture_format(self, emulator_name):
+        return self.config.get("emulator_capture_formats", {}).get(emulator_name, CAPTURE_FORMAT)
+
+    def set_emulator_capture_format(self, emulator_name, capture_format):
+        if "emulator_capture_formats" not in self.config:
+            self.config["emulator_capture_formats"] = {}
+        self.config.get("emulator_capture_formats")[emulator_name] = capture_format
+
 
 class TaskConfigManager:
     def __init__(self, config_path="configs/"):
         self.config_path = config_path
         os.makedirs("configs", exist_ok=True)
+        # 配置名列表缓存，目录 mtime 变化（增删、重命名文件）时失效
+        self._config_names = None
+        self._config_names_mtime = None
 
     def save_config_to_file(self, config_name, task_config):
         data = {
@@ -68,6 +258,7 @@ class TaskConfigManager:
         path = os.path.join(self.config_path, f"{config_name}.json")
         with open(path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        self._config_names = None
         print(f"配置已保存至 {path}")
 
     def load_config_from_file(self, config_name):
@@ -82,10 +273,15 @@ class TaskConfigManager:
             print(f"加载出错: {str(e)}")
 
     def get_config_name_list(self):
-        config_name_list = []
-        if not os.path.exists(self.config_path):
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError:
             return
+        if self._config_names is not None and mtime == self._config_names_mtime:
+            return list(self._config_names)
+        config_name_list = []
         for fname in os.listdir(self.config_path):
             if fname.endswith(".json"):
                 config_name_list.append(fname[:-5])
-        return config_name_list
+        self._config_names, self._config_names_mtime = config_name_list, mtime
+        return list(config_name_list)
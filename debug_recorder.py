@@ -0,0 +1,137 @@
+# debug_recorder.py
+import os
+import random
+import threading
+import time
+from collections import deque
+from queue import Queue
+from typing import TYPE_CHECKING, Dict, List
+
+import config_manager
+import log_util
+
+if TYPE_CHECKING:
+    from frame_snapshot import Frame
+
+
+class MatchRecord:
+    """
+    单个模板在一帧上的匹配结果，坐标为整帧坐标
+    """
+
+    def __init__(self, template_path, score, top_left, size, found, region=None):
+        self.template_path = template_path
+        self.score = score
+        self.top_left = top_left
+        self.size = size
+        self.found = found
+        self.region = region
+
+
+class FrameRecord:
+    def __init__(self, emulator_name, frame: "Frame", matches: List[MatchRecord]):
+        self.emulator_name = emulator_name
+        self.frame = frame
+        self.matches = matches
+        self.recorded_at = time.time()
+
+
+class DebugFrameRecorder:
+    """
+    调试帧记录器，默认关闭
+
+    开启后每个模拟器保留最近 buffer_size 帧及其匹配结果，后台线程在手动 flush、任务失败或按采样率时
+    把标注后的图片写入 screenshots 目录，不阻塞匹配线程
+    """
+
+    def __init__(self, enabled=config_manager.DEBUG_RECORDER_ENABLED,
+                 buffer_size=config_manager.DEBUG_RECORDER_BUFFER_SIZE,
+                 sample_rate=config_manager.DEBUG_RECORDER_SAMPLE_RATE,
+                 output_dir=config_manager.SCREENSHOT_DIR):
+        """
+        :param buffer_size: 每个模拟器保留的帧数
+        :param sample_rate: 每帧被直接写盘的概率，0 表示只在 flush/失败时写盘
+        """
+        self.enabled = enabled
+        self.buffer_size = buffer_size
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, deque] = {}
+        self._queue = Queue()
+        self._writer = None
+        self._seq = 0
+
+    def record(self, emulator_name, frame: "Frame", matches: List[MatchRecord]):
+        if not self.enabled:
+            return
+        record = FrameRecord(emulator_name, frame, matches)
+        with self._lock:
+            buffer = self._buffers.get(emulator_name)
+            if buffer is None or buffer.maxlen != self.buffer_size:
+                buffer = deque(buffer or (), maxlen=self.buffer_size)
+                self._buffers[emulator_name] = buffer
+            buffer.append(record)
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            self._submit([record], "sample")
+
+    def flush(self, emulator_name=None, reason="manual"):
+        """
+        将缓冲区中的帧交给后台线程写盘并清空缓冲区
+
+        :param emulator_name: 为 None 时写出所有模拟器
+        """
+        with self._lock:
+            names = [emulator_name] if emulator_name else list(self._buffers)
+            records = []
+            for name in names:
+                buffer = self._buffers.get(name)
+                if buffer:
+                    records.extend(buffer)
+                    buffer.clear()
+        if records:
+            self._submit(records, reason)
+
+    def on_failure(self, emulator_name):
+        if self.enabled:
+            self.flush(emulator_name, "failure")
+
+    def _submit(self, records, reason):
+        with self._lock:
+            for record in records:
+                self._seq += 1
+                self._queue.put((record, reason, self._seq))
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="debug-frame-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            record, reason, seq = self._queue.get()
+            try:
+                self._write(record, reason, seq)
+            except Exception as e:
+                log_util.log.print(f"[{record.emulator_name}] 调试截图保存失败：{e}")
+
+    def _write(self, record: FrameRecord, reason, seq):
+        import cv2
+
+        image = record.frame.image.copy()
+        for match in record.matches:
+            if match.region:
+                x1, y1, x2, y2 = match.region
+                cv2.rectangle(image, (x1, y1), (x2, y2), (255, 0, 0), 1)
+            x, y = match.top_left
+            w, h = match.size
+            color = (0, 255, 0) if match.found else (0, 0, 255)
+            cv2.rectangle(image, (x, y), (x + w, y + h), color, 2)
+            label = f"{os.path.basename(match.template_path)} {match.score:.2f}"
+            cv2.putText(image, label, (x, max(y - 4, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(record.recorded_at))
+        path = os.path.join(self.output_dir, f"screenshot_{record.emulator_name}_{stamp}_{seq}_{reason}.png")
+        cv2.imencode(".png", image)[1].tofile(path)
+
+
+debug_recorder = DebugFrameRecorder()
@@ -1,67 +1,364 @@
 # emulator_executor.py
-import subprocess
-from typing import Union, List, Optional, Tuple
+import os
+import struct
+import time
+from typing import Dict, Union, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
 import config_manager
 import log_util
+from adb_client import AdbError, create_transport
+from capture_worker import CaptureWorker
+from debug_recorder import MatchRecord, debug_recorder
+from frame_snapshot import Frame, get_frame_snapshot
+from input_channel import GestureUnconfirmedError, InputChannel, LongPress, Swipe, Tap, open_input_channel
+from match_memo import MatchMemo
+from metrics import capture_seconds, decode_seconds, match_score, match_seconds, tap_seconds
+from ocr_engine import OcrWord, ocr_engine
+from screen_classifier import ScreenMatch, screen_classifier
+from template_cache import template_cache
+from template_matcher import Match, find_peaks, map_templates, match_template, non_max_suppression
+from template_regions import resolve_region, template_regions
+
+# screencap 原始格式：RGBA_8888 / RGBX_8888，每像素 4 字节
+RAW_PIXEL_FORMATS = (1, 2)
+
+
+class RawScreencapError(ValueError):
+    """
+    raw 截图数据无法解析（设备不支持或格式未知），与传输失败区分：只有这种情况才改用 png
+    """
+
+
+def parse_raw_screencap(data: bytes) -> np.ndarray:
+    """
+    解析 screencap（不带 -p）输出：width、height、format（Android 9+ 另有 dataspace）小端头 + RGBA 数据
+
+    :return: 指向 data 的 (height, width, 4) 只读视图，不拷贝
+    """
+    if len(data) < 12:
+        raise RawScreencapError("raw 截图数据不完整")
+    width, height, pixel_format = struct.unpack_from("<III", data, 0)
+    size = width * height * 4
+    header_size = len(data) - size
+    if pixel_format not in RAW_PIXEL_FORMATS or header_size not in (12, 16):
+        raise RawScreencapError(f"不支持的 raw 截图格式：{width}x{height} format={pixel_format} 长度={len(data)}")
+    return np.frombuffer(data, dtype=np.uint8, count=size, offset=header_size).reshape(height, width, 4)
+
+
+class CaptureStats:
+    """
+    单种截图方式的耗时统计：transfer 为设备编码+传输，decode 为主机端解码到灰度图
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.transfer_time = 0.0
+        self.decode_time = 0.0
+        self.bytes = 0
+
+    def record(self, transfer_time, decode_time, size):
+        self.count += 1
+        self.transfer_time += transfer_time
+        self.decode_time += decode_time
+        self.bytes += size
+
+    def summary(self):
+        if not self.count:
+            return "无数据"
+        return (f"传输 {self.transfer_time / self.count * 1000:.1f}ms，"
+                f"解码 {self.decode_time / self.count * 1000:.1f}ms，"
+                f"{self.bytes / self.count / 1024:.0f}KB/帧，共 {self.count} 帧")
 
 
 class EmulatorExecutor:
-    def __init__(self, adb_path, name, device_name):
+    def __init__(self, adb_path, name, device_name, frame_ttl=config_manager.FRAME_TTL,
+                 transport=config_manager.ADB_TRANSPORT, capture_format=config_manager.CAPTURE_FORMAT,
+                 match_mode=config_manager.MATCH_MODE, input_channel=config_manager.INPUT_CHANNEL):
+        """
+        :param transport: "socket" / "subprocess"，或直接传入实现了 shell / exec_out 的传输对象
+        :param capture_format: "raw" 读取 screencap 原始像素，"png" 使用 screencap -p；raw 失败时自动退回 png
+        :param match_mode: "full" 原分辨率整区域匹配，"pyramid" 金字塔粗到细匹配
+        :param input_channel: "sendevent" / "shell" / "adb"，见 config_manager.INPUT_CHANNEL
+        """
         self.adb_path = adb_path
         self.name = name
         self.device_name = device_name
+        self.transport = create_transport(adb_path, device_name, transport) if isinstance(transport, str) \
+            else transport
+        self.capture_format = capture_format
+        self.match_mode = match_mode
+        self.match_memo = MatchMemo()
+        self.capture_stats = {"png": CaptureStats(), "raw": CaptureStats()}
+        self.frame_ttl = frame_ttl
+        self.frame_snapshot = get_frame_snapshot(device_name)
+        self.capture_worker: Optional[CaptureWorker] = None
+        self.input_channel_kind = input_channel
+        self._input_channel: Optional[InputChannel] = None
+        # 下次允许尝试建立常驻输入通道的时间
+        self._input_channel_retry_at = 0.0
+        self._clicked_at = 0.0
 
     def _run_adb(self, cmd_args):
-        full_cmd = [self.adb_path, "-s", self.device_name] + cmd_args
-        result = subprocess.run(full_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                creationflags=subprocess.CREATE_NO_WINDOW)
-        return result.stdout.decode(errors="ignore")
+        try:
+            if cmd_args[0] == "shell":
+                output = self.transport.shell(cmd_args[1:])
+            elif cmd_args[0] == "exec-out":
+                output = self.transport.exec_out(cmd_args[1:])
+            else:
+                raise ValueError(f"不支持的 ADB 命令：{cmd_args[0]}")
+        except (OSError, AdbError) as e:
+            log_util.log.error(f"ADB 命令执行失败：{e}", emulator=self.name)
+            return ""
+        return output.decode(errors="ignore")
 
-    def screenshot(self):
-        result = subprocess.run(
-            [self.adb_path, "-s", self.device_name, "exec-out", "screencap", "-p"],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        if result.returncode != 0:
-            raise RuntimeError(f"ADB 截图失败：{result.stderr.decode('utf-8')}")
-
-        raw = result.stdout.replace(b'\r\r\n', b'\n')
+    def _exec_out(self, cmd_args) -> bytes:
+        try:
+            return self.transport.exec_out(cmd_args)
+        except (OSError, AdbError) as e:
+            raise RuntimeError(f"ADB 截图失败：{e}")
+
+    def _capture_png(self, with_gray=False) -> Frame:
+        start = time.time()
+        output = self._exec_out(["screencap", "-p"])
+        transferred = time.time()
+
+        raw = output.replace(b'\r\r\n', b'\n')
         img_array = np.frombuffer(raw, dtype=np.uint8)
         image = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
         if image is None:
             raise RuntimeError("图像解码失败")
-        return image
+        frame = Frame(image, start)
+        if with_gray:
+            _ = frame.gray
+        decoded = time.time()
+        self.capture_stats["png"].record(transferred - start, decoded - transferred, len(output))
+        capture_seconds.observe(transferred - start, self.name, "png")
+        decode_seconds.observe(decoded - transferred, self.name, "png")
+        return frame
+
+    def _capture_raw(self, with_gray=False) -> Frame:
+        start = time.time()
+        output = self._exec_out(["screencap"])
+        transferred = time.time()
+
+        frame = Frame(captured_at=start, rgba=parse_raw_screencap(output))
+        if with_gray:
+            _ = frame.gray
+        decoded = time.time()
+        self.capture_stats["raw"].record(transferred - start, decoded - transferred, len(output))
+        capture_seconds.observe(transferred - start, self.name, "raw")
+        decode_seconds.observe(decoded - transferred, self.name, "raw")
+        return frame
+
+    def capture(self) -> Frame:
+        if self.capture_format == "raw":
+            try:
+                return self._capture_raw()
+            except RawScreencapError as e:
+                # 只有数据格式问题才永久改用 png；传输失败（RuntimeError）是临时的，直接抛给调用方
+                log_util.log.warning(f"raw 截图不可用，改用 png：{e}", emulator=self.name)
+                self.capture_format = "png"
+        return self._capture_png()
+
+    def screenshot(self):
+        return self.capture().image
+
+    def benchmark_capture(self, rounds=10):
+        """
+        分别用 png 与 raw 方式截图 rounds 次，统计每帧 编码+传输 与 解码 耗时
+
+        :return: {"png": CaptureStats, "raw": CaptureStats}
+        """
+        stats = self.capture_stats
+        self.capture_stats = {"png": CaptureStats(), "raw": CaptureStats()}
+        try:
+            for _ in range(rounds):
+                self._capture_png(with_gray=True)
+                try:
+                    self._capture_raw(with_gray=True)
+                except (RuntimeError, RawScreencapError) as e:
+                    log_util.log.warning(f"raw 截图不可用：{e}", emulator=self.name)
+            result = self.capture_stats
+        finally:
+            self.capture_stats = stats
+        for capture_format, capture_stats in result.items():
+            log_util.log.print(f"[{self.name}] {capture_format} 截图：{capture_stats.summary()}")
+        return result
+
+    def get_frame(self, max_age: Optional[float] = None) -> Frame:
+        """
+        获取当前帧，TTL 内复用已有截图，同一设备的并发请求只截图一次
+
+        :param max_age: 可接受的帧最大时长，秒；默认使用 frame_ttl，0 表示强制重新截图
+        """
+        if max_age is None:
+            max_age = self.frame_ttl
+        if self.capture_worker and self.capture_worker.is_alive():
+            # 后台截图模式：取截图开始时间晚于上次点击、且不超过 max_age 的帧，等待超时则同步截图
+            not_before = max(time.time() - max_age, self._clicked_at)
+            _, frame = self.capture_worker.slot.wait_for(lambda seq, f: f.captured_at >= not_before,
+                                                         config_manager.CAPTURE_WORKER_WAIT_TIMEOUT)
+            if frame is not None:
+                return frame
+        return self.frame_snapshot.get(self.capture, max_age)
+
+    def start_capture_worker(self, fps=config_manager.CAPTURE_WORKER_FPS, source=None):
+        """
+        启动后台持续截图
+
+        :param source: 取帧函数，返回 Frame，默认为 self.capture
+        """
+        if self.capture_worker is None or not self.capture_worker.is_alive():
+            self.capture_worker = CaptureWorker(source or self.capture, fps, self.name)
+            self.capture_worker.start()
+        return self.capture_worker
+
+    def stop_capture_worker(self):
+        if self.capture_worker:
+            self.capture_worker.stop()
+            self.capture_worker = None
+
+    def wait_next_frame(self, seq=None,
+                        timeout=config_manager.CAPTURE_WORKER_WAIT_TIMEOUT) -> Tuple[int, Optional[Frame]]:
+        """
+        等待比 seq 更新的帧（默认为当前最新帧之后的一帧），用于点击后确认画面已刷新；需先启动后台截图
+
+        :return: (序号, Frame)，超时时 Frame 为 None
+        """
+        slot = self.capture_worker.slot
+        if seq is None:
+            seq = slot.latest()[0]
+        return slot.wait_newer(seq, timeout)
+
+    def classify_screen(self, max_age: Optional[float] = None) -> ScreenMatch:
+        """
+        识别当前所在画面（home / alliance / login_popup / app_launcher / unknown ...），见 screens/screens.yaml
+        """
+        return screen_classifier.classify(self, self.get_frame(max_age))
+
+    def invalidate_frame(self):
+        self._clicked_at = time.time()
+        self.frame_snapshot.invalidate()
+
+    def _get_input_channel(self) -> Optional[InputChannel]:
+        if self._input_channel is None and time.time() >= self._input_channel_retry_at:
+            self._input_channel = open_input_channel(self.device_name, self.input_channel_kind)
+            if self._input_channel is None:
+                self._input_channel_retry_at = time.time() + config_manager.INPUT_CHANNEL_RETRY_INTERVAL
+        return self._input_channel
+
+    def _drop_input_channel(self, channel: InputChannel):
+        channel.close()
+        self._input_channel = None
+        self._input_channel_retry_at = time.time() + config_manager.INPUT_CHANNEL_RETRY_INTERVAL
+
+    def _send_gestures(self, gestures, fallback_args):
+        start = time.perf_counter()
+        try:
+            self._deliver_gestures(gestures, fallback_args)
+        finally:
+            tap_seconds.observe(time.perf_counter() - start, self.name)
+
+    def _deliver_gestures(self, gestures, fallback_args):
+        channel = self._get_input_channel()
+        if channel:
+            try:
+                channel.batch(gestures)
+                return
+            except GestureUnconfirmedError as e:
+                # 手势已发出，重发会造成重复点击；关闭通道，稍后重新建立
+                log_util.log.warning(f"输入通道未确认，视为已发送并关闭通道：{e}", emulator=self.name)
+                self._drop_input_channel(channel)
+                return
+            except (OSError, RuntimeError) as e:
+                log_util.log.warning(f"输入通道异常，改用 adb shell input：{e}", emulator=self.name)
+                self._drop_input_channel(channel)
+        for args in fallback_args:
+            self._run_adb(["shell", "input"] + args)
 
     def click(self, x, y):
-        self._run_adb(["shell", "input", "tap", str(x), str(y)])
-
-    def find_and_click_text(self, target_text, lang='chi_sim'):
-        import pytesseract
-        img = self.screenshot()
-        # 灰度化提升识别率
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        data = pytesseract.image_to_data(gray, lang=lang, output_type=pytesseract.Output.DICT)
-        for i in range(len(data['text'])):
-            text = data['text'][i].strip()
-            if target_text in text:
-                x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
-                center_x = x + w // 2
-                center_y = y + h // 2
-                log_util.log.print(f"找到文本 [{text}]，点击位置：({center_x}, {center_y})")
-                self.click(center_x, center_y)
-                return True
+        self._send_gestures([Tap(x, y)], [["tap", str(x), str(y)]])
+        self.invalidate_frame()
+
+    def swipe(self, x1, y1, x2, y2, duration=300):
+        self.batch([Swipe(x1, y1, x2, y2, duration)])
+
+    def long_press(self, x, y, duration=800):
+        self.batch([LongPress(x, y, duration)])
+
+    def batch(self, gestures):
+        """
+        一次往返按顺序发送多个手势（Tap / Swipe / LongPress）
+        """
+        fallback_args = []
+        for g in gestures:
+            if isinstance(g, Tap):
+                fallback_args.append(["tap", str(g.x), str(g.y)])
+            elif isinstance(g, Swipe):
+                fallback_args.append(["swipe", str(g.x1), str(g.y1), str(g.x2), str(g.y2), str(g.duration)])
+            elif isinstance(g, LongPress):
+                fallback_args.append(["swipe", str(g.x), str(g.y), str(g.x), str(g.y), str(g.duration)])
+        self._send_gestures(gestures, fallback_args)
+        self.invalidate_frame()
+
+    def measure_tap_latency(self, x, y, timeout=3.0) -> Optional[float]:
+        """
+        点击 (x, y) 并持续截图，直到画面发生变化，返回点击到画面变化的耗时（秒，含一次截图时间），超时为 None
+        """
+        before = self.get_frame(max_age=0)
+        full = (0, 0, before.gray.shape[1], before.gray.shape[0])
+        before_hash = before.region_hash(full)
+        start = time.time()
+        self.click(x, y)
+        while time.time() - start < timeout:
+            frame = self.get_frame(max_age=0)
+            if frame.region_hash(full) != before_hash:
+                latency = time.time() - start
+                log_util.log.print(f"[{self.name}] 点击到画面变化耗时 {latency * 1000:.0f}ms")
+                return latency
+        log_util.log.print(f"[{self.name}] 点击后 {timeout} 秒内画面无变化")
+        return None
+
+    def close(self):
+        self.stop_capture_worker()
+        if self._input_channel:
+            self._input_channel.close()
+            self._input_channel = None
+
+    def find_texts(self,
+                   targets: List[str],
+                   region: Optional[Tuple[Union[int, float], ...]] = None,
+                   lang=config_manager.OCR_LANG,
+                   max_age: Optional[float] = None,
+                   ) -> Dict[str, Optional[OcrWord]]:
+        """
+        对当前帧的指定区域做一次 OCR，同时查找多个文本
+
+        :param region: 识别区域，像素坐标或 0~1 比例坐标，为 None 时识别整帧
+        :return: {文本: 识别到的词（含整帧坐标），未找到为 None}
+        """
+        frame = self.get_frame(max_age)
+        frame_height, frame_width = frame.gray.shape[:2]
+        return ocr_engine.find_texts(frame, targets, resolve_region(region, frame_width, frame_height), lang)
+
+    def find_and_click_text(self, target_text, lang=config_manager.OCR_LANG,
+                            region: Optional[Tuple[Union[int, float], ...]] = None):
+        word = self.find_texts([target_text], region, lang)[target_text]
+        if word:
+            center_x, center_y = word.center
+            log_util.log.print(f"找到文本 [{word.text}]，点击位置：({center_x}, {center_y})")
+            self.click(center_x, center_y)
+            return True
 
         log_util.log.print(f"未找到文本 [{target_text}]")
         return False
 
-    def find_and_click_button(self, template_path="buttons/button1.png", threshold=config_manager.MATCH_THRESHOLD):
-        x, y, find = self.find_img(template_path, threshold)
+    def find_and_click_button(self, template_path="buttons/button1.png", threshold=config_manager.MATCH_THRESHOLD,
+                              max_age: Optional[float] = None):
+        x, y, find = self.find_img(template_path, threshold, max_age=max_age)
         if find:
             # log_util.log.print(f"[{self.name}] 点击坐标: ({x}, {y})")
             self.click(x, y)
@@ -72,39 +369,124 @@ class EmulatorExecutor:
     def find_img(self,
                  template_path: Union[str, List[str]],
                  threshold: float = config_manager.MATCH_THRESHOLD,
-                 region: Optional[Tuple[int, int, int, int]] = None,
+                 region: Optional[Tuple[Union[int, float], ...]] = None,
+                 max_age: Optional[float] = None,
+                 match_mode: Optional[str] = None,
                  ) -> Tuple[Optional[int], Optional[int], bool]:
-        img_rgb = self.screenshot()
-        if img_rgb is None:
-            log_util.log.print(f"[{self.name}] 截图失败")
+        """
+        :param region: 搜索区域 (x1, y1, x2, y2)，像素坐标或 0~1 比例坐标；
+                       为 None 时使用 buttons/regions.yaml 中为各模板声明的区域，未声明则搜索整帧
+        :param match_mode: "full" / "pyramid"，默认使用 self.match_mode
+        :return: (x, y, 是否找到)，坐标为整帧坐标
+        """
+        frame = self.get_frame(max_age)
+        if frame is None:
+            log_util.log.error("截图失败", emulator=self.name)
             return None, None, False
 
-        if region:
-            x1, y1, x2, y2 = region
-            img_rgb = img_rgb[y1:y2, x1:x2]
-        cv2.imwrite("test.png", img_rgb)
-        img_gray = cv2.cvtColor(img_rgb, cv2.COLOR_BGR2GRAY)
         # img_gray = cv2.Canny(cv2.cvtColor(img_rgb, cv2.COLOR_BGR2GRAY), 50, 200)
 
         if isinstance(template_path, str):
             template_path = [template_path]
 
+        matches = [] if debug_recorder.enabled else None
         for path in template_path:
-            template = cv2.imread(path)
-            if template is None:
-                log_util.log.print(f"[{self.name}] 模板图像读取失败: {path}")
+            match = self.match_on_frame(frame, path, threshold, region, match_mode)
+            if match is None:
                 continue
-
-            template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-            # template_gray = cv2.Canny(cv2.cvtColor(template, cv2.COLOR_BGR2GRAY), 50, 200)
-            res = cv2.matchTemplate(img_gray, template_gray, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, max_loc = cv2.minMaxLoc(res)
-            log_util.log.print(f"[{self.name}] 图片{path}，相似度: {max_val:.2f}")
-            if max_val >= threshold:
-                top_left = max_loc
-                h, w = template.shape[:2]
-                center_x, center_y = top_left[0] + w // 2, top_left[1] + h // 2
-                log_util.log.print(f"[{self.name}] 图片坐标: ({center_x}, {center_y})，相似度: {max_val:.2f}")
+            found = match.score >= threshold
+            if matches is not None:
+                matches.append(MatchRecord(path, match.score, (match.left, match.top), (match.width, match.height),
+                                           found, match.region))
+            if found:
+                center_x, center_y = match.center
+                log_util.log.info("图片坐标: (%d, %d)，相似度: %.2f", center_x, center_y, match.score,
+                                  emulator=self.name, tag=path)
+                if matches is not None:
+                    debug_recorder.record(self.name, frame, matches)
                 return center_x, center_y, True
 
+        if matches is not None:
+            debug_recorder.record(self.name, frame, matches)
         return None, None, False
+
+    def match_on_frame(self,
+                       frame: Frame,
+                       template_path: str,
+                       threshold: float = config_manager.MATCH_THRESHOLD,
+                       region: Optional[Tuple[Union[int, float], ...]] = None,
+                       match_mode: Optional[str] = None,
+                       ) -> Optional[Match]:
+        """
+        在指定帧上匹配单个模板，不截图
+
+        :return: 最高相似度处的 Match（不论是否达到阈值），模板读取失败时为 None
+        """
+        template = template_cache.get(template_path)
+        if template is None:
+            log_util.log.error(f"模板图像读取失败: {template_path}", emulator=self.name)
+            return None
+        if match_mode is None:
+            match_mode = self.match_mode
+
+        frame_height, frame_width = frame.gray.shape[:2]
+        search_region = resolve_region(region or template_regions.get(template_path), frame_width, frame_height,
+                                       template.width, template.height)
+        # template_gray = cv2.Canny(cv2.cvtColor(template, cv2.COLOR_BGR2GRAY), 50, 200)
+        memo_key = ("match", template.path, template.mtime, search_region, match_mode, threshold,
+                    frame.region_hash(search_region))
+        template_label = os.path.basename(template_path)
+
+        def compute():
+            start = time.perf_counter()
+            result = match_template(frame, template, search_region, threshold, match_mode)
+            match_seconds.observe(time.perf_counter() - start, self.name, template_label)
+            return result
+
+        max_val, top_left = self.match_memo.get_or_compute(memo_key, compute)
+        match_score.observe(max_val, self.name, template_label)
+        # 每个模板每次轮询都会输出，只在 DEBUG 级别记录且不提前格式化
+        log_util.log.debug("图片%s，相似度: %.2f", template_path, max_val, emulator=self.name, tag=template_path)
+        return Match(template_path, max_val, top_left[0], top_left[1], template.width, template.height,
+                     search_region)
+
+    def find_all(self,
+                 template_path: Union[str, List[str]],
+                 threshold: float = config_manager.MATCH_THRESHOLD,
+                 region: Optional[Tuple[Union[int, float], ...]] = None,
+                 max_age: Optional[float] = None,
+                 max_results: int = config_manager.FIND_ALL_MAX_RESULTS,
+                 overlap: float = config_manager.NMS_OVERLAP,
+                 ) -> List[Match]:
+        """
+        在同一帧上查找所有模板的所有位置，多个模板并发匹配，结果经非极大值抑制去重
+
+        :param max_results: 单个模板最多返回的结果数
+        :param overlap: 跨模板去重的 IoU 阈值
+        :return: 按相似度从高到低排序的 Match 列表
+        """
+        frame = self.get_frame(max_age)
+        frame_height, frame_width = frame.gray.shape[:2]
+        if isinstance(template_path, str):
+            template_path = [template_path]
+
+        def match_one(path):
+            template = template_cache.get(path)
+            if template is None:
+                log_util.log.error(f"模板图像读取失败: {path}", emulator=self.name)
+                return []
+            search_region = resolve_region(region or template_regions.get(path), frame_width, frame_height,
+                                           template.width, template.height)
+            memo_key = ("peaks", template.path, template.mtime, search_region, threshold, max_results,
+                        frame.region_hash(search_region))
+            return self.match_memo.get_or_compute(
+                memo_key, lambda: find_peaks(frame, template, search_region, threshold, max_results))
+
+        matches = non_max_suppression([m for peaks in map_templates(match_one, template_path) for m in peaks],
+                                      overlap)
+        log_util.log.debug("找到 %d 处: %s", len(matches), matches, emulator=self.name, tag="find_all")
+        if debug_recorder.enabled:
+            debug_recorder.record(self.name, frame, [
+                MatchRecord(m.template_path, m.score, (m.left, m.top), (m.width, m.height), True) for m in matches
+            ])
+        return matches
@@ -0,0 +1,139 @@
+# emulator_inventory.py
+import threading
+from typing import Callable, Dict, List, Optional
+
+import config_manager
+import log_util
+from simulator_manager import EmulatorManager, EmulatorStatus
+
+
+class InventorySnapshot:
+    """
+    某一时刻的模拟器列表，按名称、序号、设备序列号建立索引，只读
+    """
+
+    def __init__(self, emulators: List[EmulatorStatus] = None):
+        self.emulators = list(emulators or [])
+        self.by_name: Dict[str, EmulatorStatus] = {e.name: e for e in self.emulators}
+        self.by_index: Dict[int, EmulatorStatus] = {e.index: e for e in self.emulators}
+        self.by_serial: Dict[str, EmulatorStatus] = {e.device_name: e for e in self.emulators if e.device_name}
+
+    def get(self, name) -> Optional[EmulatorStatus]:
+        return self.by_name.get(name)
+
+    def __iter__(self):
+        return iter(self.emulators)
+
+    def __len__(self):
+        return len(self.emulators)
+
+
+class InventoryDiff:
+    """
+    两次快照之间的变化
+    """
+
+    def __init__(self, old: InventorySnapshot, new: InventorySnapshot):
+        self.added = [e for e in new if e.name not in old.by_name]
+        self.removed = [e for e in old if e.name not in new.by_name]
+        self.started, self.stopped, self.changed = [], [], []
+        for emulator in new:
+            previous = old.get(emulator.name)
+            if previous is None:
+                continue
+            if emulator.is_running() and not previous.is_running():
+                self.started.append(emulator)
+            elif previous.is_running() and not emulator.is_running():
+                self.stopped.append(emulator)
+            elif emulator.signature() != previous.signature() or emulator.index != previous.index:
+                self.changed.append(emulator)
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.started or self.stopped or self.changed)
+
+    def __repr__(self):
+        names = lambda emulators: [e.name for e in emulators]
+        return (f"InventoryDiff(added={names(self.added)}, removed={names(self.removed)}, "
+                f"started={names(self.started)}, stopped={names(self.stopped)}, changed={names(self.changed)})")
+
+
+class EmulatorInventory:
+    """
+    模拟器列表服务：后台线程定时执行 ldconsole list2 / adb devices，调用方只读取内存中的快照，不会阻塞。
+    列表有变化时把 InventoryDiff 推送给订阅者（在后台线程中回调，界面需自行转到 UI 线程）
+    """
+
+    def __init__(self, manager: EmulatorManager, interval=config_manager.INVENTORY_REFRESH_INTERVAL):
+        self.manager = manager
+        self.interval = interval
+        self._snapshot = InventorySnapshot()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._subscribers: List[Callable[[InventoryDiff, InventorySnapshot], None]] = []
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.loaded = threading.Event()
+
+    @property
+    def snapshot(self) -> InventorySnapshot:
+        with self._lock:
+            return self._snapshot
+
+    def get(self, name) -> Optional[EmulatorStatus]:
+        return self.snapshot.get(name)
+
+    def subscribe(self, callback: Callable[[InventoryDiff, InventorySnapshot], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="emulator-inventory", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
+
+    def request_refresh(self):
+        """
+        立即在后台刷新一次，不等待结果
+        """
+        self._wakeup.set()
+
+    def refresh(self) -> Optional[InventoryDiff]:
+        """
+        同步刷新一次，失败时保留旧快照
+
+        :return: 本次变化，无变化或刷新失败时为 None
+        """
+        with self._refresh_lock:
+            try:
+                new = InventorySnapshot(self.manager.get_all_emulators())
+            except Exception as e:
+                log_util.log.print(f"刷新模拟器列表失败：{e}")
+                return None
+            with self._lock:
+                old, self._snapshot = self._snapshot, new
+                subscribers = list(self._subscribers)
+            first_load = not self.loaded.is_set()
+            self.loaded.set()
+            diff = InventoryDiff(old, new)
+            if diff.is_empty() and not first_load:
+                return None
+            for callback in subscribers:
+                try:
+                    callback(diff, new)
+                except Exception as e:
+                    log_util.log.print(f"模拟器列表订阅回调出错：{e}")
+            return diff
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
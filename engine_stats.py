@@ -0,0 +1,62 @@
+# engine_stats.py
+import os
+import sys
+import threading
+import time
+
+
+def process_memory_mb():
+    """
+    当前进程常驻内存（MB），取不到时返回 None
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / 1024 / 1024
+            return None
+        with open(f"/proc/{os.getpid()}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except Exception:
+        return None
+
+
+class EngineStats:
+    """
+    执行引擎运行统计：线程数、内存、每个模拟器完成的配置轮次与任务数
+    """
+
+    def __init__(self, engine_name):
+        self.engine_name = engine_name
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.cycles = {}
+        self.tasks = {}
+
+    def record_cycle(self, emulator_name, task_count):
+        with self._lock:
+            self.cycles[emulator_name] = self.cycles.get(emulator_name, 0) + 1
+            self.tasks[emulator_name] = self.tasks.get(emulator_name, 0) + task_count
+
+    def report(self):
+        elapsed_minutes = max(time.time() - self.started_at, 1e-6) / 60
+        with self._lock:
+            total_tasks = sum(self.tasks.values())
+            emulators = len(self.cycles)
+        memory = process_memory_mb()
+        memory_text = f"{memory:.0f}MB" if memory is not None else "未知"
+        return (f"[{self.engine_name}] 线程数 {threading.active_count()}，内存 {memory_text}，"
+                f"{emulators} 个模拟器，任务 {total_tasks / elapsed_minutes:.1f} 个/分钟")
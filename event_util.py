@@ -1,12 +1,12 @@
-import time
-
 import log_util
+from debug_recorder import debug_recorder
 from StepStatus import StepStatus
 from task_executor import TaskExecutor
+from utils.polling import PollPolicy, poll
 
 
-def click_img(executor: TaskExecutor, img_path, desc):
-    x, y, find = executor.emulator_executor.find_img(img_path)
+def click_img(executor: TaskExecutor, img_path, desc, region=None):
+    x, y, find = executor.emulator_executor.find_img(img_path, region=region)
     if find:
         log_util.log.print(f"[{executor.emulator_name}] {desc}")
         executor.emulator_executor.click(x, y)
@@ -14,13 +14,20 @@ def click_img(executor: TaskExecutor, img_path, desc):
     return StepStatus.SUCCESS
 
 
+def click_text(executor: TaskExecutor, text, region=None, lang=None):
+    if lang:
+        return executor.emulator_executor.find_and_click_text(text, lang, region=region)
+    return executor.emulator_executor.find_and_click_text(text, region=region)
+
+
 def multiple_clicks(
         executor: TaskExecutor,
         images,
         click_timeout=5,
         check_interval=1,
         wait_miss=False,
-        on_timeout=None
+        on_timeout=None,
+        poll_policy: PollPolicy = None
 ):
     """
     顺序点击图片列表，点击后等待图片消失
@@ -28,63 +35,71 @@ def multiple_clicks(
 
     :param wait_miss: 是否等待上张图片消失
     :param executor: TaskExecutor
-    :param images: [ (image_path, desc), ... ]
+    :param images: [ (image_path, desc), ... ]，可附带第三项搜索区域 (image_path, desc, region)
     :param click_timeout: 点击等待出现/消失的最大时长
-    :param check_interval: 检测间隔，秒
+    :param check_interval: 检测间隔，秒；poll_policy 为空时作为退避的起始间隔
     :param on_timeout: 超时回调函数，接收参数 (executor, image_path, desc)
+    :param poll_policy: 轮询策略，默认 PollPolicy(check_interval)
     :return: TaskStatus.SUCCESS / TaskStatus.FAILED
     """
-    for image, desc in images:
-        # 1. 等待图片出现
-        start_time = time.time()
-        while True:
-            x, y, found = executor.emulator_executor.find_img(image)
-            if found:
-                log_util.log.print(f"[{executor.emulator_name}] 点击 {desc}")
-                executor.emulator_executor.click(x, y)
-                break
-            if time.time() - start_time > click_timeout:
-                log_util.log.print(f"[{executor.emulator_name}] {desc} 未出现，超时")
-                if on_timeout:
-                    on_timeout(executor, image, desc)
-                return StepStatus.FAILED
-            time.sleep(check_interval)
+    policy = poll_policy or PollPolicy(check_interval)
+    clicked = False
+    for image, desc, *rest in images:
+        region = rest[0] if rest else None
+        # 1. 等待图片出现，上一张刚点击过时先快速检测
+        found, hit = poll(lambda: _found(executor.emulator_executor.find_img(image, region=region)),
+                          policy, timeout=click_timeout, key=f"{image}:appear", fast=clicked)
+        if not found:
+            log_util.log.print(f"[{executor.emulator_name}] {desc} 未出现，超时")
+            debug_recorder.on_failure(executor.emulator_name)
+            if on_timeout:
+                on_timeout(executor, image, desc)
+            return StepStatus.FAILED
+        x, y, _ = hit
+        log_util.log.print(f"[{executor.emulator_name}] 点击 {desc}")
+        executor.emulator_executor.click(x, y)
+        clicked = True
 
         # 2. 等待图片消失
         if wait_miss:
-            start_time = time.time()
-            while True:
-                _, _, still_found = executor.emulator_executor.find_img(image)
-                if not still_found:
-                    break
-                if time.time() - start_time > click_timeout:
-                    log_util.log.print(f"[{executor.emulator_name}] {desc} 未消失，超时")
-                    if on_timeout:
-                        on_timeout(executor, image, desc)
-                    return StepStatus.FAILED
-                time.sleep(check_interval)
+            missed, _ = poll(lambda: not executor.emulator_executor.find_img(image, region=region)[2],
+                             policy, timeout=click_timeout, key=f"{image}:miss", fast=True)
+            if not missed:
+                log_util.log.print(f"[{executor.emulator_name}] {desc} 未消失，超时")
+                debug_recorder.on_failure(executor.emulator_name)
+                if on_timeout:
+                    on_timeout(executor, image, desc)
+                return StepStatus.FAILED
 
     return StepStatus.SUCCESS
 
 
-def wait_until(func, interval=1, timeout=30):
+def _found(result):
+    """
+    find_img 结果包装：找到时为真值，同时保留坐标
+    """
+    return result if result[2] else None
+
+
+def wait_until(func, interval=1, timeout=30, poll_policy: PollPolicy = None, key=None):
     """
     重复执行 func，直到其返回 True 或超时。
 
     :param func: 可调用对象（无参或自行闭包参数），返回 True 表示成功。
-    :param interval: 每次执行的间隔（秒）
+    :param interval: 每次执行的间隔（秒）；poll_policy 为空时作为退避的起始间隔
     :param timeout: 最大等待时长（秒）
+    :param poll_policy: 轮询策略，默认 PollPolicy(interval)
+    :param key: 学习预期耗时用的标识，为 None 时不学习
     :return: True（成功） 或 False（超时）
     """
-    start = time.time()
-    while True:
+
+    def attempt():
         try:
-            if func():
-                return StepStatus.SUCCESS
+            return func()
         except Exception as e:
             # 如果 func 抛异常，可按需选择是否忽略或中断
             print(f"执行函数出错：{e}")
-        elapsed = time.time() - start
-        if elapsed >= timeout:
-            return StepStatus.FAILED
-        time.sleep(interval)
+            return False
+
+    success, _ = poll(attempt, poll_policy or PollPolicy(interval), timeout=timeout, key=key)
+    return StepStatus.SUCCESS if success else StepStatus.FAILED
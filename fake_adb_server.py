@@ -0,0 +1,122 @@
+# fake_adb_server.py
+import socket
+import socketserver
+import threading
+from typing import Callable, Dict, Optional
+
+# handler(serial, service, command) -> 输出字节；service 为 "shell" 或 "exec"
+ServiceHandler = Callable[[str, str, str], bytes]
+
+# stream_handler(serial, service, command, data) -> 回复字节；用于 exec:sh 等常驻会话，每收到一段输入调用一次
+StreamHandler = Callable[[str, str, str, bytes], bytes]
+
+
+class _FakeAdbRequestHandler(socketserver.BaseRequestHandler):
+
+    def _read_request(self) -> Optional[str]:
+        header = self._recv_exact(4)
+        if header is None:
+            return None
+        payload = self._recv_exact(int(header, 16))
+        return payload.decode("utf-8") if payload is not None else None
+
+    def _recv_exact(self, size) -> Optional[bytes]:
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.request.recv(size - len(buf))
+            if not chunk:
+                return None
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _okay(self):
+        self.request.sendall(b"OKAY")
+
+    def _fail(self, message: str):
+        data = message.encode("utf-8")
+        self.request.sendall(b"FAIL" + b"%04x" % len(data) + data)
+
+    def _reply(self, message: str):
+        data = message.encode("utf-8")
+        self.request.sendall(b"OKAY" + b"%04x" % len(data) + data)
+
+    def handle(self):
+        server: FakeAdbServer = self.server.fake
+        serial = None
+        while True:
+            request = self._read_request()
+            if request is None:
+                return
+            server.requests.append(request)
+            if request == "host:version":
+                self._reply("0029")
+                return
+            if request == "host:devices":
+                self._reply("".join(f"{s}\tdevice\n" for s in server.handlers))
+                return
+            if request.startswith("host:transport:"):
+                serial = request[len("host:transport:"):]
+                if serial not in server.handlers:
+                    self._fail(f"device '{serial}' not found")
+                    return
+                self._okay()
+                continue
+            service, _, command = request.partition(":")
+            if serial is None or service not in ("shell", "exec"):
+                self._fail(f"unknown service: {request}")
+                return
+            self._okay()
+            stream_handler = server.stream_handlers.get(serial)
+            if stream_handler and server.is_stream(command):
+                while True:
+                    data = self.request.recv(65536)
+                    if not data:
+                        return
+                    reply = stream_handler(serial, service, command, data)
+                    if reply:
+                        self.request.sendall(reply)
+            output = server.handlers[serial](serial, service, command)
+            if output:
+                self.request.sendall(output)
+            # 与真实 adb server 一致：服务结束即关闭连接
+            self.request.shutdown(socket.SHUT_WR)
+            return
+
+
+class FakeAdbServer:
+    """
+    本地假 adb server，按 smart-socket 协议应答 host:version / host:devices / host:transport 以及 shell:/exec:，
+    用于在没有模拟器的环境下调试 AdbClient
+
+    用法：
+        server = FakeAdbServer({"emulator-5554": lambda serial, service, cmd: b"ok"})
+        server.start()
+        client = AdbClient(port=server.port)
+    """
+
+    def __init__(self, handlers: Dict[str, ServiceHandler], host="127.0.0.1", port=0,
+                 stream_handlers: Dict[str, StreamHandler] = None):
+        """
+        :param stream_handlers: 常驻会话（exec:sh、exec:cat > ...）的处理函数，按设备序列号索引
+        """
+        self.handlers = handlers
+        self.stream_handlers = stream_handlers or {}
+        self.requests = []
+        self._server = socketserver.ThreadingTCPServer((host, port), _FakeAdbRequestHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    @staticmethod
+    def is_stream(command):
+        return command == "sh" or command.startswith("cat >")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-adb-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,316 @@
+# fake_device.py
+import os
+import random
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import yaml
+
+import log_util
+from adb_client import AdbClient, set_adb_client
+from fake_adb_server import FakeAdbServer
+from simulator_manager import EmulatorManager, EmulatorStatus
+
+
+def synthetic_screen(width, height, seed, templates: Dict[str, List[int]] = None, background=None):
+    """
+    生成合成截图：渐变背景 + 低频纹理 + 若干色块模拟界面面板，再把模板贴到指定左上角坐标
+
+    :param templates: {模板路径: [x, y]}
+    :param background: 录制的截图（BGR），给出时不再生成背景
+    """
+    if background is not None:
+        image = background.copy()
+    else:
+        rng = np.random.default_rng(seed)
+        gradient = np.linspace(40, 120, height, dtype=np.float32)[:, None, None]
+        image = np.repeat(np.repeat(gradient, width, axis=1), 3, axis=2)
+        # 低频纹理：在 1/8 分辨率上加噪声再放大，避免背景完全平坦导致匹配过于容易
+        texture = rng.normal(0, 6, (height // 8, width // 8, 3)).astype(np.float32)
+        image += cv2.resize(texture, (width, height), interpolation=cv2.INTER_LINEAR)
+        # 量化为 8 级灰阶步长，保持纹理的同时让 PNG 足够小，便于提交到仓库
+        image = (np.clip(image, 0, 255).astype(np.uint8) // 8) * 8
+        for _ in range(12):
+            x1, y1 = int(rng.integers(0, width - 80)), int(rng.integers(0, height - 80))
+            x2, y2 = x1 + int(rng.integers(40, 300)), y1 + int(rng.integers(20, 160))
+            color = tuple(int(c) for c in rng.integers(30, 220, 3))
+            cv2.rectangle(image, (x1, y1), (min(x2, width - 1), min(y2, height - 1)), color, -1)
+    for template_path, (x, y) in (templates or {}).items():
+        template = cv2.imread(template_path)
+        if template is None:
+            raise FileNotFoundError(template_path)
+        h, w = template.shape[:2]
+        image[y:y + h, x:x + w] = template
+    return image
+
+
+def encode_raw(image) -> bytes:
+    """
+    按 screencap 原始格式（Android 9+ 带 dataspace）编码 BGR 图片
+    """
+    height, width = image.shape[:2]
+    rgba = cv2.cvtColor(image, cv2.COLOR_BGR2RGBA)
+    return struct.pack("<IIII", width, height, 1, 0) + rgba.tobytes()
+
+
+class Hotspot:
+    def __init__(self, region, goto):
+        """
+        :param region: 像素坐标 (x1, y1, x2, y2)
+        :param goto: 目标画面名，或 {画面名: 权重} 随机选择
+        """
+        self.region = region
+        self.goto = goto
+
+    def contains(self, x, y):
+        x1, y1, x2, y2 = self.region
+        return x1 <= x < x2 and y1 <= y < y2
+
+    def target(self, rng: random.Random):
+        if isinstance(self.goto, dict):
+            names = list(self.goto)
+            return rng.choices(names, weights=[self.goto[n] for n in names])[0]
+        return self.goto
+
+
+class ScreenState:
+    """
+    场景中的一个画面：预先编码好的 raw / png 截图数据由所有虚拟设备共享
+    """
+
+    def __init__(self, name, image, hotspots: List[Hotspot]):
+        self.name = name
+        self.image = image
+        self.raw = encode_raw(image)
+        self.png = cv2.imencode(".png", image)[1].tobytes()
+        self.hotspots = hotspots
+
+    def hit(self, x, y) -> Optional[Hotspot]:
+        return next((h for h in self.hotspots if h.contains(x, y)), None)
+
+
+class Scenario:
+    """
+    虚拟设备的画面状态机，见 benchmarks/fleet_scenario.yaml
+    """
+
+    def __init__(self, states: Dict[str, ScreenState], initial, transition_delay=0.3, capture_delay=0.0,
+                 tap_delay=0.0):
+        """
+        :param transition_delay: 点击热区后画面切换前的加载时间，秒（期间仍返回旧画面）
+        :param capture_delay: 每次截图模拟的设备端耗时，秒
+        :param tap_delay: 每次点击模拟的设备端耗时，秒
+        """
+        self.states = states
+        self.initial = initial
+        self.transition_delay = transition_delay
+        self.capture_delay = capture_delay
+        self.tap_delay = tap_delay
+
+    @staticmethod
+    def load(path) -> "Scenario":
+        with open(path, "r", encoding="utf-8") as f:
+            spec = yaml.safe_load(f)
+        width, height = spec.get("size", [720, 1280])
+        base_dir = os.path.dirname(os.path.abspath(path))
+        states = {}
+        for index, (name, state_spec) in enumerate(spec["states"].items()):
+            state_spec = state_spec or {}
+            templates = state_spec.get("templates") or {}
+            background = None
+            if state_spec.get("frame"):
+                frame_path = os.path.join(base_dir, state_spec["frame"])
+                background = cv2.imdecode(np.fromfile(frame_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            image = synthetic_screen(width, height, index, templates, background)
+
+            hotspots = []
+            for template_path, goto in (state_spec.get("taps") or {}).items():
+                x, y = templates[template_path]
+                template = cv2.imread(template_path)
+                h, w = template.shape[:2]
+                hotspots.append(Hotspot((x, y, x + w, y + h), goto))
+            for hotspot in state_spec.get("hotspots") or []:
+                hotspots.append(Hotspot(tuple(hotspot["region"]), hotspot["goto"]))
+            states[name] = ScreenState(name, image, hotspots)
+        return Scenario(states, spec.get("initial", next(iter(states))), spec.get("transition_delay", 0.3),
+                        spec.get("capture_delay", 0.0), spec.get("tap_delay", 0.0))
+
+
+class FakeDevice:
+    """
+    一台虚拟设备：按场景返回当前画面，点击落在热区时（延迟 transition_delay 后）切换画面
+    """
+
+    def __init__(self, serial, scenario: Scenario, initial=None, seed=None):
+        self.serial = serial
+        self.scenario = scenario
+        self.state = scenario.states[initial or scenario.initial]
+        self._pending = None
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed if seed is not None else serial)
+        self.captures = 0
+        self.taps = 0
+        self.transitions = 0
+
+    def current(self) -> ScreenState:
+        with self._lock:
+            if self._pending and time.time() >= self._pending[1]:
+                self.state = self.scenario.states[self._pending[0]]
+                self._pending = None
+                self.transitions += 1
+            return self.state
+
+    def tap(self, x, y):
+        state = self.current()
+        with self._lock:
+            self.taps += 1
+            hotspot = state.hit(x, y)
+            if hotspot and self._pending is None:
+                self._pending = (hotspot.target(self._rng), time.time() + self.scenario.transition_delay)
+        if self.scenario.tap_delay:
+            time.sleep(self.scenario.tap_delay)
+
+    def run_shell(self, command) -> bytes:
+        """
+        执行一行 shell 命令（以 ; 分隔），支持 input tap/swipe、echo、wm size 与 getprop
+        """
+        output = []
+        for part in command.split(";"):
+            args = part.split()
+            if not args:
+                continue
+            if args[:2] == ["input", "tap"]:
+                self.tap(int(float(args[2])), int(float(args[3])))
+            elif args[:2] == ["input", "swipe"]:
+                # 起止点相同的滑动即长按，按点击处理
+                if args[2:4] == args[4:6]:
+                    self.tap(int(float(args[2])), int(float(args[3])))
+            elif args[0] == "echo":
+                output.append(" ".join(args[1:]) + "\n")
+            elif args[:2] == ["wm", "size"]:
+                height, width = self.state.image.shape[:2]
+                output.append(f"Physical size: {width}x{height}\n")
+            elif args[0] == "getprop":
+                output.append("x86_64\n" if args[1:] == ["ro.product.cpu.abi"] else "\n")
+        return "".join(output).encode("utf-8")
+
+    def handle(self, serial, service, command) -> bytes:
+        if command.startswith("screencap"):
+            state = self.current()
+            self.captures += 1
+            if self.scenario.capture_delay:
+                time.sleep(self.scenario.capture_delay)
+            return state.png if "-p" in command.split() else state.raw
+        return self.run_shell(command)
+
+    def handle_stream(self, serial, service, command, data) -> bytes:
+        # exec:sh 常驻会话：输入按行到达，每行执行后回显
+        return b"".join(self.run_shell(line) for line in data.decode("utf-8", errors="ignore").splitlines())
+
+
+class FakeFleet:
+    """
+    虚拟设备集群：所有设备挂在同一个本地假 adb server 上，start 后本进程的 AdbClient 指向该 server，
+    EmulatorExecutor / 常驻输入通道 / asyncio 引擎无需改动即可连接虚拟设备
+    """
+
+    def __init__(self, scenario: Scenario, size, initial=None, name_prefix="虚拟设备"):
+        self.scenario = scenario
+        self.devices: Dict[str, FakeDevice] = {}
+        self.names: Dict[str, str] = {}
+        for index in range(size):
+            # 与雷电模拟器相同的序列号规则，EmulatorManager.map_device_names 可直接对应
+            serial = f"emulator-{5554 + 2 * index}"
+            self.devices[serial] = FakeDevice(serial, scenario, initial, seed=index)
+            self.names[serial] = f"{name_prefix}-{index}"
+        self.server: Optional[FakeAdbServer] = None
+        self.client: Optional[AdbClient] = None
+        self._previous_client = None
+
+    def start(self, port=0):
+        """
+        :param port: 假 adb server 端口，0 表示随机端口
+        """
+        self.server = FakeAdbServer({s: d.handle for s, d in self.devices.items()}, port=port,
+                                    stream_handlers={s: d.handle_stream for s, d in self.devices.items()}).start()
+        self.client = AdbClient(host=self.server.host, port=self.server.port)
+        self._previous_client = set_adb_client(self.client)
+        log_util.log.print(f"虚拟设备集群已启动：{len(self.devices)} 台，adb server {self.server.host}:{self.server.port}")
+        return self
+
+    def stop(self):
+        if self.server:
+            set_adb_client(self._previous_client)
+            self.client.close()
+            self.server.stop()
+            self.server = None
+
+    def emulators(self) -> List[EmulatorStatus]:
+        emulators = []
+        for index, (serial, device) in enumerate(self.devices.items()):
+            emulator_status = EmulatorStatus()
+            emulator_status.index = index
+            emulator_status.name = self.names[serial]
+            emulator_status.run_status = 1
+            emulator_status.height, emulator_status.width = device.state.image.shape[:2]
+            emulator_status.device_name = serial
+            emulators.append(emulator_status)
+        return emulators
+
+    def stats(self):
+        return {
+            "captures": sum(d.captures for d in self.devices.values()),
+            "taps": sum(d.taps for d in self.devices.values()),
+            "transitions": sum(d.transitions for d in self.devices.values()),
+        }
+
+
+class FakeEmulatorManager(EmulatorManager):
+    """
+    以虚拟设备集群代替 ldconsole / adb devices 的 EmulatorManager
+    """
+
+    def __init__(self, fleet: FakeFleet):
+        super().__init__(adb_path=None, ldconsole_path=None)
+        self.fleet = fleet
+
+    def get_running_indices(self):
+        return [e.index for e in self.fleet.emulators()]
+
+    def get_adb_devices(self):
+        return list(self.fleet.devices)
+
+    def get_all_emulators(self):
+        return self.fleet.emulators()
+
+
+def main(argv=None):
+    """
+    单独进程运行虚拟设备集群，避免与被测进程争抢 CPU：
+
+        python -m fake_device --devices 100 --port 5038
+        python -m benchmarks.bench_fleet --devices 100 --fleet-port 5038
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="虚拟设备集群（假 adb server）")
+    parser.add_argument("--scenario", default="benchmarks/fleet_scenario.yaml")
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--port", type=int, default=5038)
+    parser.add_argument("--initial", help="虚拟设备初始画面，默认为场景的 initial")
+    args = parser.parse_args(argv)
+
+    fleet = FakeFleet(Scenario.load(args.scenario), args.devices, args.initial).start(args.port)
+    try:
+        while True:
+            time.sleep(10)
+            log_util.log.print(f"虚拟设备集群：{fleet.stats()}")
+    except KeyboardInterrupt:
+        fleet.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# frame_snapshot.py
+import threading
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+
+class Frame:
+    """
+    一次截图的快照，多个模板查找共享，只读
+
+    raw 模式下只持有设备原始 RGBA 数据，BGR 图与灰度图按需转换
+    """
+
+    def __init__(self, image=None, captured_at=None, rgba=None):
+        self._image = image
+        self.rgba = rgba
+        self.captured_at = time.time() if captured_at is None else captured_at
+        self._gray = None
+        self._pyramid = {}
+        self._region_hashes = {}
+        # 基于本帧计算出的其他结果（如画面识别），随帧一起失效
+        self.cache = {}
+
+    @property
+    def image(self):
+        if self._image is None and self.rgba is not None:
+            self._image = cv2.cvtColor(self.rgba, cv2.COLOR_RGBA2BGR)
+        return self._image
+
+    @property
+    def gray(self):
+        # 灰度图按需生成，一帧只转换一次
+        if self._gray is None:
+            if self._image is None and self.rgba is not None:
+                self._gray = cv2.cvtColor(self.rgba, cv2.COLOR_RGBA2GRAY)
+            else:
+                self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def gray_pyramid(self, level):
+        """
+        缩小 2^level 倍的灰度图，逐级 pyrDown 并缓存
+        """
+        if level == 0:
+            return self.gray
+        image = self._pyramid.get(level)
+        if image is None:
+            image = cv2.pyrDown(self.gray_pyramid(level - 1))
+            self._pyramid[level] = image
+        return image
+
+    def region_hash(self, region):
+        """
+        灰度图区域像素的 crc32，同一帧同一区域只计算一次
+        """
+        value = self._region_hashes.get(region)
+        if value is None:
+            x1, y1, x2, y2 = region
+            pixels = np.ascontiguousarray(self.gray[y1:y2, x1:x2])
+            value = zlib.crc32(pixels.data)
+            self._region_hashes[region] = value
+        return value
+
+    def age(self):
+        return time.time() - self.captured_at
+
+
+class FrameSnapshot:
+    """
+    单个设备的当前帧：在新鲜度 TTL 内复用，点击后失效，并发请求合并为一次截图
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._capture_lock = threading.Lock()
+        self._frame: Frame = None
+        self._generation = 0
+        self.captures = 0
+        self.reuses = 0
+
+    def get(self, capture, max_age):
+        """
+        :param capture: 截图函数，返回 Frame
+        :param max_age: 可复用的帧最大时长，秒；0 表示强制重新截图
+        :return: Frame
+        """
+        with self._lock:
+            frame = self._frame
+            if frame is not None and max_age > 0 and frame.age() <= max_age:
+                self.reuses += 1
+                return frame
+
+        # 截图期间持有截图锁，其他线程排队后直接复用本次结果
+        with self._capture_lock:
+            with self._lock:
+                frame = self._frame
+                if frame is not None and max_age > 0 and frame.age() <= max_age:
+                    self.reuses += 1
+                    return frame
+                generation = self._generation
+            frame = capture()
+            with self._lock:
+                self.captures += 1
+                # 截图过程中发生了点击，结果只给本次调用使用，不进入缓存
+                if generation == self._generation:
+                    self._frame = frame
+            return frame
+
+    def invalidate(self):
+        with self._lock:
+            self._frame = None
+            self._generation += 1
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_frame_snapshot(device_name) -> FrameSnapshot:
+    """
+    同一设备的所有 EmulatorExecutor 共享一个快照
+    """
+    with _snapshots_lock:
+        snapshot = _snapshots.get(device_name)
+        if snapshot is None:
+            snapshot = FrameSnapshot()
+            _snapshots[device_name] = snapshot
+        return snapshot
@@ -0,0 +1,315 @@
+# input_channel.py
+import itertools
+import re
+import socket
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import config_manager
+import log_util
+from adb_client import AdbClient, get_adb_client
+
+
+class GestureUnconfirmedError(Exception):
+    """
+    手势已（全部或部分）写入设备，但无法确认执行结果；设备可能已经执行，调用方不能重发
+    """
+
+
+class Tap:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Swipe:
+    def __init__(self, x1, y1, x2, y2, duration=300):
+        """
+        :param duration: 滑动时长，毫秒
+        """
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+        self.duration = duration
+
+
+class LongPress:
+    def __init__(self, x, y, duration=800):
+        """
+        :param duration: 按住时长，毫秒
+        """
+        self.x = x
+        self.y = y
+        self.duration = duration
+
+
+class InputChannel(ABC):
+    """
+    每个设备一条常驻输入通道：手势可以立即发送，也可以先 enqueue 再 flush 一次性发送
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: List = []
+
+    def tap(self, x, y):
+        self.batch([Tap(x, y)])
+
+    def swipe(self, x1, y1, x2, y2, duration=300):
+        self.batch([Swipe(x1, y1, x2, y2, duration)])
+
+    def long_press(self, x, y, duration=800):
+        self.batch([LongPress(x, y, duration)])
+
+    def enqueue(self, gesture):
+        with self._lock:
+            self._queue.append(gesture)
+
+    def flush(self):
+        with self._lock:
+            gestures, self._queue = self._queue, []
+        if gestures:
+            self.batch(gestures)
+
+    @abstractmethod
+    def batch(self, gestures):
+        """
+        一次往返发送多个手势，按顺序执行
+
+        发送前失败抛出 OSError（调用方可改用其他方式重发）；已发送后出错抛出 GestureUnconfirmedError
+        """
+
+    def close(self):
+        pass
+
+
+class ShellInputChannel(InputChannel):
+    """
+    常驻 exec:sh 会话执行 input 命令：省去每次启动 adb 进程和建立 transport 的开销。
+    一批手势拼成一行发送，末尾 echo 序号，收到回显即表示设备端已执行完毕
+    """
+
+    def __init__(self, serial, client: AdbClient = None, timeout=config_manager.ADB_SOCKET_TIMEOUT):
+        super().__init__()
+        self.serial = serial
+        self.timeout = timeout
+        self._sock = (client or get_adb_client()).open_stream(serial, "exec:sh")
+        self._sock.settimeout(None)
+        self._tokens = itertools.count(1)
+        self._done = {}
+        self._done_cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name=f"input-{serial}", daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def _command(gesture) -> str:
+        if isinstance(gesture, Tap):
+            return f"input tap {gesture.x} {gesture.y}"
+        if isinstance(gesture, Swipe):
+            return f"input swipe {gesture.x1} {gesture.y1} {gesture.x2} {gesture.y2} {gesture.duration}"
+        if isinstance(gesture, LongPress):
+            return f"input swipe {gesture.x} {gesture.y} {gesture.x} {gesture.y} {gesture.duration}"
+        raise ValueError(f"未知手势：{gesture}")
+
+    def batch(self, gestures):
+        token = next(self._tokens)
+        line = "; ".join(self._command(g) for g in gestures) + f"; echo __input_done_{token}\n"
+        with self._send_lock:
+            # 对端已结束会话时 sendall 仍可能成功，必须按未发送处理，调用方才会改用其他方式重发
+            if self._closed:
+                raise OSError("输入通道已关闭")
+            self._sock.sendall(line.encode("utf-8"))
+        # 之后的异常都发生在命令发出之后，不能当作未发送
+        with self._done_cond:
+            if not self._done_cond.wait_for(lambda: token in self._done or self._closed, self.timeout):
+                raise GestureUnconfirmedError("输入通道响应超时")
+            if self._closed and token not in self._done:
+                raise GestureUnconfirmedError("输入通道在确认前关闭")
+            self._done.pop(token)
+
+    def _read_loop(self):
+        buffer = b""
+        try:
+            while True:
+                chunk = self._sock.recv(4096)
+                if not chunk:
+                    break
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                with self._done_cond:
+                    for line in lines:
+                        match = re.match(rb"__input_done_(\d+)", line.strip())
+                        if match:
+                            self._done[int(match.group(1))] = True
+                    self._done_cond.notify_all()
+        except OSError:
+            pass
+        with self._done_cond:
+            self._closed = True
+            self._done_cond.notify_all()
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+# input_event 常量
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT = 0x00
+BTN_TOUCH = 0x14a
+ABS_MT_SLOT, ABS_MT_POSITION_X, ABS_MT_POSITION_Y, ABS_MT_TRACKING_ID = 0x2f, 0x35, 0x36, 0x39
+
+
+class SendeventInputChannel(InputChannel):
+    """
+    直接向触摸屏设备节点写 input_event：常驻 exec:cat > /dev/input/eventN，不经过 input 命令（无需启动 JVM）。
+    需要 adb shell 对设备节点有写权限（模拟器通常为 root）
+    """
+
+    def __init__(self, serial, client: AdbClient = None):
+        super().__init__()
+        client = client or get_adb_client()
+        self.serial = serial
+        self.device, self.max_x, self.max_y = self._find_touch_device(client, serial)
+        self.width, self.height = self._screen_size(client, serial)
+        abi = client.shell(serial, "getprop ro.product.cpu.abi").decode(errors="ignore")
+        # input_event 以 timeval 开头，64 位系统为两个 8 字节 long
+        self._event_format = "<qqHHi" if "64" in abi else "<iiHHi"
+        self._sock = client.open_stream(serial, f"exec:cat > {self.device}")
+        self._send_lock = threading.Lock()
+        self._tracking_id = itertools.count(1)
+
+    @staticmethod
+    def _find_touch_device(client: AdbClient, serial):
+        output = client.shell(serial, "getevent -pl").decode(errors="ignore")
+        device, max_x = None, None
+        for line in output.splitlines():
+            added = re.match(r"add device \d+: (\S+)", line)
+            if added:
+                device, max_x = added.group(1), None
+                continue
+            axis = re.search(r"ABS_MT_POSITION_([XY])\s*:.*max (\d+)", line)
+            if axis and device:
+                if axis.group(1) == "X":
+                    max_x = int(axis.group(2))
+                elif max_x is not None:
+                    return device, max_x, int(axis.group(2))
+        raise RuntimeError("未找到多点触控设备")
+
+    @staticmethod
+    def _screen_size(client: AdbClient, serial):
+        output = client.shell(serial, "wm size").decode(errors="ignore")
+        sizes = re.findall(r"(\d+)x(\d+)", output)
+        if not sizes:
+            raise RuntimeError(f"无法获取屏幕尺寸：{output}")
+        # 有 Override size 时以最后一行为准
+        width, height = sizes[-1]
+        return int(width), int(height)
+
+    def _event(self, ev_type, code, value) -> bytes:
+        return struct.pack(self._event_format, 0, 0, ev_type, code, value)
+
+    def _scale(self, x, y):
+        return int(x * self.max_x / max(self.width - 1, 1)), int(y * self.max_y / max(self.height - 1, 1))
+
+    def _down(self, x, y) -> bytes:
+        dx, dy = self._scale(x, y)
+        return b"".join([
+            self._event(EV_ABS, ABS_MT_SLOT, 0),
+            self._event(EV_ABS, ABS_MT_TRACKING_ID, next(self._tracking_id)),
+            self._event(EV_ABS, ABS_MT_POSITION_X, dx),
+            self._event(EV_ABS, ABS_MT_POSITION_Y, dy),
+            self._event(EV_KEY, BTN_TOUCH, 1),
+            self._event(EV_SYN, SYN_REPORT, 0),
+        ])
+
+    def _move(self, x, y) -> bytes:
+        dx, dy = self._scale(x, y)
+        return b"".join([
+            self._event(EV_ABS, ABS_MT_POSITION_X, dx),
+            self._event(EV_ABS, ABS_MT_POSITION_Y, dy),
+            self._event(EV_SYN, SYN_REPORT, 0),
+        ])
+
+    def _up(self) -> bytes:
+        return b"".join([
+            self._event(EV_ABS, ABS_MT_TRACKING_ID, -1),
+            self._event(EV_KEY, BTN_TOUCH, 0),
+            self._event(EV_SYN, SYN_REPORT, 0),
+        ])
+
+    def batch(self, gestures):
+        with self._send_lock:
+            sent = []
+            try:
+                self._write_gestures(gestures, sent)
+            except OSError as e:
+                if sent:
+                    raise GestureUnconfirmedError(f"触摸事件写入中断：{e}") from e
+                raise
+
+    def _write_gestures(self, gestures, sent):
+        """
+        :param sent: 每次写入成功后追加写入的字节数，调用方据此判断是否已有事件送达设备
+        """
+        # 连续的点击合并为一次写入；滑动与长按需要在主机端控制节奏
+
+        def send(data):
+            self._sock.sendall(data)
+            sent.append(len(data))
+
+        pending = b""
+        for gesture in gestures:
+            if isinstance(gesture, Tap):
+                pending += self._down(gesture.x, gesture.y) + self._up()
+                continue
+            if pending:
+                send(pending)
+                pending = b""
+            if isinstance(gesture, LongPress):
+                send(self._down(gesture.x, gesture.y))
+                time.sleep(gesture.duration / 1000)
+                send(self._up())
+            elif isinstance(gesture, Swipe):
+                steps = max(int(gesture.duration / 16), 1)
+                send(self._down(gesture.x1, gesture.y1))
+                for i in range(1, steps + 1):
+                    time.sleep(gesture.duration / 1000 / steps)
+                    send(self._move(gesture.x1 + (gesture.x2 - gesture.x1) * i // steps,
+                                    gesture.y1 + (gesture.y2 - gesture.y1) * i // steps))
+                send(self._up())
+            else:
+                raise ValueError(f"未知手势：{gesture}")
+        if pending:
+            send(pending)
+
+    def close(self):
+        self._sock.close()
+
+
+def open_input_channel(serial, kind=config_manager.INPUT_CHANNEL) -> Optional[InputChannel]:
+    """
+    :param kind: "sendevent" 直接写触摸设备（失败时退回 shell），"shell" 常驻 shell 执行 input，"adb" 不使用常驻通道
+    :return: 通道，无法建立时为 None（调用方退回每次执行 adb shell input）
+    """
+    if kind == "adb":
+        return None
+    if kind == "sendevent":
+        try:
+            return SendeventInputChannel(serial)
+        except Exception as e:
+            log_util.log.print(f"[{serial}] sendevent 输入通道不可用，改用 shell：{e}")
+    try:
+        return ShellInputChannel(serial)
+    except Exception as e:
+        log_util.log.print(f"[{serial}] 常驻输入通道不可用：{e}")
+        return None
@@ -1,14 +1,233 @@
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from queue import Empty, SimpleQueue
+
 from PyQt5.QtCore import pyqtSignal
 
+import config_manager
+
+DEBUG, INFO, WARNING, ERROR = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+
+
+def parse_level(level):
+    """
+    把配置中的级别（"debug" / "INFO" / 数字）转为 logging 级别数值
+
+    :return: (级别, 是否有效)；无效时为 (INFO, False)
+    """
+    if isinstance(level, bool):
+        return INFO, False
+    if isinstance(level, int):
+        return level, True
+    if isinstance(level, str):
+        value = logging.getLevelName(level.strip().upper())
+        if isinstance(value, int):
+            return value, True
+    return INFO, False
+
+
+_file_loggers = {}
+_file_loggers_lock = threading.Lock()
+
+
+def get_file_logger(log_dir):
+    """
+    每个目录一个滚动日志文件 app.log，进程内共享
+    """
+    with _file_loggers_lock:
+        if log_dir not in _file_loggers:
+            os.makedirs(log_dir, exist_ok=True)
+            handler = RotatingFileHandler(os.path.join(log_dir, "app.log"),
+                                          maxBytes=config_manager.LOG_FILE_MAX_BYTES,
+                                          backupCount=config_manager.LOG_FILE_BACKUP_COUNT, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            logger = logging.getLogger(f"whiteout.{os.path.abspath(log_dir)}")
+            logger.setLevel(DEBUG)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _file_loggers[log_dir] = logger
+        return _file_loggers[log_dir]
+
+
+class LogRecord:
+    def __init__(self, level, msg, args, emulator=None, tag=None):
+        self.level = level
+        self.msg = msg
+        self.args = args
+        self.emulator = emulator
+        self.tag = tag
+        self.created = time.time()
+
+    def message(self):
+        text = self.msg % self.args if self.args else self.msg
+        return f"[{self.emulator}] {text}" if self.emulator else text
+
+    def rate_key(self):
+        # 有标签时按未格式化的模板合并（如同一模板的相似度日志），否则按完整内容合并
+        return self.level, self.emulator, self.tag, self.msg if self.tag else self.message()
+
+
+class _RateLimiter:
+    """
+    同一 key 每个窗口内最多放行 limit 条，窗口结束时返回被抑制的条数
+    """
+
+    def __init__(self, window, limit):
+        self.window = window
+        self.limit = limit
+        # key -> [窗口开始时间, 已放行条数, 已抑制条数, 最后一条被抑制的记录]
+        self._windows = {}
+
+    def allow(self, key, record, now):
+        state = self._windows.get(key)
+        if state is None or now - state[0] >= self.window:
+            state = self._windows[key] = [now, 0, 0, None]
+        if state[1] < self.limit:
+            state[1] += 1
+            return True
+        state[2] += 1
+        state[3] = record
+        return False
+
+    def expire(self, now):
+        """
+        :return: [(被抑制条数, 最后一条被抑制的记录)]，只包含已结束且有抑制的窗口
+        """
+        expired = []
+        for key, (start, _, suppressed, record) in list(self._windows.items()):
+            if now - start >= self.window:
+                del self._windows[key]
+                if suppressed:
+                    expired.append((suppressed, record))
+        return expired
+
 
 class Log:
-    def __init__(self, log_pyqt_signal=None):
+    """
+    日志管道：工作线程只把记录放入无锁队列；后台线程每 flush_interval 秒取出一批，
+    经级别过滤、重复合并后写入控制台、滚动日志文件，并通过 Qt 信号一次性发送给界面。
+
+    热路径上的调试日志使用 % 占位参数，未开启 DEBUG 时不做格式化：
+        log.debug("图片%s，相似度: %.2f", path, score, emulator=name, tag=path)
+    """
+
+    def __init__(self, log_pyqt_signal=None, level=config_manager.LOG_LEVEL, log_dir=config_manager.LOG_DIR,
+                 flush_interval=config_manager.LOG_FLUSH_INTERVAL,
+                 rate_window=config_manager.LOG_RATE_WINDOW, rate_limit=config_manager.LOG_RATE_LIMIT):
         self.log_pyqt_signal = log_pyqt_signal
+        self.level = INFO
+        self.log_dir = log_dir
+        self.flush_interval = flush_interval
+        self._rate_limiter = _RateLimiter(rate_window, rate_limit)
+        self._queue = SimpleQueue()
+        self._file_logger = None
+        self._dispatcher = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.set_level(level)
+
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    @property
+    def debug_enabled(self):
+        return self.level <= DEBUG
+
+    def set_level(self, level):
+        """
+        级别无效（如配置写错）时使用 INFO 并输出警告，不让日志整体失效
+        """
+        self.level, valid = parse_level(level)
+        if not valid:
+            self.warning(f"日志级别 {level!r} 无效，使用 INFO（可选 DEBUG/INFO/WARNING/ERROR）")
+
+    def log(self, level, msg, *args, emulator=None, tag=None):
+        if level < self.level:
+            return
+        self._queue.put(LogRecord(level, msg, args, emulator, tag))
+        if self._dispatcher is None:
+            self._start_dispatcher()
+
+    def print(self, msg: str, *args, level=INFO, emulator=None, tag=None):
+        self.log(level, msg, *args, emulator=emulator, tag=tag)
+
+    def debug(self, msg, *args, emulator=None, tag=None):
+        if DEBUG >= self.level:
+            self.log(DEBUG, msg, *args, emulator=emulator, tag=tag)
+
+    def info(self, msg, *args, emulator=None, tag=None):
+        self.log(INFO, msg, *args, emulator=emulator, tag=tag)
+
+    def warning(self, msg, *args, emulator=None, tag=None):
+        self.log(WARNING, msg, *args, emulator=emulator, tag=tag)
+
+    def error(self, msg, *args, emulator=None, tag=None):
+        self.log(ERROR, msg, *args, emulator=emulator, tag=tag)
+
+    def flush(self):
+        """
+        立即输出队列中的所有日志
+        """
+        with self._flush_lock:
+            records = []
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            self._dispatch(records)
+
+    def _start_dispatcher(self):
+        with self._start_lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="log-dispatcher", daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"日志输出失败：{e}")
+
+    def _dispatch(self, records):
+        now = time.time()
+        lines = []
+        for suppressed, last in self._rate_limiter.expire(now):
+            text = f"{last.message()}（{self._rate_limiter.window} 秒内同类日志另有 {suppressed} 条已省略）"
+            lines.append((last, text))
+        for record in records:
+            if self._rate_limiter.allow(record.rate_key(), record, now):
+                lines.append((record, record.message()))
+        if not lines:
+            return
+
+        file_logger = self._get_file_logger()
+        for record, text in lines:
+            print(text)
+            if file_logger:
+                file_logger.log(record.level, text)
 
-    def print(self, msg: str):
         if self.log_pyqt_signal:
-            self.log_pyqt_signal.emit(msg)
-        print(msg)
+            ui_lines = [text for _, text in lines]
+            if len(ui_lines) > config_manager.LOG_UI_MAX_BATCH:
+                dropped = len(ui_lines) - config_manager.LOG_UI_MAX_BATCH
+                ui_lines = ui_lines[-config_manager.LOG_UI_MAX_BATCH:]
+                ui_lines.insert(0, f"…界面省略 {dropped} 条日志，完整内容见日志文件")
+            self.log_pyqt_signal.emit("\n".join(ui_lines))
+
+    def _get_file_logger(self):
+        if self._file_logger is None and self.log_dir:
+            try:
+                self._file_logger = get_file_logger(self.log_dir)
+            except OSError as e:
+                print(f"日志文件不可用：{e}")
+                self.log_dir = None
+        return self._file_logger
 
 
-log = Log()
\ No newline at end of file
+log = Log()
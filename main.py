@@ -1,26 +1,38 @@
 # main.py
 import sys
+import time
+
+_start = time.perf_counter()
 
 from PyQt5.QtWidgets import QApplication
 
+import config_manager
+import log_util
+import task_manifest
 from config_manager import ConfigManager
 from simulator_ui import EmulatorSelector
-from utils import task_defined
 
 if __name__ == '__main__':
     config_mgr = ConfigManager("config.json")
 
-    # 自动加载所有任务
-    task_defined.load_all_tasks()
+    # 按任务清单注册任务（清单失效时全量加载），任务模块与 cv2 等在首次执行时才导入
+    task_manifest.load_tasks(config_mgr.get("task_load_mode", config_manager.TASK_LOAD_MODE))
 
     app = QApplication(sys.argv)
     win = EmulatorSelector(config_mgr)
     win.show()
 
+    startup_ms = (time.perf_counter() - _start) * 1000
+    if startup_ms > config_manager.STARTUP_BUDGET_MS:
+        log_util.log.warning(f"启动耗时 {startup_ms:.0f}ms，超出预算 {config_manager.STARTUP_BUDGET_MS}ms")
+    else:
+        log_util.log.print(f"启动耗时 {startup_ms:.0f}ms")
+
 
     def on_exit():
         config_mgr.set_selected_emulators(win.get_selected_emulators())
         config_mgr.save()
+        log_util.log.flush()
 
 
     app.aboutToQuit.connect(on_exit)
@@ -1,12 +1,15 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_submodules
 
+# 任务模块在首次执行时通过 importlib 按任务清单导入，静态分析看不到，需显式打包
+task_modules = collect_submodules('tasks')
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
     datas=[('images/icon.png','images/')],
-    hiddenimports=[],
+    hiddenimports=task_modules,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,50 @@
+# match_memo.py
+import threading
+from collections import OrderedDict
+
+import config_manager
+
+
+class MatchMemo:
+    """
+    单个模拟器的匹配结果缓存：键为 (模板, 模板 mtime, 搜索区域, 匹配参数, 区域像素哈希)，
+    画面未变化时直接返回上次结果，不再调用 matchTemplate；按 LRU 淘汰
+    """
+
+    def __init__(self, max_entries=config_manager.MATCH_MEMO_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        if self.max_entries <= 0:
+            return compute()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
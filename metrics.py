@@ -0,0 +1,317 @@
+# metrics.py
+import bisect
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import config_manager
+import log_util
+
+# 耗时直方图默认分桶（秒）
+DEFAULT_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, registry, name, help_text, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """
+        Prometheus 文本格式的样本行，不含 HELP / TYPE
+        """
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, registry, name, help_text, labelnames=()):
+        super().__init__(registry, name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self):
+        return [f"{self.name}{_label_text(self.labelnames, labels)} {value}" for labels, value in self.items()]
+
+
+class _HistogramState:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help_text, labelnames=(), buckets=DEFAULT_TIME_BUCKETS):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        self._states: Dict[Tuple, _HistogramState] = {}
+        # 原始样本，仅压测等需要精确分位数时通过 keep_samples 开启
+        self._samples: Optional[Dict[Tuple, List[float]]] = None
+
+    def keep_samples(self, enabled=True):
+        """
+        开启后 observe 同时保存每个原始样本，用 samples() 取出；常驻运行时不要开启，样本会一直增长
+        """
+        with self._lock:
+            self._samples = {} if enabled else None
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        # 只记录落入的桶，输出时再累加，observe 只有一次二分查找
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._states.get(labels)
+            if state is None:
+                state = self._states[labels] = _HistogramState(len(self.buckets) + 1)
+            state.counts[index] += 1
+            state.sum += value
+            state.count += 1
+            if self._samples is not None:
+                self._samples.setdefault(labels, []).append(value)
+
+    def samples(self) -> Dict[Tuple, List[float]]:
+        with self._lock:
+            return {labels: list(values) for labels, values in (self._samples or {}).items()}
+
+    def snapshot(self) -> Dict[Tuple, Tuple[List[int], float, int]]:
+        with self._lock:
+            return {labels: (list(s.counts), s.sum, s.count) for labels, s in self._states.items()}
+
+    def quantile(self, q, counts, count) -> Optional[float]:
+        """
+        按分桶线性插值估算分位数
+        """
+        if not count:
+            return None
+        target = q * count
+        cumulative = 0
+        lower = 0.0
+        for i, c in enumerate(counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if c and cumulative + c >= target:
+                return lower + (upper - lower) * (target - cumulative) / c
+            cumulative += c
+            lower = upper
+        return self.buckets[-1]
+
+    def render(self):
+        lines = []
+        for labels, (counts, total, count) in self.snapshot().items():
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                bucket_labels = _label_text(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _label_text(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表：计数器与直方图，标签按位置传入（与 labelnames 顺序一致）
+    """
+
+    def __init__(self, enabled=config_manager.METRICS_ENABLED):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_TIME_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Prometheus 文本格式
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+capture_seconds = registry.histogram("wos_capture_seconds", "截图编码+传输耗时", ("emulator", "format"))
+decode_seconds = registry.histogram("wos_decode_seconds", "截图解码耗时", ("emulator", "format"))
+match_seconds = registry.histogram("wos_match_seconds", "单个模板匹配耗时（不含缓存命中）", ("emulator", "template"))
+match_score = registry.histogram("wos_match_score", "模板最高相似度", ("emulator", "template"), SCORE_BUCKETS)
+tap_seconds = registry.histogram("wos_tap_seconds", "发送点击/手势耗时", ("emulator",))
+step_seconds = registry.histogram("wos_step_seconds", "TaskFlow 单步耗时", ("emulator", "step", "status"))
+task_seconds = registry.histogram("wos_task_seconds", "任务耗时（含前后置任务）", ("emulator", "task", "status"))
+tasks_total = registry.counter("wos_tasks_total", "完成的任务数", ("emulator", "status"))
+dependencies_total = registry.counter("wos_dependencies_total", "依赖任务执行/跳过次数", ("emulator", "result"))
+
+
+def summary_rows(metrics_registry: MetricsRegistry = registry):
+    """
+    按模拟器汇总，用于界面展示
+
+    :return: [(模拟器, 任务/分钟, 截图 p50 ms, 匹配平均 ms, 点击 p50 ms, 单步 p95 s)]
+    """
+    elapsed_minutes = max(time.time() - metrics_registry.started_at, 1e-6) / 60
+
+    def by_emulator(histogram: Histogram):
+        merged = {}
+        for labels, (counts, total, count) in histogram.snapshot().items():
+            m = merged.setdefault(labels[0], [[0] * len(counts), 0.0, 0])
+            m[0] = [a + b for a, b in zip(m[0], counts)]
+            m[1] += total
+            m[2] += count
+        return merged
+
+    captures, matches, taps, steps = (by_emulator(h) for h in (capture_seconds, match_seconds, tap_seconds,
+                                                                 step_seconds))
+    tasks = {}
+    for (emulator, _), value in tasks_total.items():
+        tasks[emulator] = tasks.get(emulator, 0) + value
+
+    def ms(value):
+        return None if value is None else value * 1000
+
+    rows = []
+    for emulator in sorted(set(captures) | set(matches) | set(taps) | set(steps) | set(tasks)):
+        capture = captures.get(emulator)
+        match = matches.get(emulator)
+        tap = taps.get(emulator)
+        step = steps.get(emulator)
+        rows.append((
+            emulator,
+            tasks.get(emulator, 0) / elapsed_minutes,
+            ms(capture_seconds.quantile(0.5, capture[0], capture[2])) if capture else None,
+            ms(match[1] / match[2]) if match and match[2] else None,
+            ms(tap_seconds.quantile(0.5, tap[0], tap[2])) if tap else None,
+            step_seconds.quantile(0.95, step[0], step[2]) if step else None,
+        ))
+    return rows
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = self.server.metrics_registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """
+    定时把指标写入 Prometheus 文本文件（可配合 node_exporter textfile collector），可选在 127.0.0.1 上提供 /metrics
+    """
+
+    def __init__(self, metrics_registry: MetricsRegistry = registry, path=config_manager.METRICS_FILE,
+                 interval=config_manager.METRICS_EXPORT_INTERVAL, http_port=config_manager.METRICS_HTTP_PORT):
+        self.registry = metrics_registry
+        self.path = path
+        self.interval = interval
+        self.http_port = http_port
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def start(self):
+        if self.path:
+            self._thread = threading.Thread(target=self._loop, name="metrics-exporter", daemon=True)
+            self._thread.start()
+        if self.http_port:
+            try:
+                self._server = ThreadingHTTPServer(("127.0.0.1", self.http_port), _MetricsHandler)
+                self._server.daemon_threads = True
+                self._server.metrics_registry = self.registry
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            except OSError as e:
+                log_util.log.warning(f"指标端口 {self.http_port} 不可用：{e}")
+                self._server = None
+        return self
+
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                log_util.log.warning(f"指标写入失败：{e}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.path:
+            try:
+                self.write()
+            except OSError:
+                pass
@@ -0,0 +1,108 @@
+# ocr_engine.py
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config_manager
+from frame_snapshot import Frame
+from match_memo import MatchMemo
+
+
+class OcrWord:
+    """
+    一个识别出的词，坐标为整帧坐标
+    """
+
+    def __init__(self, text, left, top, width, height, conf=-1.0):
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.conf = conf
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.left + self.width // 2, self.top + self.height // 2
+
+    def __repr__(self):
+        return f"OcrWord({self.text}, center={self.center})"
+
+
+class OcrEngine:
+    """
+    OCR 引擎：只识别指定区域，结果按 (语言, 区域, 区域像素哈希) 缓存，画面不变时不再识别。
+    安装了 tesserocr 时每个工作线程保留一个常驻的 Tesseract 实例；否则退回 pytesseract（每次启动 tesseract 进程）
+    """
+
+    def __init__(self, cache_size=config_manager.OCR_CACHE_SIZE):
+        self.memo = MatchMemo(cache_size)
+        self._local = threading.local()
+
+    def recognize(self, frame: Frame, region, lang=config_manager.OCR_LANG) -> List[OcrWord]:
+        """
+        :param region: 整帧像素坐标 (x1, y1, x2, y2)
+        """
+        key = (lang, region, frame.region_hash(region))
+        return self.memo.get_or_compute(key, lambda: self._recognize(frame, region, lang))
+
+    def find_texts(self, frame: Frame, targets: Iterable[str], region,
+                   lang=config_manager.OCR_LANG) -> Dict[str, Optional[OcrWord]]:
+        """
+        一次识别查找多个文本，返回 {文本: 第一个包含该文本的词，未找到为 None}
+        """
+        words = self.recognize(frame, region, lang)
+        return {target: next((w for w in words if target in w.text), None) for target in targets}
+
+    def _recognize(self, frame: Frame, region, lang) -> List[OcrWord]:
+        x1, y1, x2, y2 = region
+        # 灰度化提升识别率
+        gray = frame.gray[y1:y2, x1:x2]
+        api = self._tesserocr_api(lang)
+        if api is not None:
+            return self._recognize_tesserocr(api, gray, x1, y1)
+        return self._recognize_pytesseract(gray, lang, x1, y1)
+
+    def _tesserocr_api(self, lang):
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        if lang not in apis:
+            try:
+                from tesserocr import PyTessBaseAPI
+                apis[lang] = PyTessBaseAPI(lang=lang)
+            except Exception:
+                apis[lang] = None
+        return apis[lang]
+
+    @staticmethod
+    def _recognize_tesserocr(api, gray, offset_x, offset_y) -> List[OcrWord]:
+        from tesserocr import RIL, iterate_level
+        height, width = gray.shape[:2]
+        api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+        api.Recognize()
+        words = []
+        for word in iterate_level(api.GetIterator(), RIL.WORD):
+            text = (word.GetUTF8Text(RIL.WORD) or "").strip()
+            box = word.BoundingBox(RIL.WORD)
+            if not text or not box:
+                continue
+            left, top, right, bottom = box
+            words.append(OcrWord(text, left + offset_x, top + offset_y, right - left, bottom - top,
+                                 word.Confidence(RIL.WORD)))
+        return words
+
+    @staticmethod
+    def _recognize_pytesseract(gray, lang, offset_x, offset_y) -> List[OcrWord]:
+        import pytesseract
+        data = pytesseract.image_to_data(gray, lang=lang, output_type=pytesseract.Output.DICT)
+        words = []
+        for i in range(len(data['text'])):
+            text = data['text'][i].strip()
+            if not text:
+                continue
+            words.append(OcrWord(text, data['left'][i] + offset_x, data['top'][i] + offset_y,
+                                 data['width'][i], data['height'][i], float(data['conf'][i])))
+        return words
+
+
+ocr_engine = OcrEngine()
@@ -0,0 +1,150 @@
+# screen_classifier.py
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+import config_manager
+import log_util
+from frame_snapshot import Frame
+
+UNKNOWN_SCREEN = "unknown"
+
+
+def dhash(gray, size=config_manager.SCREEN_HASH_SIZE) -> np.ndarray:
+    """
+    差值哈希：缩小到 (size+1) x size，比较横向相邻像素，得到 size*size 位指纹
+    """
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1])
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> int:
+    return int(np.unpackbits(np.bitwise_xor(a, b)).sum())
+
+
+class ScreenDefinition:
+    def __init__(self, name, anchors: List[str], threshold, reference_hash: Optional[np.ndarray]):
+        self.name = name
+        self.anchors = anchors
+        self.threshold = threshold
+        self.reference_hash = reference_hash
+
+
+class ScreenMatch:
+    """
+    识别结果：画面名、哈希距离（无参考截图时为 None）、各锚点中心坐标
+    """
+
+    def __init__(self, name, distance=None, anchors: Dict[str, Tuple[int, int]] = None):
+        self.name = name
+        self.distance = distance
+        self.anchors = anchors or {}
+
+    def is_(self, *names):
+        return self.name in names
+
+    def __repr__(self):
+        return f"ScreenMatch({self.name}, distance={self.distance})"
+
+
+class ScreenClassifier:
+    """
+    用一帧截图识别当前所在画面：先用参考截图的感知哈希排序/排除候选，再按画面库顺序校验少量锚点模板。
+    结果缓存在 Frame 上，同一帧的多次查询（如多个 pre_task）只计算一次
+    """
+
+    def __init__(self, library_path=config_manager.SCREEN_LIBRARY,
+                 max_distance=config_manager.SCREEN_HASH_MAX_DISTANCE):
+        """
+        :param max_distance: 与参考截图哈希的最大汉明距离，超过则排除该画面
+        """
+        self.library_path = library_path
+        self.reference_dir = os.path.dirname(library_path)
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._screens: List[ScreenDefinition] = []
+        self._mtime = None
+
+    def screens(self) -> List[ScreenDefinition]:
+        try:
+            mtime = os.path.getmtime(self.library_path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                self._screens = self._load() if mtime is not None else []
+                self._mtime = mtime
+            return self._screens
+
+    def _load(self) -> List[ScreenDefinition]:
+        try:
+            with open(self.library_path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except Exception as e:
+            log_util.log.print(f"加载画面库出错：{e}")
+            return []
+        screens = []
+        for name, conf in data.items():
+            conf = conf or {}
+            reference_hash = None
+            reference = os.path.join(self.reference_dir, f"{name}.png")
+            if os.path.exists(reference):
+                image = cv2.imdecode(np.fromfile(reference, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+                if image is not None:
+                    reference_hash = dhash(image)
+            screens.append(ScreenDefinition(name, conf.get("anchors", []),
+                                            conf.get("threshold", config_manager.MATCH_THRESHOLD), reference_hash))
+        return screens
+
+    def classify(self, executor, frame: Frame) -> ScreenMatch:
+        """
+        :param executor: EmulatorExecutor，用于在该帧上匹配锚点
+        """
+        cached = frame.cache.get("screen")
+        if cached is not None:
+            return cached
+
+        screens = self.screens()
+        frame_hash = dhash(frame.gray) if any(s.reference_hash is not None for s in screens) else None
+        candidates = []
+        for order, screen in enumerate(screens):
+            distance = None
+            if screen.reference_hash is not None:
+                distance = hamming(frame_hash, screen.reference_hash)
+                if distance > self.max_distance:
+                    continue
+            candidates.append((distance if distance is not None else self.max_distance + 1, order, screen))
+        candidates.sort(key=lambda c: (c[0], c[1]))
+
+        result = ScreenMatch(UNKNOWN_SCREEN)
+        for distance, _, screen in candidates:
+            anchors = {}
+            for anchor in screen.anchors:
+                match = executor.match_on_frame(frame, anchor, screen.threshold)
+                if match is None or match.score < screen.threshold:
+                    break
+                anchors[anchor] = match.center
+            else:
+                if screen.anchors or distance <= self.max_distance:
+                    result = ScreenMatch(screen.name, distance if distance <= self.max_distance else None, anchors)
+                    break
+        frame.cache["screen"] = result
+        log_util.log.debug("当前画面: %s", result.name, emulator=executor.name)
+        return result
+
+    def save_reference(self, name, frame: Frame):
+        """
+        把当前帧保存为画面 name 的参考截图，下次加载画面库时生效
+        """
+        path = os.path.join(self.reference_dir, f"{name}.png")
+        cv2.imencode(".png", frame.image)[1].tofile(path)
+        with self._lock:
+            self._mtime = None
+        return path
+
+
+screen_classifier = ScreenClassifier()
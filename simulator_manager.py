@@ -1,8 +1,9 @@
 # simulator_manager.py
 import os
+import re
 import subprocess
 
-import cv2
+import config_manager
 
 
 class EmulatorStatus:
@@ -13,11 +14,25 @@ class EmulatorStatus:
         self.height = 0
         self.width = 0
         self.dpi = 0
+        self.pid = -1
         self.device_name = None
 
     def is_running(self):
         return self.run_status == 1
 
+    def signature(self):
+        """
+        用于比较两次刷新之间状态是否变化
+        """
+        return self.name, self.run_status, self.height, self.width, self.dpi, self.pid, self.device_name
+
+    def candidate_serials(self):
+        """
+        雷电模拟器第 index 个实例的 adb 端口固定为 5555 + 2 * index
+        """
+        port = 5555 + 2 * self.index
+        return [f"emulator-{port - 1}", f"127.0.0.1:{port}"]
+
 
 class EmulatorManager:
     def __init__(self, adb_path, ldconsole_path):
@@ -37,42 +52,74 @@ class EmulatorManager:
                 indices.append(int(parts[0]))
         return indices
 
+    def get_adb_devices(self):
+        """
+        :return: 状态为 device 的序列号列表
+        """
+        result = subprocess.run(
+            [self.adb_path, "devices"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        if result.returncode != 0:
+            raise Exception("获取正在运行的设备出错")
+        serials = []
+        for line in result.stdout.decode('utf-8', errors='ignore').strip().splitlines()[1:]:
+            parts = line.strip().split()
+            if len(parts) >= 2 and parts[1] == "device":
+                serials.append(parts[0])
+        return serials
+
     def get_all_emulators(self):
         result = subprocess.run([self.ldconsole_path, "list2"], capture_output=True, text=True,
                                 creationflags=subprocess.CREATE_NO_WINDOW)
         if result.returncode != 0:
             raise Exception("获取设备列表出错")
         devices_info_list = result.stdout.strip().splitlines()
+        running_serials = self.get_adb_devices()
 
-        running_devices_name = subprocess.run(
-            [self.adb_path, "devices"],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        if running_devices_name.returncode != 0:
-            raise Exception("获取正在运行的设备出错")
-        running_devices_info_arr = [b.decode('utf-8').strip() for b in
-                                    running_devices_name.stdout.strip().splitlines()[1:] if b.decode('utf-8').strip()]
-        running_devices_name_arr = [devices_info.strip().split()[0] for devices_info in running_devices_info_arr]
         emulators = []
-        running_devices_index = 0
         for line in devices_info_list:
             parts = [p.strip() for p in line.strip().split(",") if p.strip()]
+            if len(parts) < 10 or not parts[0].isdigit():
+                continue
             emulator_status = EmulatorStatus()
             emulator_status.index = int(parts[0])
             emulator_status.name = parts[1]
             emulator_status.run_status = int(parts[4])
+            emulator_status.pid = int(parts[5])
             emulator_status.height = int(parts[7])
             emulator_status.width = int(parts[8])
             emulator_status.dpi = int(parts[9])
-            if emulator_status.is_running() and running_devices_index < len(running_devices_name_arr):
-                emulator_status.device_name = running_devices_name_arr[running_devices_index]
-                running_devices_index += 1
             emulators.append(emulator_status)
+        self.map_device_names(emulators, running_serials)
         return emulators
 
+    @staticmethod
+    def map_device_names(emulators, running_serials):
+        """
+        按实例序号推算的 adb 端口匹配序列号；端口无法对应的（如自定义端口）再按顺序配对剩余序列号
+        """
+        unmatched = list(running_serials)
+        pending = []
+        for emulator_status in emulators:
+            if not emulator_status.is_running():
+                continue
+            serial = next((s for s in emulator_status.candidate_serials() if s in unmatched), None)
+            if serial:
+                emulator_status.device_name = serial
+                unmatched.remove(serial)
+            else:
+                pending.append(emulator_status)
+        # 只把看起来属于模拟器的序列号用于兜底配对
+        unmatched = [s for s in unmatched if re.match(r"^(emulator-\d+|127\.0\.0\.1:\d+)$", s)]
+        for emulator_status, serial in zip(pending, unmatched):
+            emulator_status.device_name = serial
+
     def save_screenshot(self, image, index):
-        os.makedirs("screenshots", exist_ok=True)
-        path = os.path.join("screenshots", f"screenshot_index{index}.png")
+        import cv2
+
+        os.makedirs(config_manager.SCREENSHOT_DIR, exist_ok=True)
+        path = os.path.join(config_manager.SCREENSHOT_DIR, f"screenshot_index{index}.png")
         cv2.imwrite(path, image)
         return path
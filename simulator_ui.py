@@ -1,21 +1,31 @@
 # simulator_ui.py
+import threading
+from typing import TYPE_CHECKING
+
 from PyQt5.QtCore import QTimer, Qt, pyqtSignal, QThread
 from PyQt5.QtGui import QIcon, QPixmap, QPainter, QColor
 from PyQt5.QtWidgets import (
     QWidget, QListWidget, QPushButton, QHBoxLayout, QVBoxLayout,
-    QLabel, QComboBox, QTabWidget, QTextEdit, QTableWidget, QHeaderView, QTableWidgetItem, QCheckBox
+    QLabel, QComboBox, QTabWidget, QTextEdit, QTableView, QHeaderView, QAbstractItemView, QTableWidget,
+    QTableWidgetItem
 )
 
 import config_manager
 import log_util
 from TaskConfigEditor import TaskConfigEditor
-from component.EmulatorCellWidget import EmulatorCellWidget
-from component.EmulatorComboBoxWidget import EmulatorComboBoxWidget
+from component.ConfigComboDelegate import ConfigComboDelegate
+from component.EmulatorTableModel import EmulatorTableModel
 from config_manager import TaskConfigManager, ADB_PATH, LDCONSOLE_PATH, ConfigManager
-from emulator_executor import EmulatorExecutor
+from emulator_inventory import EmulatorInventory, InventoryDiff, InventorySnapshot
+from engine_stats import EngineStats
 from log_util import Log
+from metrics import MetricsExporter, summary_rows
 from simulator_manager import EmulatorManager
 from task_executor import TaskExecutor
+from task_scheduler import TaskScheduler
+
+if TYPE_CHECKING:
+    from async_engine import AsyncEngine
 
 
 def create_status_icon(color, size):
@@ -34,12 +44,16 @@ class TaskThread(QThread):
     log_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(str)
 
-    def __init__(self, emulator, task_config, adb_path):
+    def __init__(self, emulator, task_config, adb_path, capture_format=config_manager.CAPTURE_FORMAT,
+                 stats: EngineStats = None):
         super().__init__()
         self.emulator = emulator
         self.task_config = task_config
         self.adb_path = adb_path
+        self.capture_format = capture_format
+        self.stats = stats
         self._is_running = True
+        self._wake = threading.Event()
         self.task_executor: TaskExecutor = None
 
     def run(self):
@@ -48,37 +62,57 @@ class TaskThread(QThread):
             self.finished_signal.emit(self.emulator.name)
             return
 
-        executor = EmulatorExecutor(config_manager.ADB_PATH, self.emulator.name, self.emulator.device_name)
+        # cv2/numpy 在首次执行任务时才导入，不拖慢界面启动
+        from emulator_executor import EmulatorExecutor
+        executor = EmulatorExecutor(config_manager.ADB_PATH, self.emulator.name, self.emulator.device_name,
+                                    capture_format=self.capture_format)
         self.task_executor = TaskExecutor(emulator_executor=executor)
+        if config_manager.CAPTURE_WORKER_ENABLED:
+            executor.start_capture_worker()
 
+        scheduler = TaskScheduler(self.task_config)
         while self._is_running:
-            self.task_executor.execute_task_config(self.task_config)
-            self.log_signal.emit(f"✅ {self.emulator.name} 执行完毕，3秒后再次执行")
-            self.sleep(3)
-
+            executed = scheduler.run_due(self.task_executor)
+            if executed and self.stats:
+                self.stats.record_cycle(self.emulator.name, executed)
+            delay = scheduler.seconds_until_next()
+            if delay is None:
+                self.log_signal.emit(f"⚠️ {self.emulator.name} 没有可调度的任务")
+                break
+            if executed:
+                self.log_signal.emit(f"✅ {self.emulator.name} 执行完毕，{scheduler.describe_next()}")
+            # 睡眠到下一个任务到期，stop() 时立即唤醒
+            self._wake.wait(delay)
+
+        executor.close()
         self.finished_signal.emit(self.emulator.name)
 
     def stop(self):
         self._is_running = False
+        self._wake.set()
         if self.task_executor:
             self.task_executor.close()
 
 
 class EmulatorSelector(QWidget):
     log_pyqt_signal = pyqtSignal(str)
+    inventory_signal = pyqtSignal(object, object)
 
     def __init__(self, config_mgr: ConfigManager):
         super().__init__()
         self.setWindowTitle("模拟器选择器")
         self.resize(800, 400)
-        log_util.log = Log(self.log_pyqt_signal)
+        log_util.log = Log(self.log_pyqt_signal, level=config_mgr.get("log_level", config_manager.LOG_LEVEL))
         self.threads: dict[str:TaskThread] = {}
+        self.async_engine: "AsyncEngine" = None
+        self.engine_stats: EngineStats = None
         self.is_running = False
         self.config_mgr: ConfigManager = config_mgr
         self.task_config_manager: TaskConfigManager = TaskConfigManager()
 
         self.manager: EmulatorManager = EmulatorManager(config_mgr.get("adb_path", ADB_PATH),
                                                         config_mgr.get("ldconsole_path", LDCONSOLE_PATH))
+        self.inventory = EmulatorInventory(self.manager)
         self.status_icon_size = self.config_mgr.get("status_icon_size", 12)
         self.running_icon = create_status_icon("green", self.status_icon_size)
         self.stopped_icon = create_status_icon("gray", self.status_icon_size)
@@ -125,11 +159,19 @@ class EmulatorSelector(QWidget):
         self.log_text.setReadOnly(True)
         self.log_pyqt_signal.connect(self.log_text.append)
 
-        self.table = QTableWidget(0, 2)
-        self.table.setHorizontalHeaderLabels(["模拟器", "绑定配置"])
+        self.table_model = EmulatorTableModel(self.selected_emulators, self.config_mgr.get_emulator_bindings,
+                                              self.running_icon, self.stopped_icon)
+        self.table_model.checkedChanged.connect(self.on_emulator_checkbox_changed)
+        self.table_model.bindingChanged.connect(self.on_bind_config_combo_changed)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setItemDelegateForColumn(EmulatorTableModel.CONFIG_COLUMN,
+                                            ConfigComboDelegate(self.task_config_manager.get_config_name_list,
+                                                                self.table))
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.verticalHeader().setVisible(False)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.setEditTriggers(QAbstractItemView.CurrentChanged | QAbstractItemView.SelectedClicked)
         self.table_layout = QVBoxLayout()
         self.table_layout.addWidget(self.table)
         self.table_layout.addLayout(btn_layout)
@@ -143,6 +185,20 @@ class EmulatorSelector(QWidget):
         self.tab_widget.addTab(self.config_tab, "配置")
         self.tab_widget.addTab(self.log_text, "日志")
 
+        # 运行指标汇总，每 2 秒从指标注册表刷新
+        self.metrics_table = QTableWidget(0, 6)
+        self.metrics_table.setHorizontalHeaderLabels(["模拟器", "任务/分钟", "截图 p50(ms)", "匹配均值(ms)",
+                                                      "点击 p50(ms)", "单步 p95(s)"])
+        self.metrics_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tab_widget.addTab(self.metrics_table, "统计")
+        self.metrics_exporter = MetricsExporter(
+            http_port=self.config_mgr.get("metrics_http_port", config_manager.METRICS_HTTP_PORT)).start()
+        self.metrics_timer = QTimer()
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
+        self.metrics_timer.start(2000)
+
         layout = QVBoxLayout()
         layout.addWidget(self.tab_widget)
         self.setLayout(layout)
@@ -152,13 +208,11 @@ class EmulatorSelector(QWidget):
         self.deselect_all_button.clicked.connect(lambda: self.select_all(False))
         self.start_button.clicked.connect(self.toggle_execution)
 
-        # 定时刷新模拟器状态
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_emulators)
-        self.timer.start(5000)  # 5秒刷新一次
+        # 模拟器状态由后台线程刷新，有变化时转到 UI 线程更新表格
+        self.inventory_signal.connect(self.on_inventory_changed)
+        self.inventory.subscribe(self.inventory_signal.emit)
+        self.inventory.start()
 
-        # self.refresh_emulators()
-        self.refresh_emulators()
         self.refresh_config_file_list()
         self.load_config_from_file(self.config_name_combo.currentText())
 
@@ -180,50 +234,33 @@ class EmulatorSelector(QWidget):
         self.task_config_manager.save_config_to_file(config_name, task_config)
         self.refresh_config_file_list()
 
-    def refresh_emulators(self):
-        emulators = self.manager.get_all_emulators()
-        old_selected = self.selected_emulators.copy()
-
-        self.table.blockSignals(True)
-        self.table.setRowCount(0)
-
-        for row, emu in enumerate(emulators):
-            self.table.insertRow(row)
-
-            emulator_item = EmulatorCellWidget(name=emu.name,
-                                               is_running=emu.is_running(),
-                                               running_icon=self.running_icon,
-                                               stopped_icon=self.stopped_icon,
-                                               is_checked=emu.name in old_selected)
-
-            emulator_item.checkedChanged.connect(self.on_emulator_checkbox_changed)
-
-            cur_config_name = self.config_mgr.get_emulator_bindings(emulator_name=emu.name)
-            config_combo_item = EmulatorComboBoxWidget(name=emu.name,
-                                                       items=self.task_config_manager.get_config_name_list(),
-                                                       current=cur_config_name)
-            config_combo_item.currentTextChanged.connect(self.on_bind_config_combo_changed)
-
-            self.table.setCellWidget(row, 0, emulator_item)
-            self.table.setCellWidget(row, 1, config_combo_item)
+    def on_inventory_changed(self, diff: InventoryDiff, snapshot: InventorySnapshot):
+        for emu in diff.started:
+            log_util.log.print(f"模拟器 {emu.name} 已启动 ({emu.device_name})")
+        for emu in diff.stopped:
+            log_util.log.print(f"模拟器 {emu.name} 已停止")
+        self.table_model.apply_diff(diff)
 
-        self.update_selected_emulators()
-        self.table.blockSignals(False)
-
-    def update_selected_emulators(self):
-        self.selected_emulators.clear()
-        for row in range(self.table.rowCount()):
-            table_item: EmulatorCellWidget = self.table.cellWidget(row, 0)
-            if table_item and table_item.is_checked():
-                name = table_item.get_name()
-                if name:
-                    self.selected_emulators.add(name)
+    def refresh_metrics(self):
+        if self.tab_widget.currentWidget() is not self.metrics_table:
+            return
+        rows = summary_rows()
+        self.metrics_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                if value is None:
+                    text = "-"
+                elif isinstance(value, float):
+                    text = f"{value:.1f}" if column != 5 else f"{value:.2f}"
+                else:
+                    text = str(value)
+                item = self.metrics_table.item(row, column)
+                if item is None:
+                    self.metrics_table.setItem(row, column, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
 
     def on_emulator_checkbox_changed(self, name: str, checked: bool):
-        if checked:
-            self.selected_emulators.add(name)
-        else:
-            self.selected_emulators.discard(name)
         log_util.log.print(f"当前选中: {','.join(self.selected_emulators)}")
 
     def on_bind_config_combo_changed(self, emu_name: str, config_name: str):
@@ -237,40 +274,41 @@ class EmulatorSelector(QWidget):
                 yield item
 
     def select_all(self, checked: bool):
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if isinstance(widget, EmulatorCellWidget):
-                widget.set_checked(checked)
-        if checked:
-            self.selected_emulators = self.get_selected_emulator_names()
-        else:
-            self.selected_emulators.clear()
+        self.table_model.set_all_checked(checked)
 
     def get_selected_emulator_names(self) -> set:
-        selected_names = set()
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if isinstance(widget, EmulatorCellWidget) and widget.is_checked():
-                selected_names.add(widget.get_name())
-        return selected_names
+        return set(self.selected_emulators)
+
+    def current_snapshot(self) -> InventorySnapshot:
+        """
+        当前模拟器快照；后台首次刷新尚未完成时同步刷新一次，避免刚启动就点击执行时找不到任何模拟器
+        """
+        if not self.inventory.loaded.is_set():
+            self.inventory.refresh()
+        return self.inventory.snapshot
 
     def start_execution(self):
         if not self.selected_emulators:
             self.status_label.setText("⚠️ 请先选择要执行的模拟器")
             return
 
+        from emulator_executor import EmulatorExecutor
         self.status_label.setText("▶️ 任务进行中...")
+        snapshot = self.current_snapshot()
         for name in self.selected_emulators:
-            emulator = next((e for e in self.manager.get_all_emulators() if e.name == name), None)
+            emulator = snapshot.get(name)
             if not emulator:
+                log_util.log.warning(f"未找到模拟器 {name}，跳过执行")
                 continue
 
             if not emulator.is_running():
                 log_util.log.print(f"{emulator.name}未运行，跳过执行")
                 continue
-            emulator_executor: EmulatorExecutor = EmulatorExecutor(config_manager.ADB_PATH,
-                                                                   emulator.name,
-                                                                   emulator.device_name)
+            emulator_executor = EmulatorExecutor(config_manager.ADB_PATH,
+                                                 emulator.name,
+                                                 emulator.device_name,
+                                                 capture_format=self.config_mgr
+                                                 .get_emulator_capture_format(name))
             task_executor: TaskExecutor = TaskExecutor(emulator_executor=emulator_executor)
             task_config_name = self.config_mgr.get_emulator_bindings(name)
             print(f"运行{name}->{task_config_name}")
@@ -291,28 +329,51 @@ class EmulatorSelector(QWidget):
         self.is_running = True
         self.start_button.setText("停止执行")
         self.status_label.setText("▶️ 正在执行任务...")
+        engine = self.config_mgr.get("execution_engine", config_manager.EXECUTION_ENGINE)
+        self.engine_stats = EngineStats(engine)
+        jobs = []
+        snapshot = self.current_snapshot()
         for name in self.selected_emulators:
-            emulator = next((e for e in self.manager.get_all_emulators() if e.name == name), None)
+            emulator = snapshot.get(name)
             if not emulator:
+                log_util.log.warning(f"未找到模拟器 {name}，跳过执行")
                 continue
             task_config_name = self.config_mgr.get_emulator_bindings(name)
             if not task_config_name and self.config_name_combo.size() != 0:
                 task_config_name = self.config_name_combo.currentText()
             log_util.log.print(f"[启动{name}]->配置[{task_config_name}]")
             task_config = self.task_config_manager.load_config_from_file(task_config_name)
-            thread = TaskThread(emulator, task_config, config_manager.ADB_PATH)
+            capture_format = self.config_mgr.get_emulator_capture_format(name)
+            if engine == "asyncio":
+                jobs.append((emulator, task_config, capture_format))
+                continue
+            thread = TaskThread(emulator, task_config, config_manager.ADB_PATH,
+                                capture_format=capture_format, stats=self.engine_stats)
             thread.log_signal.connect(log_util.log.print)
             thread.finished_signal.connect(self.thread_finished)
             self.threads[name] = thread
             thread.start()
+        if engine == "asyncio" and jobs:
+            from async_engine import AsyncEngine
+            self.async_engine = AsyncEngine()
+            self.async_engine.start(jobs)
+        if not self.threads and not self.async_engine:
+            self.status_label.setText("⚠️ 所选模拟器均未找到，未启动任务")
+            self.start_button.setText("开始执行")
+            self.is_running = False
 
     def stop_tasks(self):
         self.status_label.setText("⏹️ 正在停止任务...")
         self.start_button.setText("开始执行")
         self.is_running = False
+        if self.async_engine:
+            self.async_engine.stop()
+            self.async_engine = None
+            return
         for name, thread in self.threads.items():
             thread.stop()
         self.threads.clear()
+        log_util.log.print(self.engine_stats.report())
 
     def thread_finished(self, name):
         log_util.log.print(f"🛑 {name} 线程已停止")
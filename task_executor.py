@@ -1,35 +1,51 @@
 # emulator_executor.py
 import importlib
+import json
 import pkgutil
 import time
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List
 
 import log_util
+from debug_recorder import debug_recorder
 from TaskStatus import TaskStatus
-from emulator_executor import EmulatorExecutor
+from metrics import dependencies_total, task_seconds, tasks_total
+
+if TYPE_CHECKING:
+    # 仅用于类型标注：emulator_executor 依赖 cv2/numpy，启动时不导入
+    from emulator_executor import EmulatorExecutor
 
 TASK_REGISTRY = {}
 
 
-def register_task(name, param_defs=None, pre_task=None, after_task=None):
+def dependency_spec(task):
+    """
+    pre_task / after_task 项统一为 (任务名, 参数, when_screen)
+    """
+    if type(task) == dict:
+        return task.get("name"), task.get("param") or {}, task.get("when_screen")
+    return task, {}, None
+
+
+def register_task(name, param_defs=None, pre_task=None, after_task=None, source=None, satisfied_when=None,
+                  calls=None):
+    """
+    :param source: 任务来源，Python 任务为模块名，YAML 任务为文件路径；为空时取被装饰函数所在模块
+    :param satisfied_when: 画面名列表，作为依赖任务执行时若当前处于这些画面则说明无事可做，直接跳过
+    :param calls: 任务体内通过 exist_task 调用的任务名，仅用于依赖分析
+    """
+
     def decorator(func):
         def wrapper(*args, **kwargs):
             try:
                 executor: TaskExecutor = args[0]
-                if pre_task:
-                    for task in pre_task:
-                        if type(task) == dict:
-                            executor.execute_task(task.get("name"), task.get("param"))
-                        else:
-                            executor.execute_task(task, {})
+                for task in pre_task or ():
+                    executor.run_dependency(*dependency_spec(task))
                 result = func(*args, **kwargs)
                 if result == TaskStatus.SUCCESS:
                     time.sleep(1)
-                if after_task:
-                    for task in after_task:
-                        if type(task) == dict:
-                            executor.execute_task(task.get("name"), task.get("param"))
-                        else:
-                            executor.execute_task(task, {})
+                for task in after_task or ():
+                    executor.run_dependency(*dependency_spec(task))
             except Exception as e:
                 log_util.log.print(f"任务 {name} 执行出错：{e}")
                 raise
@@ -37,22 +53,148 @@ def register_task(name, param_defs=None, pre_task=None, after_task=None):
 
         TASK_REGISTRY[name] = {
             "func": wrapper,
-            "param_defs": param_defs or []
+            "param_defs": param_defs or [],
+            "source": source or func.__module__,
+            "pre_task": list(pre_task or []),
+            "after_task": list(after_task or []),
+            "satisfied_when": list(satisfied_when or []),
+            "calls": list(calls or []),
         }
         return wrapper
 
     return decorator
 
 
+class TaskGraph:
+    """
+    一份任务配置涉及的依赖图，边为 pre_task / after_task / exist_task 引用。
+    references 为不做去重时每个依赖任务在一轮中会被执行的次数，cycles 为检测到的循环依赖路径
+    """
+
+    def __init__(self, roots: List[str], registry: Dict = None):
+        self.registry = TASK_REGISTRY if registry is None else registry
+        self.edges: Dict[str, List[str]] = {}
+        self.cycles = []
+        self.references = Counter()
+        self._subtree: Dict[str, Counter] = {}
+        for root in roots:
+            self.references.update(self._expand(root, ()))
+
+    def dependencies(self, name) -> List[str]:
+        task_info = self.registry.get(name) or {}
+        return ([dependency_spec(task)[0] for task in task_info.get("pre_task") or []]
+                + list(task_info.get("calls") or [])
+                + [dependency_spec(task)[0] for task in task_info.get("after_task") or []])
+
+    @property
+    def shared(self):
+        """
+        一轮中会被多次请求的依赖任务
+        """
+        return {name for name, count in self.references.items() if count > 1}
+
+    def _expand(self, name, path) -> Counter:
+        # 返回 name 执行一次时各依赖任务的执行次数
+        if name in self._subtree:
+            return self._subtree[name]
+        counts = Counter()
+        self.edges[name] = self.dependencies(name)
+        for dependency in self.edges[name]:
+            if dependency == name or dependency in path:
+                self.cycles.append(path + (name, dependency))
+                continue
+            counts[dependency] += 1
+            counts.update(self._expand(dependency, path + (name,)))
+        self._subtree[name] = counts
+        return counts
+
+
+class TaskCycle:
+    """
+    一轮 execute_task_config 内的依赖任务备忘：
+    同一依赖（任务名 + 参数）成功执行后记录当时的画面，之后画面未变化时不再重复执行；
+    当前画面属于任务声明的 satisfied_when 时也直接跳过（连同它自己的前置任务）
+    """
+
+    def __init__(self, graph: TaskGraph):
+        self.graph = graph
+        self._done = {}
+        self._running = []
+        self.executed = 0
+        self.skipped_done = 0
+        self.skipped_screen = 0
+
+    @property
+    def skipped(self):
+        return self.skipped_done + self.skipped_screen
+
+    @staticmethod
+    def _key(task_name, params):
+        return task_name, json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _current_screen(executor: "TaskExecutor"):
+        from screen_classifier import UNKNOWN_SCREEN
+
+        name = executor.emulator_executor.classify_screen().name
+        return None if name == UNKNOWN_SCREEN else name
+
+    def run(self, executor: "TaskExecutor", task_name, params):
+        if task_name in self._running:
+            log_util.log.warning(f"任务 {task_name} 存在循环依赖，跳过", emulator=executor.emulator_name)
+            return TaskStatus.FAILED
+        key = self._key(task_name, params)
+        task_info = TASK_REGISTRY.get(task_name) or {}
+        satisfied_when = task_info.get("satisfied_when")
+        if key in self._done or satisfied_when:
+            screen = self._current_screen(executor)
+            if screen and self._done.get(key) == screen:
+                self.skipped_done += 1
+                dependencies_total.inc(executor.emulator_name, "skipped_done")
+                log_util.log.debug("依赖任务 %s 本轮已完成且画面未变化，跳过", task_name,
+                                   emulator=executor.emulator_name)
+                return TaskStatus.SUCCESS
+            if screen and screen in satisfied_when:
+                self.skipped_screen += 1
+                dependencies_total.inc(executor.emulator_name, "skipped_screen")
+                log_util.log.debug("依赖任务 %s 当前画面 %s 已满足，跳过", task_name, screen,
+                                   emulator=executor.emulator_name)
+                return TaskStatus.SUCCESS
+
+        self._running.append(task_name)
+        try:
+            result = executor.execute_task(task_name, params)
+        finally:
+            self._running.pop()
+        self.executed += 1
+        dependencies_total.inc(executor.emulator_name, "executed")
+        if result in (False, TaskStatus.FAILED):
+            self._done.pop(key, None)
+        else:
+            self._done[key] = self._current_screen(executor)
+        return result
+
+    def report(self, emulator_name):
+        planned = sum(self.graph.references.values())
+        log_util.log.debug("本轮依赖任务按配置需执行 %d 次，实际执行 %d 次", planned, self.executed,
+                           emulator=emulator_name)
+        if self.skipped:
+            log_util.log.print(f"本轮避免重复执行依赖任务 {self.skipped} 次"
+                               f"（本轮已完成 {self.skipped_done}，画面已满足 {self.skipped_screen}）",
+                               emulator=emulator_name)
+
+
 class TaskExecutor:
 
-    def __init__(self, emulator_name=None, emulator_executor: EmulatorExecutor = None):
+    def __init__(self, emulator_name=None, emulator_executor: "EmulatorExecutor" = None):
         self.run_status = True
         if emulator_name is None:
             self.emulator_name = emulator_executor.name
         else:
             self.emulator_name = emulator_name
         self.emulator_executor = emulator_executor
+        # 当前 execute_task_config 轮次的依赖备忘，不在配置轮次中时为 None
+        self.cycle: TaskCycle = None
 
     def execute_task(self, task_name, params):
         if not params:
@@ -62,19 +204,69 @@ class TaskExecutor:
             log_util.log.print(f"任务 {task_name} 未注册")
             return False
         func = task_info["func"]
+        start = time.perf_counter()
+        result = False
         try:
-            return func(self, params)
+            result = func(self, params)
+            return result
         except Exception as e:
             log_util.log.print(f"执行任务 {task_name} 出错: {e}")
             return False
+        finally:
+            status = "failed" if result in (False, TaskStatus.FAILED) else "success"
+            task_seconds.observe(time.perf_counter() - start, self.emulator_name, task_name, status)
+            tasks_total.inc(self.emulator_name, status)
 
     def execute_task_config(self, task_config):
-        for task in task_config.get("tasks", []):
-            name = task["name"]
-            params = task.get("params", {})
-            if self.execute_task(name, params) == TaskStatus.FAILED:
-                log_util.log.print(f"任务 {name} 执行失败，停止后续任务")
-                break
+        """
+        按顺序执行配置中的任务，某个任务失败时停止后续任务
+
+        :return: 已执行任务的 [(任务名, 结果)]
+        """
+        tasks = task_config.get("tasks", [])
+        results = []
+        graph = TaskGraph([task["name"] for task in tasks])
+        for path in graph.cycles:
+            log_util.log.warning(f"任务存在循环依赖：{' -> '.join(path)}", emulator=self.emulator_name)
+        self.cycle = TaskCycle(graph)
+        try:
+            for task in tasks:
+                name = task["name"]
+                params = task.get("params", {})
+                result = self.execute_task(name, params)
+                results.append((name, result))
+                if result == TaskStatus.FAILED:
+                    log_util.log.print(f"任务 {name} 执行失败，停止后续任务")
+                    debug_recorder.on_failure(self.emulator_name)
+                    break
+        finally:
+            cycle, self.cycle = self.cycle, None
+            cycle.report(self.emulator_name)
+        return results
+
+    def run_dependency(self, task_name, params=None, when_screen=None):
+        """
+        执行 pre_task / after_task / exist_task 引用的依赖任务：配置轮次中交给 TaskCycle 去重
+
+        :param when_screen: 仅在当前画面匹配时执行，否则跳过并返回 None
+        """
+        if not self.screen_matches(when_screen):
+            return None
+        if self.cycle is None:
+            return self.execute_task(task_name, params)
+        return self.cycle.run(self, task_name, params)
+
+    def screen_matches(self, when_screen):
+        """
+        判断当前画面是否满足条件
+
+        :param when_screen: 画面名或画面名列表，为空表示不限制
+        """
+        if not when_screen:
+            return True
+        if isinstance(when_screen, str):
+            when_screen = [when_screen]
+        return self.emulator_executor.classify_screen().is_(*when_screen)
 
     def close(self):
         self.run_status = False
@@ -0,0 +1,160 @@
+# task_manifest.py
+import importlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import config_manager
+import log_util
+import task_executor
+
+# 清单格式变化时递增，旧清单自动失效
+MANIFEST_VERSION = 2
+
+_load_lock = threading.Lock()
+_loaded_sources = set()
+
+
+def _normalize(path):
+    return os.path.normpath(path).replace("\\", "/")
+
+
+def source_files(tasks_dir="tasks") -> Dict[str, int]:
+    """
+    任务目录下所有 Python/YAML 文件及其修改时间（纳秒），任意一项变化都会使清单失效
+    """
+    files = {}
+    for root, dirs, names in os.walk(tasks_dir):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(names):
+            if name.endswith((".py", ".yaml", ".yml")):
+                path = os.path.join(root, name)
+                files[_normalize(path)] = os.stat(path).st_mtime_ns
+    return files
+
+
+def is_yaml_source(source):
+    return source.endswith((".yaml", ".yml"))
+
+
+def write_manifest(path=config_manager.TASK_MANIFEST_PATH, tasks_dir="tasks"):
+    """
+    根据当前 TASK_REGISTRY（需已全量加载）生成任务清单
+    """
+    tasks = {}
+    for name, task_info in task_executor.TASK_REGISTRY.items():
+        source = task_info.get("source") or ""
+        tasks[name] = {
+            "param_defs": task_info["param_defs"],
+            "source": _normalize(source) if is_yaml_source(source) else source,
+            # 依赖关系随清单保存，任务未加载时也能构建依赖图
+            "pre_task": task_info.get("pre_task", []),
+            "after_task": task_info.get("after_task", []),
+            "satisfied_when": task_info.get("satisfied_when", []),
+            "calls": task_info.get("calls", []),
+        }
+    manifest = {"version": MANIFEST_VERSION, "sources": source_files(tasks_dir), "tasks": tasks}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_manifest(path=config_manager.TASK_MANIFEST_PATH, tasks_dir="tasks") -> Optional[dict]:
+    """
+    :return: 清单内容；文件不存在、格式过旧或任务文件已改动时返回 None
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    if manifest.get("sources") != source_files(tasks_dir):
+        return None
+    return manifest
+
+
+def load_source(source):
+    """
+    加载任务来源（导入 Python 模块或编译 YAML 文件），真实任务函数注册后覆盖占位函数；
+    每个来源成功加载一次，失败时下次执行再重试
+    """
+    with _load_lock:
+        if source in _loaded_sources:
+            return
+        try:
+            if is_yaml_source(source):
+                from utils import task_defined
+                if not task_defined.load_yaml_files([source]):
+                    # 编译错误已由 load_yaml_files 记录
+                    return
+            else:
+                importlib.import_module(source)
+        except Exception as e:
+            log_util.log.error(f"[任务清单] 加载 {source} 失败：{e}")
+            return
+        _loaded_sources.add(source)
+        log_util.log.debug(f"[任务清单] 已加载 {source}")
+
+
+def _lazy_task(name, source):
+    def stub(executor, params):
+        load_source(source)
+        task_info = task_executor.TASK_REGISTRY.get(name)
+        if task_info is None or task_info["func"] is stub:
+            log_util.log.error(f"[任务清单] {source} 中未找到任务 {name}，请删除 {config_manager.TASK_MANIFEST_PATH} 后重启")
+            return False
+        return task_info["func"](executor, params)
+
+    return stub
+
+
+def install_manifest(manifest):
+    """
+    按清单向 TASK_REGISTRY 注册占位任务：界面可直接读取任务名与参数定义，首次执行时再加载真实任务
+    """
+    for name, task_info in manifest["tasks"].items():
+        if name in task_executor.TASK_REGISTRY:
+            continue
+        task_executor.TASK_REGISTRY[name] = {
+            "func": _lazy_task(name, task_info["source"]),
+            "param_defs": task_info["param_defs"],
+            "source": task_info["source"],
+            "pre_task": task_info.get("pre_task", []),
+            "after_task": task_info.get("after_task", []),
+            "satisfied_when": task_info.get("satisfied_when", []),
+            "calls": task_info.get("calls", []),
+        }
+
+
+def load_tasks(mode=config_manager.TASK_LOAD_MODE, path=config_manager.TASK_MANIFEST_PATH, tasks_dir="tasks"):
+    """
+    启动时加载任务：lazy 模式下清单有效则只注册占位任务，否则全量加载并重新生成清单
+    """
+    if mode == "lazy":
+        manifest = read_manifest(path, tasks_dir)
+        if manifest is not None:
+            install_manifest(manifest)
+            log_util.log.print(f"已按任务清单注册 {len(manifest['tasks'])} 个任务，首次执行时加载")
+            return
+
+    from utils import task_defined
+    if task_defined.load_all_tasks() and mode == "lazy":
+        try:
+            write_manifest(path, tasks_dir)
+        except OSError as e:
+            log_util.log.warning(f"[任务清单] 写入失败：{e}")
+
+
+if __name__ == '__main__':
+    # 手动重新生成清单：python task_manifest.py
+    from utils import task_defined
+
+    if task_defined.load_all_tasks():
+        result = write_manifest()
+        print(f"已生成 {config_manager.TASK_MANIFEST_PATH}，共 {len(result['tasks'])} 个任务")
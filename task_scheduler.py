@@ -0,0 +1,191 @@
+# task_scheduler.py
+import datetime
+import heapq
+import itertools
+import time
+from typing import List, Optional
+
+import config_manager
+import log_util
+from TaskStatus import TaskStatus
+
+def parse_daily_at(value) -> List[datetime.time]:
+    """
+    :param value: "HH:MM[:SS]" 或其列表，也接受逗号分隔的字符串
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    times = []
+    for item in value:
+        item = str(item).strip()
+        if not item:
+            continue
+        try:
+            parts = [int(p) for p in item.split(":")]
+            if len(parts) not in (2, 3):
+                raise ValueError
+            times.append(datetime.time(*parts))
+        except ValueError:
+            raise ValueError(f"每日定时格式应为 24 小时制 HH:MM[:SS]：{item}")
+    return sorted(times)
+
+
+def next_daily(times: List[datetime.time], after: float) -> Optional[float]:
+    """
+    after 之后最近的一个每日定时（本地时间），没有定时返回 None
+    """
+    if not times:
+        return None
+    base = datetime.datetime.fromtimestamp(after)
+    for days in (0, 1):
+        day = base.date() + datetime.timedelta(days=days)
+        for t in times:
+            moment = datetime.datetime.combine(day, t).timestamp()
+            if moment > after:
+                return moment
+    return None
+
+
+class ScheduledTask:
+    """
+    配置中的一项任务及其调度参数：
+
+    - interval：每次执行结束后间隔多少秒再执行
+    - cooldown：执行成功后至少间隔多少秒（如出征后等部队返回），失败或未触发时按 interval 重试
+    - daily_at：每天的固定执行时间，"HH:MM" 或列表
+    - priority：同时到期时优先级高的先执行
+
+    interval 与 daily_at 都未设置时按 default_interval 循环执行，与原来每轮执行完等待固定秒数一致
+    """
+
+    def __init__(self, index, task: dict, default_interval):
+        self.index = index
+        self.task = task
+        self.name = task["name"]
+        self.priority = int(task.get("priority") or 0)
+        self.cooldown = float(task.get("cooldown") or 0)
+        self.daily_at = parse_daily_at(task.get("daily_at"))
+        interval = task.get("interval")
+        if self.cooldown < 0 or (interval and float(interval) < 0):
+            raise ValueError("interval / cooldown 不能为负数")
+        if interval:
+            self.interval = float(interval)
+        else:
+            self.interval = None if self.daily_at else float(default_interval)
+        self.due_at = 0.0
+        self.runs = 0
+
+    def first_due(self, now):
+        # 只有每日定时的任务等到下一个定时点，其余任务启动后立即执行
+        if self.interval is None:
+            return next_daily(self.daily_at, now)
+        return now
+
+    def next_due(self, finished_at, status):
+        candidates = []
+        if self.interval is not None:
+            delay = self.interval
+            if status == TaskStatus.SUCCESS:
+                delay = max(delay, self.cooldown)
+            candidates.append(finished_at + delay)
+        elif status != TaskStatus.SUCCESS and self.cooldown:
+            # 只有每日定时的任务失败后按 cooldown 重试，直到成功或到下一个定时点
+            candidates.append(finished_at + self.cooldown)
+        daily = next_daily(self.daily_at, finished_at)
+        if daily is not None:
+            candidates.append(daily)
+        return min(candidates) if candidates else None
+
+
+class TaskScheduler:
+    """
+    单个模拟器的任务调度：按每项任务的下次到期时间维护优先队列，
+    每次只执行已到期的任务，没有到期任务时调用方睡眠到 seconds_until_next() 返回的时刻
+    """
+
+    def __init__(self, task_config, default_interval=config_manager.SCHEDULE_DEFAULT_INTERVAL,
+                 batch_window=config_manager.SCHEDULE_BATCH_WINDOW, clock=time.time):
+        """
+        :param default_interval: 未设置 interval / daily_at 的任务的执行间隔，秒
+        :param batch_window: 到期时间相差在该秒数内的任务合并为一批执行，共享依赖任务的去重
+        """
+        self.batch_window = batch_window
+        self.clock = clock
+        self.tasks: List[ScheduledTask] = []
+        self._queue = []
+        self._seq = itertools.count()
+        now = clock()
+        for index, task in enumerate((task_config or {}).get("tasks", [])):
+            try:
+                scheduled = ScheduledTask(index, task, default_interval)
+            except (TypeError, ValueError) as e:
+                # 不能按默认间隔执行：本应每天一次的任务会变成每几秒一次
+                log_util.log.error(f"任务 {task.get('name')} 调度参数无效，不执行该任务：{e}")
+                continue
+            self.tasks.append(scheduled)
+            self._push(scheduled, scheduled.first_due(now))
+
+    def _push(self, scheduled: ScheduledTask, due_at):
+        if due_at is None:
+            return
+        scheduled.due_at = due_at
+        heapq.heappush(self._queue, (due_at, next(self._seq), scheduled))
+
+    def pop_due(self, now=None) -> List[ScheduledTask]:
+        """
+        取出所有已到期的任务，按优先级从高到低、同优先级按配置顺序排列
+        """
+        now = self.clock() if now is None else now
+        due = []
+        while self._queue and self._queue[0][0] <= now + self.batch_window:
+            due.append(heapq.heappop(self._queue)[2])
+        due.sort(key=lambda s: (-s.priority, s.index))
+        return due
+
+    def complete(self, scheduled: ScheduledTask, status, finished_at=None):
+        finished_at = self.clock() if finished_at is None else finished_at
+        scheduled.runs += 1
+        self._push(scheduled, scheduled.next_due(finished_at, status))
+
+    def run_due(self, task_executor) -> int:
+        """
+        执行所有已到期的任务并重新排期；执行抛出异常时已取出的任务同样重新排期，异常继续抛给调用方
+
+        :return: 实际执行的任务数
+        """
+        due = self.pop_due()
+        if not due:
+            return 0
+        results = []
+        try:
+            results = task_executor.execute_task_config({"tasks": [s.task for s in due]})
+        finally:
+            finished_at = self.clock()
+            for scheduled, (_, status) in zip(due, results):
+                self.complete(scheduled, status, finished_at)
+            # 前面的任务失败（或执行出错）后未执行的任务按未触发处理，等下一个间隔再试
+            for scheduled in due[len(results):]:
+                self.complete(scheduled, TaskStatus.NOT_STARTED, finished_at)
+        return len(results)
+
+    def next_deadline(self) -> Optional[float]:
+        return self._queue[0][0] if self._queue else None
+
+    def seconds_until_next(self, now=None) -> Optional[float]:
+        """
+        :return: 距下一个任务到期的秒数，没有可调度的任务时返回 None
+        """
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        now = self.clock() if now is None else now
+        return max(deadline - now, 0.0)
+
+    def describe_next(self, now=None):
+        if not self._queue:
+            return "没有待执行的任务"
+        due_at, _, scheduled = self._queue[0]
+        wait = self.seconds_until_next(now)
+        return f"下一个任务 {scheduled.name} 于 {time.strftime('%H:%M:%S', time.localtime(due_at))}（{wait:.0f}秒后）"
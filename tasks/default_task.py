@@ -6,22 +6,44 @@ from task_executor import register_task, TaskExecutor
 from TaskStatus import TaskStatus
 
 
-@register_task("自动打开游戏", param_defs=[])
+def screen_anchor(executor: TaskExecutor, screen, img_path):
+    """
+    取画面识别时匹配到的锚点坐标；画面仅靠参考截图识别、没有该锚点时再单独查找一次
+
+    :return: (x, y)，找不到时为 None
+    """
+    point = screen.anchors.get(img_path)
+    if point is None:
+        x, y, find = executor.emulator_executor.find_img(img_path)
+        point = (x, y) if find else None
+    return point
+
+
+@register_task("自动打开游戏", param_defs=[], satisfied_when=["home", "alliance", "login_popup"])
 def check_open(executor: TaskExecutor, params):
-    x, y, find = executor.emulator_executor.find_img("buttons/button1.png")
-    if find:
+    screen = executor.emulator_executor.classify_screen()
+    if screen.is_("app_launcher"):
+        point = screen_anchor(executor, screen, "buttons/button1.png")
+        if point is None:
+            log_util.log.warning(f"[{executor.emulator_name}] 识别到游戏未打开，但未找到游戏图标")
+            return TaskStatus.NOT_STARTED
         log_util.log.print(f"[{executor.emulator_name}] 识别到游戏未打开，打开游戏")
-        executor.emulator_executor.click(x, y)
+        executor.emulator_executor.click(*point)
         return TaskStatus.SUCCESS
     return TaskStatus.NOT_STARTED
 
 
-@register_task("重新登录", param_defs=[{
+@register_task("重新登录", satisfied_when=["home", "alliance"], param_defs=[{
     "name": "interval", "type": "int", "default": 0, "desc": "重上等待时间/秒"
 }])
 def re_login(executor: TaskExecutor, params):
-    x, y, find = executor.emulator_executor.find_img("buttons/relogin.png")
-    if find:
+    screen = executor.emulator_executor.classify_screen()
+    if screen.is_("login_popup"):
+        point = screen_anchor(executor, screen, "buttons/relogin.png")
+        if point is None:
+            log_util.log.warning(f"[{executor.emulator_name}] 识别到登录弹窗，但未找到重新登录按钮")
+            return TaskStatus.NOT_STARTED
+        x, y = point
         inv = params.get("interval", 0)
         log_util.log.print(f"[{executor.emulator_name}] 识别到游戏未登录，等待{inv}秒后重新登录")
         time.sleep(inv)
@@ -35,12 +57,14 @@ def re_login(executor: TaskExecutor, params):
 def back_home(executor: TaskExecutor, params):
     back_image_path = ["buttons/back.png", "buttons/back2.png", "buttons/back3.png", "buttons/back4.png",
                        "buttons/back5.png"]
-    x, y, find = executor.emulator_executor.find_img(back_image_path)
-    while find:
+    # 以找不到返回按钮为准：主页上叠加的界面同样带返回按钮，不能因识别为主页就停止
+    while True:
+        x, y, find = executor.emulator_executor.find_img(back_image_path)
+        if not find:
+            break
         log_util.log.print(f"[{executor.emulator_name}] 点击返回")
         executor.emulator_executor.click(x, y)
         time.sleep(0.5)
-        x, y, find = executor.emulator_executor.find_img(back_image_path)
     return TaskStatus.SUCCESS
 
 
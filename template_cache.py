@@ -0,0 +1,146 @@
+# template_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import cv2
+
+import config_manager
+import log_util
+
+
+class TemplateEntry:
+    """
+    已解码的模板图片，进程内只读共享
+    """
+
+    def __init__(self, path, mtime, image, gray):
+        self.path = path
+        self.mtime = mtime
+        self.image = image
+        self.gray = gray
+        self.height, self.width = gray.shape[:2]
+        # pyramid[i] 为缩小 2^i 倍的灰度模板，pyramid[0] 即原图
+        self.pyramid = build_template_pyramid(gray)
+        self.pyramid_level = len(self.pyramid) - 1
+        self.nbytes = image.nbytes + sum(level.nbytes for level in self.pyramid)
+        self.checked_at = time.time()
+
+
+def build_template_pyramid(gray, max_level=config_manager.PYRAMID_MAX_LEVEL,
+                           min_size=config_manager.PYRAMID_MIN_TEMPLATE_SIZE,
+                           min_fidelity=config_manager.PYRAMID_MIN_FIDELITY):
+    """
+    逐级 pyrDown 模板，直到模板过小或缩小后丢失细节：
+    把缩小后的模板放大回原尺寸，与原模板的 TM_CCOEFF_NORMED 低于 min_fidelity 即停止，
+    保证粗匹配时的相似度与原图阈值仍可比
+    """
+    height, width = gray.shape[:2]
+    pyramid = [gray]
+    for _ in range(max_level):
+        down = cv2.pyrDown(pyramid[-1])
+        if min(down.shape[:2]) < min_size:
+            break
+        restored = cv2.resize(down, (width, height), interpolation=cv2.INTER_LINEAR)
+        fidelity = cv2.matchTemplate(restored, gray, cv2.TM_CCOEFF_NORMED)[0][0]
+        if not fidelity >= min_fidelity:
+            break
+        pyramid.append(down)
+    return pyramid
+
+
+class TemplateCache:
+    """
+    进程级模板缓存：按路径索引，mtime 失效，按内存上限 LRU 淘汰，所有 TaskThread 共享
+    """
+
+    def __init__(self, max_bytes=config_manager.TEMPLATE_CACHE_MAX_BYTES,
+                 check_interval=config_manager.TEMPLATE_CACHE_CHECK_INTERVAL):
+        """
+        :param max_bytes: 缓存占用内存上限（字节）
+        :param check_interval: 两次检查文件 mtime 的最小间隔，秒
+        """
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, TemplateEntry] = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path) -> Optional[TemplateEntry]:
+        key = os.path.normpath(path)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry.checked_at < self.check_interval:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        try:
+            mtime = os.path.getmtime(key)
+        except OSError:
+            self.invalidate(key)
+            return None
+
+        if entry and entry.mtime == mtime:
+            with self._lock:
+                entry.checked_at = now
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+        entry = self._load(key, mtime)
+        if entry is None:
+            return None
+        with self._lock:
+            self.misses += 1
+            self._remove(key)
+            self._entries[key] = entry
+            self._total_bytes += entry.nbytes
+            self._evict()
+        return entry
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+            else:
+                self._remove(os.path.normpath(path))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    @staticmethod
+    def _load(path, mtime) -> Optional[TemplateEntry]:
+        image = cv2.imread(path)
+        if image is None:
+            return None
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return TemplateEntry(path, mtime, image, gray)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total_bytes -= entry.nbytes
+
+    def _evict(self):
+        # 至少保留最新的一个模板，避免单张超大模板被反复加载
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.nbytes
+            log_util.log.print(f"模板缓存淘汰: {key}")
+
+
+template_cache = TemplateCache()
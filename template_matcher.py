@@ -0,0 +1,160 @@
+# template_matcher.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import cv2
+
+import config_manager
+from frame_snapshot import Frame
+from template_cache import TemplateEntry
+
+Point = Tuple[int, int]
+
+
+def match_full(frame: Frame, template: TemplateEntry, region) -> Tuple[float, Point]:
+    """
+    原分辨率 TM_CCOEFF_NORMED 匹配
+
+    :param region: 整帧像素坐标 (x1, y1, x2, y2)
+    :return: (最高相似度, 左上角整帧坐标)
+    """
+    x1, y1, x2, y2 = region
+    res = cv2.matchTemplate(frame.gray[y1:y2, x1:x2], template.gray, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(res)
+    return max_val, (max_loc[0] + x1, max_loc[1] + y1)
+
+
+def match_pyramid(frame: Frame, template: TemplateEntry, region, threshold,
+                  coarse_margin=config_manager.PYRAMID_COARSE_MARGIN,
+                  candidates=config_manager.PYRAMID_CANDIDATES) -> Tuple[float, Point]:
+    """
+    先在模板所选金字塔层上粗匹配，取前 candidates 个不重叠的候选，再在原分辨率下只对候选附近精匹配
+
+    :param threshold: 原分辨率阈值，粗匹配阈值为 threshold - coarse_margin
+    :return: (最高相似度, 左上角整帧坐标)；没有候选通过粗匹配时返回粗匹配的最高相似度
+    """
+    level = template.pyramid_level
+    if level == 0:
+        return match_full(frame, template, region)
+
+    scale = 1 << level
+    coarse_template = template.pyramid[level]
+    coarse_h, coarse_w = coarse_template.shape[:2]
+    coarse_frame = frame.gray_pyramid(level)
+    x1, y1, x2, y2 = region
+    cx1, cy1 = x1 // scale, y1 // scale
+    cx2 = max(min(coarse_frame.shape[1], -(-x2 // scale)), cx1 + coarse_w)
+    cy2 = max(min(coarse_frame.shape[0], -(-y2 // scale)), cy1 + coarse_h)
+    if cx2 > coarse_frame.shape[1] or cy2 > coarse_frame.shape[0]:
+        return match_full(frame, template, region)
+
+    res = cv2.matchTemplate(coarse_frame[cy1:cy2, cx1:cx2], coarse_template, cv2.TM_CCOEFF_NORMED)
+    coarse_threshold = threshold - coarse_margin
+    best_val, best_loc = None, None
+    coarse_val, coarse_loc = None, None
+    margin = scale + 1
+    for _ in range(candidates):
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        mx, my = max_loc
+        if coarse_val is None:
+            coarse_val, coarse_loc = max_val, ((mx + cx1) * scale, (my + cy1) * scale)
+        if max_val < coarse_threshold:
+            break
+        # 屏蔽该候选周围一个模板大小的范围，下一轮取下一个峰值
+        res[max(0, my - coarse_h // 2):my + coarse_h // 2 + 1, max(0, mx - coarse_w // 2):mx + coarse_w // 2 + 1] = -1
+
+        fx, fy = (mx + cx1) * scale, (my + cy1) * scale
+        window = (max(x1, fx - margin), max(y1, fy - margin),
+                  min(x2, fx + template.width + margin), min(y2, fy + template.height + margin))
+        if window[2] - window[0] < template.width or window[3] - window[1] < template.height:
+            # 候选贴近区域边缘，精匹配窗口放不下模板，直接对整个区域精匹配
+            return match_full(frame, template, region)
+        val, loc = match_full(frame, template, window)
+        if best_val is None or val > best_val:
+            best_val, best_loc = val, loc
+        if best_val >= threshold:
+            break
+
+    if best_val is None:
+        return coarse_val, coarse_loc
+    return best_val, best_loc
+
+
+def match_template(frame: Frame, template: TemplateEntry, region, threshold,
+                   mode=config_manager.MATCH_MODE) -> Tuple[float, Point]:
+    if mode == "pyramid":
+        return match_pyramid(frame, template, region, threshold)
+    return match_full(frame, template, region)
+
+
+class Match:
+    """
+    一处匹配结果，坐标为整帧坐标
+    """
+
+    def __init__(self, template_path, score, left, top, width, height, region=None):
+        self.template_path = template_path
+        self.score = score
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.region = region
+
+    @property
+    def center(self) -> Point:
+        return self.left + self.width // 2, self.top + self.height // 2
+
+    def iou(self, other: "Match") -> float:
+        ix = max(0, min(self.left + self.width, other.left + other.width) - max(self.left, other.left))
+        iy = max(0, min(self.top + self.height, other.top + other.height) - max(self.top, other.top))
+        inter = ix * iy
+        union = self.width * self.height + other.width * other.height - inter
+        return inter / union if union else 0.0
+
+    def __repr__(self):
+        return f"Match({self.template_path}, {self.score:.2f}, center={self.center})"
+
+
+def find_peaks(frame: Frame, template: TemplateEntry, region, threshold,
+               max_results=config_manager.FIND_ALL_MAX_RESULTS) -> List[Match]:
+    """
+    单个模板在区域内所有高于阈值的峰值：每取一个最大值就屏蔽其周围一个模板大小的范围
+    """
+    x1, y1, x2, y2 = region
+    res = cv2.matchTemplate(frame.gray[y1:y2, x1:x2], template.gray, cv2.TM_CCOEFF_NORMED)
+    half_w, half_h = template.width // 2, template.height // 2
+    peaks = []
+    while len(peaks) < max_results:
+        _, max_val, _, (mx, my) = cv2.minMaxLoc(res)
+        if max_val < threshold:
+            break
+        peaks.append(Match(template.path, max_val, mx + x1, my + y1, template.width, template.height))
+        res[max(0, my - half_h):my + half_h + 1, max(0, mx - half_w):mx + half_w + 1] = -1
+    return peaks
+
+
+def non_max_suppression(matches: List[Match], overlap=config_manager.NMS_OVERLAP) -> List[Match]:
+    """
+    跨模板去重：按相似度从高到低保留，与已保留结果 IoU 超过 overlap 的丢弃
+    """
+    kept = []
+    for match in sorted(matches, key=lambda m: m.score, reverse=True):
+        if all(match.iou(k) <= overlap for k in kept):
+            kept.append(match)
+    return kept
+
+
+_match_pool = ThreadPoolExecutor(max_workers=config_manager.MATCH_WORKERS or os.cpu_count(),
+                                 thread_name_prefix="template-match")
+
+
+def map_templates(func, items):
+    """
+    在共享线程池上并发执行匹配（OpenCV 计算时会释放 GIL），只有一项时直接在当前线程执行
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    return list(_match_pool.map(func, items))
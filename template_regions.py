@@ -0,0 +1,130 @@
+# template_regions.py
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import yaml
+
+import config_manager
+import log_util
+
+Region = Tuple[float, float, float, float]
+
+REGION_UNITS = ("ratio", "pixel")
+
+
+def is_normalized(region) -> bool:
+    """
+    按值的类型区分比例与像素：四个值都是 0~1 的 float 才按比例换算，只要有一个 int 就按像素处理。
+    因此 (0, 0, 1, 1) 是左上角 1 像素的区域，(0.0, 0.0, 1.0, 1.0) 才是整帧；
+    代码中传比例区域时要写成小数，区域清单中用 unit 显式声明，不依赖这一推断
+    """
+    return all(isinstance(v, float) and 0.0 <= v <= 1.0 for v in region)
+
+
+def parse_region(value):
+    """
+    解析区域清单中的一项：[x1, y1, x2, y2] 按比例处理，
+    {region: [x1, y1, x2, y2], unit: pixel} 按整帧像素坐标处理
+
+    :return: 比例区域为 float 元组，像素区域为 int 元组，与 resolve_region 的推断一致
+    """
+    unit = "ratio"
+    if isinstance(value, dict):
+        unit = value.get("unit", "ratio")
+        value = value.get("region")
+    if unit not in REGION_UNITS:
+        raise ValueError(f"unit 应为 {' / '.join(REGION_UNITS)}")
+    if not isinstance(value, (list, tuple)) or len(value) != 4:
+        raise ValueError("需为 [x1, y1, x2, y2]")
+    if unit == "pixel":
+        region = tuple(int(v) for v in value)
+        if region[0] >= region[2] or region[1] >= region[3] or min(region) < 0:
+            raise ValueError("像素区域需满足 0 <= x1 < x2、0 <= y1 < y2")
+        return region
+    region = tuple(float(v) for v in value)
+    if not is_normalized(region):
+        raise ValueError("比例区域的值需在 0~1 之间")
+    return region
+
+
+def resolve_region(region, frame_width, frame_height, template_width=0, template_height=0) \
+        -> Tuple[int, int, int, int]:
+    """
+    把搜索区域换算为整帧像素坐标 (x1, y1, x2, y2)
+
+    :param region: None 表示整帧；全部为 0~1 的小数时按帧宽高比例换算，否则视为像素坐标（见 is_normalized）
+    :return: 裁剪到帧内、且不小于模板尺寸的区域
+    """
+    if not region:
+        return 0, 0, frame_width, frame_height
+    x1, y1, x2, y2 = region
+    if is_normalized(region):
+        x1, x2 = x1 * frame_width, x2 * frame_width
+        y1, y2 = y1 * frame_height, y2 * frame_height
+    x1, y1 = max(0, int(x1)), max(0, int(y1))
+    x2, y2 = min(frame_width, int(round(x2))), min(frame_height, int(round(y2)))
+    # 区域比模板还小时向右下扩展，无法扩展再向左上扩展
+    if x2 - x1 < template_width:
+        x2 = min(frame_width, x1 + template_width)
+        x1 = max(0, x2 - template_width)
+    if y2 - y1 < template_height:
+        y2 = min(frame_height, y1 + template_height)
+        y1 = max(0, y2 - template_height)
+    return x1, y1, x2, y2
+
+
+class TemplateRegionIndex:
+    """
+    模板搜索区域索引，读取 buttons/ 旁的 regions.yaml：
+
+        lm.png: [0.0, 0.8, 0.5, 1.0]
+        up.png: {region: [290, 225, 324, 250], unit: pixel}
+
+    键为相对清单所在目录的模板文件名，值默认为按帧宽高比例表示的 [x1, y1, x2, y2]，
+    unit: pixel 时为像素坐标（只适用于固定分辨率）；清单修改后自动重新加载
+    """
+
+    def __init__(self, manifest_path=config_manager.TEMPLATE_REGION_MANIFEST):
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self._regions: Dict[str, Region] = {}
+        self._mtime = None
+
+    def get(self, template_path) -> Optional[Region]:
+        self._reload_if_changed()
+        return self._regions.get(os.path.normpath(template_path))
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            self._regions = self._load() if mtime is not None else {}
+            self._mtime = mtime
+
+    def _load(self) -> Dict[str, Region]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except Exception as e:
+            log_util.log.print(f"加载模板区域清单出错：{e}")
+            return {}
+        base_dir = os.path.dirname(self.manifest_path)
+        regions = {}
+        for name, value in data.items():
+            try:
+                region = parse_region(value)
+            except (TypeError, ValueError) as e:
+                log_util.log.print(f"模板区域 {name} 无效：{e}")
+                continue
+            regions[os.path.normpath(os.path.join(base_dir, name))] = region
+        return regions
+
+
+template_regions = TemplateRegionIndex()
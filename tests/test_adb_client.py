@@ -0,0 +1,87 @@
+# tests/test_adb_client.py
+import time
+
+import pytest
+
+from adb_client import AdbClient, AdbError
+from fake_adb_server import FakeAdbServer
+
+SERIAL = "emulator-5554"
+
+
+@pytest.fixture
+def server():
+    calls = []
+
+    def handler(serial, service, command):
+        calls.append((serial, service, command))
+        return f"{service}|{command}".encode("utf-8")
+
+    def stream_handler(serial, service, command, data):
+        return data.upper()
+
+    server = FakeAdbServer({SERIAL: handler}, stream_handlers={SERIAL: stream_handler}).start()
+    server.calls = calls
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = AdbClient(host=server.host, port=server.port, pool_size=0, timeout=5)
+    yield client
+    client.close()
+
+
+def test_shell_and_exec_switch_transport_first(server, client):
+    assert client.shell(SERIAL, "wm size") == b"shell|wm size"
+    assert client.exec(SERIAL, "screencap") == b"exec|screencap"
+    # 每条服务都先切换到目标设备，且服务结束后连接被关闭，不能复用
+    assert server.requests == [f"host:transport:{SERIAL}", "shell:wm size",
+                               f"host:transport:{SERIAL}", "exec:screencap"]
+    assert server.calls == [(SERIAL, "shell", "wm size"), (SERIAL, "exec", "screencap")]
+
+
+def test_output_larger_than_one_recv(server, client):
+    payload = bytes(range(256)) * 4096
+    server.handlers[SERIAL] = lambda serial, service, command: payload
+    assert client.exec(SERIAL, "screencap") == payload
+
+
+def test_host_requests(client):
+    assert client.host_request("host:version") == "0029"
+    assert client.devices() == [(SERIAL, "device")]
+
+
+def test_unknown_device_raises_fail_message(client):
+    with pytest.raises(AdbError, match="device 'emulator-9999' not found"):
+        client.shell("emulator-9999", "echo hi")
+
+
+def test_unknown_service_raises(client):
+    with pytest.raises(AdbError, match="unknown service"):
+        client.open_stream(SERIAL, "sync:")
+
+
+def test_open_stream_keeps_session(client):
+    with client.open_stream(SERIAL, "exec:sh") as sock:
+        sock.sendall(b"echo one\n")
+        assert sock.recv(64) == b"ECHO ONE\n"
+        sock.sendall(b"echo two\n")
+        assert sock.recv(64) == b"ECHO TWO\n"
+
+
+def test_pooled_connection_is_used(server):
+    client = AdbClient(host=server.host, port=server.port, pool_size=1, timeout=5)
+    try:
+        assert client.shell(SERIAL, "echo 1") == b"shell|echo 1"
+        # 等后台线程补充预热连接
+        deadline = time.time() + 2
+        while not client._pools.get(SERIAL) and time.time() < deadline:
+            time.sleep(0.01)
+        pooled = client._pools[SERIAL][0][0]
+        assert client.shell(SERIAL, "echo 2") == b"shell|echo 2"
+        # 预热连接被取出使用，服务结束后关闭
+        assert pooled.fileno() == -1
+    finally:
+        client.close()
@@ -0,0 +1,64 @@
+# tests/test_capture_worker.py
+import threading
+import time
+
+import numpy as np
+
+from capture_worker import CaptureWorker, FrameSlot, ImageSequenceSource
+from frame_snapshot import Frame
+
+
+def make_frame(captured_at):
+    return Frame(np.zeros((4, 4, 3), np.uint8), captured_at)
+
+
+def test_empty_slot_times_out_without_frame():
+    slot = FrameSlot()
+    assert slot.latest() == (0, None)
+    assert slot.wait_for(lambda seq, frame: True, timeout=0.05) == (0, None)
+
+
+def test_wait_for_timeout_does_not_return_stale_frame():
+    slot = FrameSlot()
+    slot.publish(make_frame(1.0))
+    start = time.time()
+    seq, frame = slot.wait_for(lambda s, f: f.captured_at >= 2.0, timeout=0.1)
+    assert (seq, frame) == (1, None)
+    assert time.time() - start >= 0.09
+
+
+def test_wait_for_returns_current_frame_when_it_matches():
+    slot = FrameSlot()
+    frame = make_frame(5.0)
+    slot.publish(frame)
+    assert slot.wait_for(lambda s, f: f.captured_at >= 2.0, timeout=0) == (1, frame)
+
+
+def test_wait_newer_wakes_on_publish():
+    slot = FrameSlot()
+    slot.publish(make_frame(1.0))
+    newer = make_frame(2.0)
+    timer = threading.Timer(0.05, slot.publish, args=(newer,))
+    timer.start()
+    try:
+        assert slot.wait_newer(1, timeout=2) == (2, newer)
+    finally:
+        timer.cancel()
+
+
+def test_wait_newer_timeout():
+    slot = FrameSlot()
+    slot.publish(make_frame(1.0))
+    assert slot.wait_newer(1, timeout=0.05) == (1, None)
+
+
+def test_worker_publishes_frames_from_source():
+    images = [np.full((4, 4, 3), value, np.uint8) for value in (10, 20)]
+    worker = CaptureWorker(ImageSequenceSource(images), fps=100, name="test")
+    worker.start()
+    try:
+        seq, frame = worker.slot.wait_newer(1, timeout=2)
+        assert seq >= 2 and frame is not None
+    finally:
+        worker.stop()
+    assert not worker.is_alive()
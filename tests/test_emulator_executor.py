@@ -0,0 +1,57 @@
+# tests/test_emulator_executor.py
+import cv2
+import numpy as np
+import pytest
+
+from emulator_executor import EmulatorExecutor
+from fake_device import encode_raw
+
+
+class ScriptedTransport:
+    """
+    screencap 按脚本依次返回数据或抛出异常，用完后重复最后一项
+    """
+
+    def __init__(self, image, raw_script):
+        self.png = cv2.imencode(".png", image)[1].tobytes()
+        self.raw_script = list(raw_script)
+        self.calls = []
+
+    def shell(self, cmd_args):
+        return b""
+
+    def exec_out(self, cmd_args):
+        self.calls.append(list(cmd_args))
+        if "-p" in cmd_args:
+            return self.png
+        item = self.raw_script.pop(0) if len(self.raw_script) > 1 else self.raw_script[0]
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+@pytest.fixture
+def image():
+    return np.full((8, 6, 3), 100, np.uint8)
+
+
+def make_executor(transport, serial):
+    return EmulatorExecutor(None, "test", serial, transport=transport, capture_format="raw")
+
+
+def test_transport_error_does_not_switch_to_png(image):
+    transport = ScriptedTransport(image, [OSError("connection reset"), encode_raw(image)])
+    executor = make_executor(transport, "capture-transient")
+    with pytest.raises(RuntimeError):
+        executor.capture()
+    assert executor.capture_format == "raw"
+    assert executor.capture().image.shape == image.shape
+    assert transport.calls == [["screencap"], ["screencap"]]
+
+
+def test_unparseable_raw_switches_to_png(image):
+    transport = ScriptedTransport(image, [b"garbage"])
+    executor = make_executor(transport, "capture-unsupported")
+    assert executor.capture().image.shape == image.shape
+    assert executor.capture_format == "png"
+    assert transport.calls == [["screencap"], ["screencap", "-p"]]
@@ -0,0 +1,68 @@
+# tests/test_fake_device.py
+import struct
+import time
+
+import numpy as np
+import pytest
+
+from adb_client import AdbClient
+from fake_device import FakeDevice, FakeFleet, Hotspot, Scenario, ScreenState
+
+
+def make_scenario(transition_delay=0.0):
+    home = ScreenState("home", np.full((40, 30, 3), 10, np.uint8), [Hotspot((0, 0, 10, 10), "menu")])
+    menu = ScreenState("menu", np.full((40, 30, 3), 200, np.uint8), [Hotspot((0, 0, 10, 10), {"home": 1})])
+    return Scenario({"home": home, "menu": menu}, "home", transition_delay=transition_delay)
+
+
+def test_tap_on_hotspot_switches_after_transition_delay():
+    device = FakeDevice("emulator-5554", make_scenario(transition_delay=0.05))
+    device.tap(20, 20)
+    assert device.current().name == "home"
+    device.tap(5, 5)
+    # 加载期间仍返回旧画面
+    assert device.current().name == "home"
+    time.sleep(0.06)
+    assert device.current().name == "menu"
+    assert (device.taps, device.transitions) == (2, 1)
+
+
+def test_shell_commands():
+    device = FakeDevice("emulator-5554", make_scenario())
+    output = device.run_shell("input tap 5 5; echo done; wm size")
+    assert output == b"done\nPhysical size: 30x40\n"
+    assert device.current().name == "menu"
+
+
+@pytest.fixture
+def fleet():
+    fleet = FakeFleet(make_scenario(), 2).start()
+    yield fleet
+    fleet.stop()
+
+
+def test_fleet_over_adb_wire(fleet):
+    client = AdbClient(host=fleet.server.host, port=fleet.server.port, pool_size=0, timeout=5)
+    try:
+        assert sorted(serial for serial, _ in client.devices()) == ["emulator-5554", "emulator-5556"]
+        raw = client.exec("emulator-5554", "screencap")
+        width, height, _, _ = struct.unpack("<IIII", raw[:16])
+        assert (width, height) == (30, 40)
+        assert len(raw) == 16 + width * height * 4
+
+        client.shell("emulator-5554", "input tap 5 5")
+        assert fleet.devices["emulator-5554"].current().name == "menu"
+        # 设备之间互不影响
+        assert fleet.devices["emulator-5556"].current().name == "home"
+        assert fleet.stats() == {"captures": 1, "taps": 1, "transitions": 1}
+    finally:
+        client.close()
+
+
+def test_fleet_scenario_loads():
+    scenario = Scenario.load("benchmarks/fleet_scenario.yaml")
+    assert scenario.initial in scenario.states
+    for state in scenario.states.values():
+        for hotspot in state.hotspots:
+            targets = hotspot.goto if isinstance(hotspot.goto, dict) else {hotspot.goto: 1}
+            assert set(targets) <= set(scenario.states)
@@ -0,0 +1,106 @@
+# tests/test_input_channel.py
+import time
+
+import pytest
+
+from adb_client import AdbClient, set_adb_client
+from emulator_executor import EmulatorExecutor
+from fake_adb_server import FakeAdbServer
+from input_channel import ShellInputChannel
+
+SERIAL = "emulator-5554"
+
+
+class SessionEnded(Exception):
+    pass
+
+
+@pytest.fixture
+def server():
+    commands = []
+
+    def stream_handler(serial, service, command, data):
+        output = []
+        for line in data.decode("utf-8").splitlines():
+            if line == "exit":
+                # 处理函数抛出异常后 server 关闭连接，模拟设备端结束空闲的 exec:sh 会话
+                raise SessionEnded()
+            for part in line.split(";"):
+                args = part.split()
+                if args[:1] == ["echo"]:
+                    output.append(" ".join(args[1:]) + "\n")
+                elif args:
+                    commands.append(args)
+        return "".join(output).encode("utf-8")
+
+    server = FakeAdbServer({SERIAL: lambda serial, service, command: b""},
+                           stream_handlers={SERIAL: stream_handler})
+    # 抛出的 SessionEnded 是预期行为，不打印堆栈
+    server._server.handle_error = lambda request, client_address: None
+    server.start()
+    server.commands = commands
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = AdbClient(host=server.host, port=server.port, pool_size=0, timeout=5)
+    previous = set_adb_client(client)
+    yield client
+    set_adb_client(previous)
+    client.close()
+
+
+def end_session(channel):
+    channel._sock.sendall(b"exit\n")
+    deadline = time.time() + 2
+    while not channel._closed and time.time() < deadline:
+        time.sleep(0.01)
+    assert channel._closed
+
+
+def test_tap_is_confirmed(server, client):
+    channel = ShellInputChannel(SERIAL, client, timeout=2)
+    try:
+        channel.batch([])
+        channel.tap(5, 6)
+        assert server.commands == [["input", "tap", "5", "6"]]
+    finally:
+        channel.close()
+
+
+def test_tap_after_session_ended_is_not_sent(server, client):
+    channel = ShellInputChannel(SERIAL, client, timeout=2)
+    try:
+        end_session(channel)
+        with pytest.raises(OSError):
+            channel.tap(5, 6)
+    finally:
+        channel.close()
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.shell_calls = []
+
+    def shell(self, cmd_args):
+        self.shell_calls.append(list(cmd_args))
+        return b""
+
+    def exec_out(self, cmd_args):
+        raise OSError("不支持截图")
+
+
+def test_executor_falls_back_to_adb_after_session_ended(server, client):
+    transport = RecordingTransport()
+    executor = EmulatorExecutor(None, "test", SERIAL, transport=transport, input_channel="shell")
+    executor.click(1, 2)
+    assert server.commands == [["input", "tap", "1", "2"]]
+    assert transport.shell_calls == []
+
+    end_session(executor._input_channel)
+    executor.click(3, 4)
+    # 点击没有丢失：通道被丢弃，改用 adb shell input 发送
+    assert transport.shell_calls == [["input", "tap", "3", "4"]]
+    assert executor._input_channel is None
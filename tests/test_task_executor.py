@@ -0,0 +1,144 @@
+# tests/test_task_executor.py
+import pytest
+
+import task_executor
+from TaskStatus import TaskStatus
+from task_executor import TaskExecutor, TaskGraph, register_task
+
+
+class FakeScreen:
+    def __init__(self, name):
+        self.name = name
+
+    def is_(self, *names):
+        return self.name in names
+
+
+class FakeEmulatorExecutor:
+    """
+    只提供画面识别，画面由测试直接设置
+    """
+
+    def __init__(self, screen="unknown"):
+        self.name = "test"
+        self.screen = screen
+
+    def classify_screen(self):
+        return FakeScreen(self.screen)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(task_executor, "TASK_REGISTRY", registry)
+    return registry
+
+
+def test_graph_counts_shared_dependencies_and_cycles():
+    registry = {
+        "home": {},
+        "alliance": {"pre_task": ["home"]},
+        "build": {"pre_task": ["alliance"], "calls": ["home"]},
+        "a": {"pre_task": ["b"]},
+        "b": {"after_task": [{"name": "a"}]},
+    }
+    graph = TaskGraph(["alliance", "build"], registry)
+    assert graph.references == {"home": 3, "alliance": 1}
+    assert graph.shared == {"home"}
+    assert graph.cycles == []
+
+    assert TaskGraph(["a"], registry).cycles == [("a", "b", "a")]
+
+
+def register_alliance_tasks(runs, alliance_screen):
+    @register_task("返回主页")
+    def back_home(executor, params):
+        runs.append("返回主页")
+        executor.emulator_executor.screen = "home"
+        return True
+
+    @register_task("打开联盟", pre_task=["返回主页"])
+    def open_alliance(executor, params):
+        runs.append("打开联盟")
+        executor.emulator_executor.screen = alliance_screen
+        return True
+
+    @register_task("建棋", pre_task=["返回主页"])
+    def build(executor, params):
+        runs.append("建棋")
+        return True
+
+
+def test_cycle_runs_shared_dependency_once_while_screen_unchanged(registry):
+    runs = []
+    register_alliance_tasks(runs, alliance_screen="home")
+    executor = TaskExecutor(emulator_executor=FakeEmulatorExecutor())
+    results = executor.execute_task_config({"tasks": [{"name": "打开联盟"}, {"name": "建棋"}]})
+    assert results == [("打开联盟", True), ("建棋", True)]
+    assert runs == ["返回主页", "打开联盟", "建棋"]
+
+
+def test_cycle_reruns_dependency_after_screen_changes(registry):
+    runs = []
+    register_alliance_tasks(runs, alliance_screen="alliance")
+    executor = TaskExecutor(emulator_executor=FakeEmulatorExecutor())
+    executor.execute_task_config({"tasks": [{"name": "打开联盟"}, {"name": "建棋"}]})
+    assert runs == ["返回主页", "打开联盟", "返回主页", "建棋"]
+
+
+def test_cycle_skips_dependency_when_screen_already_satisfied(registry):
+    runs = []
+
+    @register_task("返回主页", satisfied_when=["home"])
+    def back_home(executor, params):
+        runs.append("返回主页")
+        return True
+
+    @register_task("打开联盟", pre_task=["返回主页"])
+    def open_alliance(executor, params):
+        runs.append("打开联盟")
+        return True
+
+    executor = TaskExecutor(emulator_executor=FakeEmulatorExecutor("home"))
+    executor.execute_task_config({"tasks": [{"name": "打开联盟"}]})
+    assert runs == ["打开联盟"]
+
+    # 不在配置轮次中（如界面单独执行）时不做去重
+    runs.clear()
+    executor.execute_task("打开联盟", {})
+    assert runs == ["返回主页", "打开联盟"]
+
+
+def test_failed_dependency_is_not_memoized(registry):
+    attempts = []
+
+    @register_task("返回主页")
+    def back_home(executor, params):
+        attempts.append(len(attempts))
+        return False if len(attempts) == 1 else True
+
+    @register_task("a", pre_task=["返回主页"])
+    def task_a(executor, params):
+        return True
+
+    @register_task("b", pre_task=["返回主页"])
+    def task_b(executor, params):
+        return True
+
+    executor = TaskExecutor(emulator_executor=FakeEmulatorExecutor("home"))
+    executor.execute_task_config({"tasks": [{"name": "a"}, {"name": "b"}]})
+    assert len(attempts) == 2
+
+
+def test_config_stops_after_failed_task(registry):
+    @register_task("fail")
+    def fail(executor, params):
+        return TaskStatus.FAILED
+
+    @register_task("never")
+    def never(executor, params):
+        raise AssertionError("不应执行")
+
+    executor = TaskExecutor(emulator_executor=FakeEmulatorExecutor())
+    assert executor.execute_task_config({"tasks": [{"name": "fail"}, {"name": "never"}]}) == [
+        ("fail", TaskStatus.FAILED)]
@@ -0,0 +1,51 @@
+# tests/test_task_manifest.py
+import sys
+
+import pytest
+
+import task_executor
+import task_manifest
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(task_manifest, "_loaded_sources", set())
+    monkeypatch.setattr(task_executor, "TASK_REGISTRY", {})
+
+
+def test_failed_module_load_is_retried(tmp_path, monkeypatch, fresh_state):
+    module_path = tmp_path / "manifest_retry_task.py"
+    module_path.write_text("def broken(:\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "manifest_retry_task", raising=False)
+
+    task_manifest.load_source("manifest_retry_task")
+    assert "manifest_retry_task" not in task_manifest._loaded_sources
+
+    module_path.write_text(
+        "from task_executor import register_task\n"
+        "\n"
+        "@register_task('重试任务')\n"
+        "def retry_task(executor, params):\n"
+        "    return True\n",
+        encoding="utf-8")
+    task_manifest.load_source("manifest_retry_task")
+    assert "manifest_retry_task" in task_manifest._loaded_sources
+    assert "重试任务" in task_executor.TASK_REGISTRY
+    monkeypatch.delitem(sys.modules, "manifest_retry_task", raising=False)
+
+
+def test_failed_yaml_load_is_retried(tmp_path, fresh_state):
+    yaml_path = tmp_path / "retry.yaml"
+    yaml_path.write_text("name: YAML重试\nsteps: not-a-list\n", encoding="utf-8")
+    source = str(yaml_path)
+
+    task_manifest.load_source(source)
+    assert source not in task_manifest._loaded_sources
+    assert "YAML重试" not in task_executor.TASK_REGISTRY
+
+    yaml_path.write_text("name: YAML重试\nsteps:\n  - name: 点击联盟\n    action: click_img\n"
+                         "    img_path: buttons/lm.png\n", encoding="utf-8")
+    task_manifest.load_source(source)
+    assert source in task_manifest._loaded_sources
+    assert "YAML重试" in task_executor.TASK_REGISTRY
@@ -0,0 +1,126 @@
+# tests/test_task_scheduler.py
+import datetime
+
+import pytest
+
+from TaskStatus import TaskStatus
+from task_scheduler import TaskScheduler, next_daily, parse_daily_at
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeExecutor:
+    """
+    按任务名返回预设状态；raise_on 中的任务抛出异常，其后的任务不执行（与 execute_task_config 一致）
+    """
+
+    def __init__(self, statuses=None, raise_on=()):
+        self.statuses = statuses or {}
+        self.raise_on = set(raise_on)
+        self.calls = []
+
+    def execute_task_config(self, task_config):
+        names = [task["name"] for task in task_config["tasks"]]
+        self.calls.append(names)
+        results = []
+        for name in names:
+            if name in self.raise_on:
+                raise RuntimeError(name)
+            results.append((name, self.statuses.get(name, TaskStatus.SUCCESS)))
+        return results
+
+
+def make_scheduler(tasks, clock, default_interval=10, batch_window=0):
+    return TaskScheduler({"tasks": tasks}, default_interval=default_interval, batch_window=batch_window, clock=clock)
+
+
+def test_parse_daily_at():
+    assert parse_daily_at("08:00, 20:30:15") == [datetime.time(8, 0), datetime.time(20, 30, 15)]
+    assert parse_daily_at(None) == []
+    for value in ("25:00", "8:00 PM", "8"):
+        with pytest.raises(ValueError):
+            parse_daily_at(value)
+
+
+def test_next_daily_rolls_over_to_tomorrow():
+    after = datetime.datetime(2024, 1, 1, 21, 0).timestamp()
+    times = parse_daily_at("08:00,20:00")
+    assert next_daily(times, after) == datetime.datetime(2024, 1, 2, 8, 0).timestamp()
+
+
+def test_interval_rescheduling():
+    clock = FakeClock()
+    scheduler = make_scheduler([{"name": "a", "interval": 30}, {"name": "b"}], clock)
+    executor = FakeExecutor()
+    assert scheduler.run_due(executor) == 2
+    assert scheduler.run_due(executor) == 0
+    assert scheduler.seconds_until_next() == 10
+
+    clock.now += 10
+    assert scheduler.run_due(executor) == 1
+    assert executor.calls[-1] == ["b"]
+    clock.now += 20
+    assert sorted(s.name for s in scheduler.pop_due()) == ["a", "b"]
+
+
+def test_cooldown_applies_only_after_success():
+    clock = FakeClock()
+    scheduler = make_scheduler([{"name": "march", "interval": 5, "cooldown": 60}], clock)
+    scheduler.run_due(FakeExecutor({"march": TaskStatus.NOT_STARTED}))
+    assert scheduler.seconds_until_next() == 5
+    clock.now += 5
+    scheduler.run_due(FakeExecutor({"march": TaskStatus.SUCCESS}))
+    assert scheduler.seconds_until_next() == 60
+
+
+def test_priority_orders_due_tasks():
+    clock = FakeClock()
+    scheduler = make_scheduler([{"name": "low"}, {"name": "high", "priority": 5}, {"name": "mid", "priority": 1}],
+                               clock)
+    assert [s.name for s in scheduler.pop_due()] == ["high", "mid", "low"]
+
+
+def test_exception_reschedules_popped_tasks():
+    clock = FakeClock()
+    scheduler = make_scheduler([{"name": "a"}, {"name": "b"}], clock)
+    with pytest.raises(RuntimeError):
+        scheduler.run_due(FakeExecutor(raise_on={"a"}))
+    # 两个任务都没有丢失，按 interval 重试
+    assert sorted(s.name for s in scheduler.tasks) == ["a", "b"]
+    assert scheduler.seconds_until_next() == 10
+    clock.now += 10
+    assert scheduler.run_due(FakeExecutor()) == 2
+
+
+def test_invalid_schedule_skips_task():
+    clock = FakeClock()
+    scheduler = make_scheduler([{"name": "bad", "daily_at": "25:00"}, {"name": "neg", "interval": -1},
+                                {"name": "ok"}], clock)
+    assert [s.name for s in scheduler.tasks] == ["ok"]
+
+
+def test_daily_task_waits_for_next_time():
+    clock = FakeClock(datetime.datetime(2024, 1, 1, 7, 0).timestamp())
+    scheduler = make_scheduler([{"name": "daily", "daily_at": "08:00"}], clock)
+    assert scheduler.seconds_until_next() == 3600
+    assert scheduler.run_due(FakeExecutor()) == 0
+    clock.now += 3600
+    assert scheduler.run_due(FakeExecutor()) == 1
+    assert scheduler.next_deadline() == datetime.datetime(2024, 1, 2, 8, 0).timestamp()
+
+
+def test_batch_window_groups_nearby_tasks():
+    clock = FakeClock()
+    scheduler = make_scheduler([{"name": "a", "interval": 10}, {"name": "b", "interval": 12}], clock,
+                               batch_window=3)
+    executor = FakeExecutor()
+    scheduler.run_due(executor)
+    clock.now += 10
+    scheduler.run_due(executor)
+    assert executor.calls[-1] == ["a", "b"]
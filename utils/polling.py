@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+
+import config_manager
+
+
+class LatencyTracker:
+    """
+    记录每个轮询点从开始到成功的耗时（指数滑动平均），用于预测下次的预期等待时间
+    """
+
+    def __init__(self, alpha=config_manager.POLL_LEARN_ALPHA):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._latencies = {}
+
+    def expected(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            return self._latencies.get(key)
+
+    def observe(self, key, latency):
+        if key is None:
+            return
+        with self._lock:
+            previous = self._latencies.get(key)
+            self._latencies[key] = latency if previous is None else previous + self.alpha * (latency - previous)
+
+
+latency_tracker = LatencyTracker()
+
+
+class PollPolicy:
+    """
+    轮询策略：首次立即检测；点击后先以 fast_interval 快速检测 fast_polls 次；
+    之后从 interval 起按 backoff 指数退避到 max_interval，并加入 ±jitter 比例的随机抖动。
+    开启 learn 时，若历史上该轮询点通常在 T 秒后才成功，则 T * POLL_LEARN_SKIP 之前不做多余检测
+    """
+
+    def __init__(self, interval=1.0, max_interval=config_manager.POLL_MAX_INTERVAL,
+                 backoff=config_manager.POLL_BACKOFF, jitter=config_manager.POLL_JITTER,
+                 fast_interval=config_manager.POLL_FAST_INTERVAL, fast_polls=config_manager.POLL_FAST_COUNT,
+                 learn=config_manager.POLL_LEARN):
+        self.interval = interval
+        self.max_interval = max(max_interval, interval)
+        self.backoff = backoff
+        self.jitter = jitter
+        self.fast_interval = fast_interval
+        self.fast_polls = fast_polls
+        self.learn = learn
+
+    def with_config(self, config):
+        """
+        用 YAML 中的 poll 配置覆盖当前策略，返回新对象
+
+        :param config: {interval, max_interval, backoff, jitter, fast_interval, fast_polls, learn}，可为空
+        """
+        if not config:
+            return self
+        values = dict(vars(self))
+        values.update({k: v for k, v in config.items() if k in values})
+        return PollPolicy(**values)
+
+    def next_delay(self, polls, fast, elapsed, expected):
+        """
+        :param polls: 已完成的检测次数
+        :param fast: 是否刚点击过
+        :param elapsed: 本次轮询已耗时
+        :param expected: 学习到的预期成功耗时，没有则为 None
+        """
+        if fast and polls <= self.fast_polls:
+            delay = self.fast_interval
+        else:
+            slow_polls = polls - (self.fast_polls if fast else 0) - 1
+            delay = min(self.interval * (self.backoff ** max(slow_polls, 0)), self.max_interval)
+        if self.learn and expected:
+            delay = max(delay, min(expected * config_manager.POLL_LEARN_SKIP - elapsed, self.max_interval))
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(delay, 0)
+
+
+def poll(func, policy: PollPolicy, timeout=None, attempts=None, key=None, fast=False):
+    """
+    按策略重复执行 func，直到返回真值、超时或达到次数上限
+
+    :param func: 无参可调用对象，返回真值表示成功
+    :param timeout: 最大等待时长，秒
+    :param attempts: 最大检测次数
+    :param key: 学习预期耗时用的轮询点标识，为 None 时不学习
+    :param fast: 是否刚点击过，开启快速检测
+    :return: (是否成功, func 最后一次返回值)
+    """
+    start = time.time()
+    polls = 0
+    while True:
+        result = func()
+        polls += 1
+        elapsed = time.time() - start
+        if result:
+            if policy.learn:
+                latency_tracker.observe(key, elapsed)
+            return True, result
+        if attempts is not None and polls >= attempts:
+            return False, result
+        if timeout is not None and elapsed >= timeout:
+            return False, result
+        delay = policy.next_delay(polls, fast, elapsed, latency_tracker.expected(key) if policy.learn else None)
+        if timeout is not None:
+            delay = min(delay, timeout - elapsed)
+        time.sleep(delay)
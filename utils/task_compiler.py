@@ -0,0 +1,345 @@
+import hashlib
+import json
+import os
+from types import MappingProxyType
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import config_manager
+import log_util
+from utils.polling import PollPolicy
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+# 编译结果格式变化时递增，旧缓存自动失效
+COMPILER_VERSION = 3
+
+# 需要预先检查的资源参数：动作 -> (必填参数, 是否为图片路径)
+ACTION_REQUIREMENTS = {
+    "click_img": ("img_path", True),
+    "click_text": ("text", False),
+    "exist_task": ("name", False),
+}
+
+
+class TaskCompileError(Exception):
+    """
+    YAML 任务不符合 schema 或引用了不存在的资源
+    """
+
+
+_SCHEMA_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: not isinstance(v, bool) and (isinstance(v, int) or (isinstance(v, float) and v.is_integer())),
+    "number": lambda v: not isinstance(v, bool) and isinstance(v, (int, float)),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def schema_error(data, schema: dict, root: dict = None, path=()) -> Optional[Tuple[tuple, str]]:
+    """
+    未安装 jsonschema 时使用的校验，支持 tasks.schema.json 用到的关键字：
+    type / properties / required / additionalProperties / items / oneOf / enum / $ref（仅 #/ 内部引用）/
+    minimum / maximum / minItems / maxItems
+
+    :return: 第一个错误的 (路径, 描述)，通过时为 None
+    """
+    root = schema if root is None else root
+    if "$ref" in schema:
+        target = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target[part]
+        return schema_error(data, target, root, path)
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_SCHEMA_TYPES[t](data) for t in types):
+            return path, f"类型应为 {'/'.join(types)}"
+    if "enum" in schema and data not in schema["enum"]:
+        return path, f"取值应为 {schema['enum']} 之一"
+    if "oneOf" in schema:
+        matched = sum(1 for option in schema["oneOf"] if schema_error(data, option, root, path) is None)
+        if matched != 1:
+            return path, "格式不符合任何一种允许的写法" if matched == 0 else "同时符合多种写法"
+    if isinstance(data, dict):
+        for key in schema.get("required", []):
+            if key not in data:
+                return path, f"缺少字段 {key}"
+        properties = schema.get("properties", {})
+        additional = schema.get("additionalProperties", True)
+        for key, value in data.items():
+            if key in properties:
+                error = schema_error(value, properties[key], root, path + (key,))
+            elif additional is False:
+                error = path + (key,), "不支持的字段"
+            elif isinstance(additional, dict):
+                error = schema_error(value, additional, root, path + (key,))
+            else:
+                error = None
+            if error:
+                return error
+    if isinstance(data, list):
+        if len(data) < schema.get("minItems", 0):
+            return path, f"至少需要 {schema['minItems']} 项"
+        if "maxItems" in schema and len(data) > schema["maxItems"]:
+            return path, f"最多 {schema['maxItems']} 项"
+        if isinstance(schema.get("items"), dict):
+            for index, item in enumerate(data):
+                error = schema_error(item, schema["items"], root, path + (index,))
+                if error:
+                    return error
+    if _SCHEMA_TYPES["number"](data):
+        if "minimum" in schema and data < schema["minimum"]:
+            return path, f"不能小于 {schema['minimum']}"
+        if "maximum" in schema and data > schema["maximum"]:
+            return path, f"不能大于 {schema['maximum']}"
+    return None
+
+
+class StepPlan(NamedTuple):
+    name: str
+    action: str
+    # 步骤原始配置（只读），动作函数从中读取 img_path / text / region 等参数
+    params: MappingProxyType
+    retry: int
+    poll_policy: PollPolicy
+    when_screen: Tuple[str, ...]
+
+
+class TaskPlan(NamedTuple):
+    """
+    编译后的不可变执行计划，注册时生成一次，每次执行直接复用
+    """
+    name: str
+    source: str
+    digest: str
+    pre_task: Tuple
+    param_defs: Tuple
+    steps: Tuple[StepPlan, ...]
+    # 作为依赖任务时，处于这些画面即视为已满足
+    satisfied_when: Tuple[str, ...] = ()
+
+
+def _file_digest(data: bytes, schema_digest: str) -> str:
+    sha = hashlib.sha256(data)
+    sha.update(schema_digest.encode("utf-8"))
+    sha.update(str(COMPILER_VERSION).encode("utf-8"))
+    return sha.hexdigest()
+
+
+class TaskCompiler:
+    """
+    YAML 任务编译：schema 校验（安装 jsonschema 时使用 tasks.schema.json，否则做内置的结构检查）、
+    检查图片路径、规整步骤参数，结果按 文件内容 + schema + 编译器版本 的哈希缓存到磁盘，
+    文件未修改时启动只需读取一次 JSON
+    """
+
+    def __init__(self, schema_path=config_manager.TASK_SCHEMA_PATH, cache_dir=config_manager.TASK_PLAN_CACHE_DIR,
+                 actions: Iterable[str] = ()):
+        """
+        :param actions: 可用的动作名（exist_task 之外），未知动作编译报错
+        """
+        self.schema_path = schema_path
+        self.cache_dir = cache_dir
+        self.actions = set(actions) | {"exist_task"}
+        self._schema = None
+        self._schema_digest = ""
+        if schema_path and os.path.exists(schema_path):
+            with open(schema_path, "rb") as f:
+                raw = f.read()
+            self._schema = json.loads(raw.decode("utf-8"))
+            self._schema_digest = hashlib.sha256(raw).hexdigest()
+
+    def compile_file(self, path) -> TaskPlan:
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = _file_digest(raw, self._schema_digest)
+        data = self._load_cache(path, digest)
+        if data is None:
+            data = self._compile(path, raw)
+            self._save_cache(path, digest, data)
+        return self._build_plan(path, digest, data)
+
+    # === 编译 ===
+    def _compile(self, path, raw: bytes) -> dict:
+        # 只在缓存未命中时需要解析 YAML
+        import yaml
+
+        try:
+            data = yaml.safe_load(raw.decode("utf-8"))
+        except yaml.YAMLError as e:
+            raise TaskCompileError(f"{path}: YAML 解析失败：{e}")
+        self._validate(path, data)
+
+        steps = []
+        for index, step in enumerate(data.get("steps") or []):
+            where = f"{path}: 第 {index + 1} 步 [{step.get('name')}]"
+            action = step["action"]
+            if action not in self.actions:
+                raise TaskCompileError(f"{where}: 未定义动作 {action}")
+            requirement = ACTION_REQUIREMENTS.get(action)
+            if requirement:
+                key, is_image = requirement
+                # exist_task 以步骤名作为被调用的任务名
+                value = step.get(key) if action != "exist_task" else step.get("name")
+                if not value:
+                    raise TaskCompileError(f"{where}: 缺少参数 {key}")
+                if is_image:
+                    value = os.path.normpath(value).replace("\\", "/")
+                    if not os.path.exists(value):
+                        raise TaskCompileError(f"{where}: 图片不存在 {value}")
+                    step = dict(step, **{key: value})
+            when = step.get("when_screen")
+            steps.append({
+                "name": step["name"],
+                "action": action,
+                "params": step,
+                "retry": step.get("retry", 1),
+                "poll": step.get("poll"),
+                "when_screen": [when] if isinstance(when, str) else list(when or []),
+            })
+        satisfied_when = data.get("satisfied_when")
+        return {
+            "name": data["name"],
+            "pre_task": data.get("pre_task") or [],
+            "satisfied_when": [satisfied_when] if isinstance(satisfied_when, str) else list(satisfied_when or []),
+            "param_defs": data.get("param_defs") or [],
+            "poll": data.get("poll"),
+            "steps": steps,
+        }
+
+    def _validate(self, path, data):
+        if self._schema is not None:
+            if jsonschema is not None:
+                try:
+                    jsonschema.validate(data, self._schema)
+                except jsonschema.ValidationError as e:
+                    location = "/".join(str(p) for p in e.absolute_path)
+                    raise TaskCompileError(f"{path}: {location or '根节点'} 不符合 schema：{e.message}")
+                return
+            # 未安装 jsonschema 时用内置校验，覆盖 schema 中的全部字段
+            error = schema_error(data, self._schema)
+            if error:
+                location = "/".join(str(p) for p in error[0])
+                raise TaskCompileError(f"{path}: {location or '根节点'} 不符合 schema：{error[1]}")
+            return
+        # 没有 schema 文件时的基本结构检查
+        if not isinstance(data, dict):
+            raise TaskCompileError(f"{path}: 根节点必须是对象")
+        if not isinstance(data.get("name"), str):
+            raise TaskCompileError(f"{path}: 缺少任务名 name")
+        if not isinstance(data.get("steps"), list):
+            raise TaskCompileError(f"{path}: steps 必须是列表")
+        for index, step in enumerate(data["steps"]):
+            if not isinstance(step, dict) or not isinstance(step.get("name"), str) \
+                    or not isinstance(step.get("action"), str):
+                raise TaskCompileError(f"{path}: 第 {index + 1} 步必须包含 name 与 action")
+            region = step.get("region")
+            if region is not None and (not isinstance(region, list) or len(region) != 4
+                                       or not all(isinstance(v, (int, float)) and 0 <= v <= 1 for v in region)):
+                raise TaskCompileError(f"{path}: 第 {index + 1} 步 region 必须是 4 个 0~1 的数")
+        for item in data.get("pre_task") or []:
+            if not isinstance(item, str) and not (isinstance(item, dict) and isinstance(item.get("name"), str)):
+                raise TaskCompileError(f"{path}: pre_task 项必须是任务名或包含 name 的对象")
+
+    # === 生成执行计划 ===
+    @staticmethod
+    def _build_plan(path, digest, data) -> TaskPlan:
+        task_poll_policy = PollPolicy(0.5).with_config(data.get("poll"))
+        steps = tuple(StepPlan(
+            name=s["name"],
+            action=s["action"],
+            params=MappingProxyType(s["params"]),
+            retry=s["retry"],
+            poll_policy=task_poll_policy.with_config(s.get("poll")),
+            when_screen=tuple(s["when_screen"]),
+        ) for s in data["steps"])
+        return TaskPlan(data["name"], path, digest, tuple(data["pre_task"]), tuple(data["param_defs"]), steps,
+                        tuple(data["satisfied_when"]))
+
+    # === 磁盘缓存 ===
+    def _cache_path(self, path, digest):
+        return os.path.join(self.cache_dir, f"{os.path.basename(path)}.{digest[:16]}.json")
+
+    def _load_cache(self, path, digest) -> Optional[dict]:
+        if not self.cache_dir:
+            return None
+        cache_path = self._cache_path(path, digest)
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("digest") != digest:
+            return None
+        # 图片在编译后被删除时重新编译报错
+        for step in cached["plan"]["steps"]:
+            img_path = step["params"].get("img_path") if step["action"] == "click_img" else None
+            if img_path and not os.path.exists(img_path):
+                return None
+        return cached["plan"]
+
+    def _save_cache(self, path, digest, data):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            prefix = f"{os.path.basename(path)}."
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(prefix) and name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+            cache_path = self._cache_path(path, digest)
+            with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"digest": digest, "plan": data}, f, ensure_ascii=False)
+            os.replace(cache_path + ".tmp", cache_path)
+        except OSError as e:
+            log_util.log.warning(f"任务编译缓存写入失败：{e}")
+
+
+def _plan_problems(plan: TaskPlan, known) -> List[str]:
+    problems = []
+    for item in plan.pre_task:
+        name = item if isinstance(item, str) else item.get("name")
+        if name not in known:
+            problems.append(f"{plan.source}: pre_task 引用了未注册的任务 {name}")
+    for step in plan.steps:
+        if step.action == "exist_task" and step.name not in known:
+            problems.append(f"{plan.source}: 步骤 [{step.name}] 引用了未注册的任务")
+    return problems
+
+
+def check_references(plans: List[TaskPlan], registry: Dict) -> List[str]:
+    """
+    检查 exist_task 与 pre_task 引用的任务是否存在（Python 任务或本批 YAML 任务）
+
+    :return: 问题描述列表
+    """
+    known = set(registry) | {plan.name for plan in plans}
+    return [problem for plan in plans for problem in _plan_problems(plan, known)]
+
+
+def resolve_references(plans: List[TaskPlan], registry: Dict) -> Tuple[List[TaskPlan], List[str]]:
+    """
+    引用了不存在任务的计划视为编译失败并剔除；被剔除计划的引用方随之失效，重复检查直到稳定
+
+    :return: (可注册的计划, 问题描述列表)
+    """
+    plans = list(plans)
+    problems = []
+    while True:
+        known = set(registry) | {plan.name for plan in plans}
+        rejected = {}
+        for plan in plans:
+            plan_problems = _plan_problems(plan, known)
+            if plan_problems:
+                rejected[plan.name] = plan_problems
+        if not rejected:
+            return plans, problems
+        for plan_problems in rejected.values():
+            problems.extend(plan_problems)
+        plans = [plan for plan in plans if plan.name not in rejected]
@@ -1,11 +1,11 @@
 import os
-
-import yaml
+from functools import partial
 
 import log_util
 import task_executor
-from event_util import click_img
+from event_util import click_img, click_text
 from task_executor import TaskExecutor, register_task
+from utils.task_compiler import StepPlan, TaskCompileError, TaskCompiler, TaskPlan, resolve_references
 from utils.task_flow import TaskFlow
 import importlib
 import pkgutil
@@ -14,59 +14,97 @@ ACTION_MAP = {
     "click_img": lambda executor, params: click_img(
         executor,
         params.get("img_path"),
-        params.get("desc", params.get("img_path"))
+        params.get("desc", params.get("img_path")),
+        yaml_region(params.get("region"))
+    ),
+    "click_text": lambda executor, params: click_text(
+        executor,
+        params.get("text"),
+        yaml_region(params.get("region")),
+        params.get("lang")
     )
 }
 
 
+def yaml_region(region):
+    """
+    YAML 中的 region 统一按 0~1 比例坐标处理
+    """
+    if not region:
+        return None
+    return tuple(float(v) for v in region)
+
+
+def when_screen(executor: TaskExecutor, step: StepPlan, action):
+    """
+    步骤声明了 when_screen 时，仅在当前画面匹配时执行，否则视为成功跳过
+    """
+    if not step.when_screen:
+        return action
+
+    def guarded():
+        if not executor.screen_matches(step.when_screen):
+            log_util.log.print(f"[{executor.emulator_name}] 画面不符，跳过步骤 [{step.name}]")
+            return True
+        return action()
+
+    return guarded
+
+
+def run_exist_task(executor: TaskExecutor, params):
+    return executor.run_dependency(params["name"], params.get("params"))
+
+
+def make_task(plan: TaskPlan):
+    """
+    由编译好的执行计划生成任务函数：动作函数在编译时确定，每次执行只绑定 executor
+    """
+    actions = [run_exist_task if step.action == "exist_task" else ACTION_MAP[step.action] for step in plan.steps]
+
+    def task_func(executor: TaskExecutor, params):
+        flow = TaskFlow(executor)
+        for step, action in zip(plan.steps, actions):
+            flow.step(step.name, when_screen(executor, step, partial(action, executor, step.params)),
+                      retry=step.retry, poll_policy=step.poll_policy)
+        return flow.run()
+
+    task_func.plan = plan
+    return task_func
+
+
 def load_yaml_tasks(tasks_dir="tasks"):
     """
-    自动扫描目录下 YAML 文件，将任务注册到 TASK_REGISTRY
+    扫描目录下 YAML 文件，编译（命中磁盘缓存时跳过解析与校验）后将任务注册到 TASK_REGISTRY
+    """
+    paths = [os.path.join(tasks_dir, filename) for filename in sorted(os.listdir(tasks_dir))
+             if filename.endswith(".yaml") or filename.endswith(".yml")]
+    load_yaml_files(paths)
+
+
+def load_yaml_files(paths):
+    """
+    编译并注册指定的 YAML 文件，延迟加载时只编译被执行任务所在的文件
+
+    :return: 是否全部文件都已注册
     """
-    for filename in os.listdir(tasks_dir):
-        if not filename.endswith(".yaml") and not filename.endswith(".yml"):
-            continue
-        path = os.path.join(tasks_dir, filename)
-        with open(path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-
-        task_name = data["name"]
-        pre_task = data.get("pre_task", [])
-        param_defs = data.get("param_defs", [])
-
-        # 动态创建任务函数
-        def make_task(steps):
-
-            def task_func(executor: TaskExecutor, params):
-
-                flow = TaskFlow(executor)
-                for s in steps:
-                    action = s["action"]
-                    if action == "exist_task":
-                        # 每步封装 lambda
-                        flow.step(
-                            s["name"],
-                            lambda s_=s: executor.execute_task(s_["name"], s_["params"]),  # 使用 s_ 作为默认参数名
-                            retry=s.get("retry", 1)
-                        )
-                    else:
-                        action_func = ACTION_MAP.get(s["action"])
-                        if not action_func:
-                            log_util.log.print(f"未定义动作: {s['action']}")
-                            continue
-                        # 每步封装 lambda
-                        flow.step(
-                            s["name"],
-                            lambda s_=s: action_func(executor, s_),  # 使用 s_ 作为默认参数名
-                            retry=s.get("retry", 1)
-                        )
-                return flow.run()
-
-            return task_func
-
-        # 注册任务
-        register_task(task_name, pre_task=pre_task, param_defs=param_defs)(make_task(data.get("steps", [])))
-        log_util.log.print(f"[YAML注册] 已注册任务: {task_name}")
+    compiler = TaskCompiler(actions=ACTION_MAP)
+    plans = []
+    for path in paths:
+        try:
+            plans.append(compiler.compile_file(path))
+        except TaskCompileError as e:
+            log_util.log.error(f"[YAML注册] 编译失败，跳过：{e}")
+
+    plans, problems = resolve_references(plans, task_executor.TASK_REGISTRY)
+    for problem in problems:
+        log_util.log.error(f"[YAML注册] 编译失败，跳过：{problem}")
+
+    for plan in plans:
+        calls = [step.name for step in plan.steps if step.action == "exist_task"]
+        register_task(plan.name, pre_task=list(plan.pre_task), param_defs=list(plan.param_defs),
+                      source=plan.source, satisfied_when=list(plan.satisfied_when), calls=calls)(make_task(plan))
+        log_util.log.print(f"[YAML注册] 已注册任务: {plan.name}")
+    return len(plans) == len(paths)
 
 
 # ======================
@@ -77,6 +115,8 @@ def load_all_tasks(tasks_pkg_name="tasks"):
     自动加载任务模块：
     - 默认扫描 'tasks' 目录下的所有 py 文件
     - 自动 import 模块，从而触发 @register_task 装饰器注册逻辑
+
+    :return: 是否全部加载成功，失败时不应据此生成任务清单
     """
     try:
         tasks_pkg = importlib.import_module(tasks_pkg_name)
@@ -85,7 +125,9 @@ def load_all_tasks(tasks_pkg_name="tasks"):
         load_yaml_tasks()
         # 自动加载所有 YAML 任务
         log_util.log.print(f"已加载所有任务模块，共 {len(task_executor.TASK_REGISTRY)} 个任务")
+        return True
     except ModuleNotFoundError:
         log_util.log.print(f"未找到任务目录：{tasks_pkg_name}")
     except Exception as e:
         log_util.log.print(f"加载任务模块时出错：{e}")
+    return False
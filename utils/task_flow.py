@@ -1,7 +1,11 @@
 
 import time
+
 import log_util
+from debug_recorder import debug_recorder
+from metrics import step_seconds
 from TaskStatus import TaskStatus
+from utils.polling import PollPolicy, poll
 
 
 class TaskStep:
@@ -9,31 +13,39 @@ class TaskStep:
     单步任务
     """
 
-    def __init__(self, name, action, retry=1, timeout=None):
+    def __init__(self, name, action, retry=1, timeout=None, poll_policy: PollPolicy = None):
         self.name = name
         self.action = action
         self.retry = retry
         self.timeout = timeout
+        # 默认保持原来的 0.5 秒重试间隔起步
+        self.poll_policy = poll_policy or PollPolicy(0.5)
 
     def run(self):
         """
         执行任务步骤，返回 TaskStatus
         """
-        start = time.time()
-        for attempt in range(self.retry):
+        attempt = 0
+
+        def run_once():
+            nonlocal attempt
+            attempt += 1
             try:
                 result = self.action()
                 if isinstance(result, TaskStatus):
-                    if result == TaskStatus.SUCCESS:
-                        return TaskStatus.SUCCESS
-                elif result:
-                    return TaskStatus.SUCCESS
+                    return result == TaskStatus.SUCCESS
+                return bool(result)
             except Exception as e:
-                log_util.log.print(f"步骤 [{self.name}] 第 {attempt + 1} 次执行出错: {e}")
-            if self.timeout and (time.time() - start) >= self.timeout:
-                log_util.log.print(f"步骤 [{self.name}] 超时")
-                return TaskStatus.FAILED
-            time.sleep(0.5)  # 每次重试间隔
+                log_util.log.print(f"步骤 [{self.name}] 第 {attempt} 次执行出错: {e}")
+                return False
+
+        success, _ = poll(run_once, self.poll_policy, timeout=self.timeout, attempts=self.retry,
+                          key=f"step:{self.name}")
+        if success:
+            return TaskStatus.SUCCESS
+        if self.timeout and attempt < self.retry:
+            log_util.log.print(f"步骤 [{self.name}] 超时")
+            return TaskStatus.FAILED
         log_util.log.print(f"步骤 [{self.name}] 执行失败")
         return TaskStatus.FAILED
 
@@ -47,11 +59,11 @@ class TaskFlow:
         self.executor = executor
         self.steps = []
 
-    def step(self, name, action, retry=1, timeout=None):
+    def step(self, name, action, retry=1, timeout=None, poll_policy: PollPolicy = None):
         """
         添加一步操作
         """
-        self.steps.append(TaskStep(name, action, retry, timeout))
+        self.steps.append(TaskStep(name, action, retry, timeout, poll_policy))
         return self  # 链式调用
 
     def run(self):
@@ -59,7 +71,11 @@ class TaskFlow:
         执行整个任务流
         """
         for step in self.steps:
+            start = time.perf_counter()
             status = step.run()
+            step_seconds.observe(time.perf_counter() - start, self.executor.emulator_name, step.name,
+                                 "success" if status == TaskStatus.SUCCESS else "failed")
             if status != TaskStatus.SUCCESS:
+                debug_recorder.on_failure(self.executor.emulator_name)
                 return status
         return TaskStatus.SUCCESS